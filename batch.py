@@ -0,0 +1,172 @@
+# python batch.py materials output -p "geometric:hflip,blur:gaussian,edge:canny"
+
+import argparse
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import cv2
+
+from core.io import IMAGE_EXTENSIONS, check_suffix, encode_params, list_images, read_image, save_format, write_image
+from core.pipeline import apply_pipeline, format_pipeline, parse_pipeline, seed_steps
+from core.staged import run_staged
+from core.tiled import run_tiled
+
+
+def init_worker():
+    """
+    工作进程初始化：每个进程只使用单线程 OpenCV，避免多进程与 OpenCV 内部线程池争抢 CPU
+    """
+    cv2.setNumThreads(1)
+
+
+def process_file(src, dst, steps, entropy=None, tile=None, quality=None):
+    """
+    在工作进程中处理单个文件
+
+    参数:
+        entropy (list[int], optional): 噪声种子的熵，指定后每个文件的结果都可复现
+        tile (int, optional): 指定后按该边长分块处理，内存占用与图像大小无关
+        quality (int, optional): 输出的 PNG 压缩级别或 JPEG/WebP 质量，默认使用 core.io 中的默认值
+
+    返回:
+        tuple: (源文件, 耗时秒数, 像素数, 错误信息或 None)
+    """
+    start = time.perf_counter()
+    steps = seed_steps(steps, entropy)
+    try:
+        params = encode_params(save_format(Path(dst).suffix), quality)
+    except ValueError as e:
+        return src, time.perf_counter() - start, 0, str(e)
+    if tile:
+        try:
+            shape = run_tiled(src, dst, steps, tile, params=params)
+        except (cv2.error, OSError, ValueError) as e:
+            return src, time.perf_counter() - start, 0, str(e).strip()
+        if shape is None:
+            return src, time.perf_counter() - start, 0, "failed to write"
+        return src, time.perf_counter() - start, shape[0] * shape[1], None
+
+    img = read_image(src)
+    if img is None:
+        return src, time.perf_counter() - start, 0, "failed to read"
+    try:
+        result = apply_pipeline(img, steps)
+    except (cv2.error, ValueError) as e:
+        return src, time.perf_counter() - start, 0, str(e).strip()
+    try:
+        written = write_image(dst, result, params)
+    except (cv2.error, OSError) as e:
+        return src, time.perf_counter() - start, 0, str(e).strip()
+    if not written:
+        return src, time.perf_counter() - start, 0, "failed to write"
+    return src, time.perf_counter() - start, img.shape[0] * img.shape[1], None
+
+
+def report_results(outcomes, verbose=False):
+    """
+    按完成顺序收集每个文件的 (源文件, 耗时秒数, 像素数, 错误信息或 None)，打印失败的文件
+    """
+    results = []
+    for src, seconds, pixels, error in outcomes:
+        results.append((src, seconds, pixels, error))
+        if error:
+            print(f"[FAIL] {src.name}: {error}")
+        elif verbose:
+            print(f"[ OK ] {src.name}: {seconds * 1000:.1f} ms, {pixels / seconds / 1e6:.1f} MP/s")
+    return results
+
+
+def run_batch(input_dir, output_dir, steps, jobs=None, suffix=None, verbose=False, seed=None, tile=None,
+              quality=None, shared=False):
+    """
+    使用进程池对目录下所有图像执行流水线，并打印吞吐量统计
+
+    shared 为 True 时解码和编码在主进程中进行，图像经共享内存交给工作进程处理，见 core.staged
+    """
+    # 分块模式下也处理以内存映射方式读取的 .npy 文件
+    files = list_images(input_dir, IMAGE_EXTENSIONS + (".npy",) if tile else IMAGE_EXTENSIONS)
+    output_dir = Path(output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+    if not files:
+        print(f"No images found in {input_dir}")
+        return 0
+
+    jobs = jobs or os.cpu_count() or 1
+    targets = [output_dir / (f.stem + (suffix or f.suffix)) for f in files]
+    # 每个文件的噪声种子由 (seed, 文件序号) 派生，与进程调度顺序无关
+    entropies = [None if seed is None else [seed, i] for i in range(len(files))]
+    # 每个进程一次领取多个文件，减少进程间通信次数
+    chunksize = max(1, len(files) // (jobs * 4))
+
+    start = time.perf_counter()
+    if shared:
+        params_list = [encode_params(save_format(target.suffix), quality) for target in targets]
+        results = report_results(run_staged(files, targets, [seed_steps(steps, e) for e in entropies],
+                                            params_list, jobs), verbose)
+    else:
+        with ProcessPoolExecutor(max_workers=jobs, initializer=init_worker) as pool:
+            results = report_results(pool.map(process_file, files, targets,
+                                              [steps] * len(files), entropies, [tile] * len(files),
+                                              [quality] * len(files),
+                                              chunksize=chunksize), verbose)
+    elapsed = time.perf_counter() - start
+
+    done = [r for r in results if r[3] is None]
+    total_pixels = sum(r[2] for r in done)
+    per_file = sorted(r[1] for r in done)
+
+    print(f"Pipeline   : {format_pipeline(steps)}")
+    print(f"Workers    : {jobs}")
+    print(f"Processed  : {len(done)}/{len(files)} files in {elapsed:.2f} s")
+    if done:
+        print(f"Throughput : {len(done) / elapsed:.1f} files/s, {total_pixels / elapsed / 1e6:.1f} MP/s")
+        print(f"Per file   : mean {sum(per_file) / len(per_file) * 1000:.1f} ms, "
+              f"median {per_file[len(per_file) // 2] * 1000:.1f} ms, max {per_file[-1] * 1000:.1f} ms")
+    return len(files) - len(done)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="对目录中的所有图像批量执行处理流水线")
+    parser.add_argument("input_dir", help="输入图像目录")
+    parser.add_argument("output_dir", help="输出目录，不存在时自动创建")
+    parser.add_argument("-p", "--pipeline", required=True,
+                        help='处理流水线，例如 "color_space:gray,blur:median,edge:canny"')
+    parser.add_argument("-j", "--jobs", type=int, default=None, help="工作进程数，默认使用全部 CPU 核心")
+    parser.add_argument("--suffix", default=None, help="输出文件扩展名，例如 .png，默认与输入相同")
+    parser.add_argument("--quality", type=int, default=None,
+                        help="输出的 PNG 压缩级别（0-9）或 JPEG/WebP 质量（WebP 为 101 时无损），默认使用各格式的默认值")
+    parser.add_argument("--seed", type=int, default=None, help="噪声随机种子，指定后结果可复现")
+    parser.add_argument("--tile", type=int, default=None,
+                        help="分块处理的块边长（像素），用于超大图像；.npy 输入按内存映射读取")
+    parser.add_argument("--shared-memory", action="store_true",
+                        help="在主进程中解码和编码，图像经共享内存交给工作进程处理，不在进程间序列化图像")
+    parser.add_argument("-v", "--verbose", action="store_true", help="逐个文件打印耗时")
+    args = parser.parse_args(argv)
+
+    try:
+        steps = parse_pipeline(args.pipeline)
+    except ValueError as e:
+        parser.error(str(e))
+    if args.shared_memory and args.tile:
+        parser.error("--shared-memory cannot be combined with --tile")
+    # 分块模式可以直接写出 .npy；其他扩展名在开始前检查，而不是每个文件都失败
+    if args.suffix is not None and not (args.tile and args.suffix.lower() == ".npy"):
+        try:
+            check_suffix(args.suffix)
+        except ValueError as e:
+            parser.error(str(e))
+
+    try:
+        failed = run_batch(args.input_dir, args.output_dir, steps, args.jobs, args.suffix, args.verbose, args.seed,
+                           args.tile, args.quality, args.shared_memory)
+    except ValueError as e:
+        # 共享内存模式在开始前检查所有输出格式的编码质量
+        parser.error(str(e))
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,241 @@
+# python benchmark.py -o benchmark.json
+# python benchmark.py --sizes 1,16,100 --baseline benchmark.json
+
+import argparse
+import json
+import math
+import platform
+import re
+import sys
+import time
+import tracemalloc
+from datetime import datetime
+from pathlib import Path
+
+import cv2
+import numpy as np
+
+from core import edges, frequency, histogram, spectrum
+from core import measure as measurement
+from core.io import list_images, read_image
+from core.operations import OPERATIONS, POINT_MODES, apply_operation
+from core.pipeline import Step, apply_pipeline, make_proxy
+from gui.display import scaled_for_display, to_qimage
+
+# 默认生成的合成图像大小（百万像素）
+DEFAULT_SIZES = (1, 4, 16)
+# 耗时超过基准的该比例时视为性能回退
+DEFAULT_THRESHOLD = 0.25
+# 基准耗时低于该值（秒）时计时噪声过大，不参与回退判断
+MIN_SECONDS = 0.002
+# 界面结果标签的典型大小，用于测量显示路径
+DISPLAY_SIZE = (800, 600)
+PROXY_MAX_SIDE = 1280
+
+
+def operation_case(op, mode, params=None):
+    return lambda img: apply_operation(img, op, mode, params)
+
+
+def display_case(img):
+    # 缩放、转换为 8 位并包装为 QImage，copy() 对应 QPixmap.fromImage 的像素拷贝
+    small = scaled_for_display(img, *DISPLAY_SIZE)
+    return to_qimage(small).copy()
+
+
+def fft_case(img):
+    result = spectrum.Spectrum(img)
+    return result.centered(result.log_magnitude())
+
+
+def measure_case(img):
+    # 96 孔板布局的区域：建立积分图后逐个区域查询
+    height, width = img.shape[:2]
+    regions = measurement.grid_regions(0, 0, 12, 8, width / 12, height / 8, width // 16, height // 12)
+    return measurement.RegionStats(img).measure(regions, median=True)
+
+
+def benchmark_cases():
+    """
+    所有测量项：名称 -> 以图像为参数的函数
+    """
+    cases = {}
+    for op, (_, modes) in OPERATIONS.items():
+        for mode in modes.values():
+            # 噪声使用固定种子，每次测量生成相同的噪声
+            cases[f"{op}:{mode}"] = operation_case(op, mode, {"seed": 0} if op == "noise" else None)
+    # 大核滤波走频域卷积路径
+    cases["blur:gaussian:sigma=20"] = operation_case("blur", "gaussian", {"sigma": 20})
+    # 秩滤波的耗时应与核大小无关
+    cases["blur:percentile:ksize=31"] = operation_case("blur", "percentile", {"ksize": 31})
+    # 连续的点运算复合为一张查找表，耗时应与单个点运算相同
+    cases["point:chain"] = lambda img: apply_pipeline(img, [Step("point", mode) for mode in POINT_MODES.values()])
+    cases["histogram"] = histogram.histogram
+    cases["fft"] = fft_case
+    cases["display"] = display_case
+    cases["proxy"] = lambda img: make_proxy(img, PROXY_MAX_SIDE)
+    cases["measure"] = measure_case
+    return cases
+
+
+def clear_caches():
+    """
+    清空按图像缓存的梯度、频谱、积分图和传递函数，每次测量都从头计算
+    """
+    edges.clear_cache()
+    measurement.clear_cache()
+    spectrum.clear_cache()
+    frequency.transfer_function.cache_clear()
+    frequency.kernel_spectrum.cache_clear()
+
+
+def synthetic_image(megapixels, seed=0):
+    """
+    生成 4:3 的合成彩色图像：放大的随机低分辨率图像，既有平滑区域也有边缘，接近自然图像
+    """
+    width = round(math.sqrt(megapixels * 1e6 * 4 / 3))
+    height = round(width * 3 / 4)
+    rng = np.random.default_rng(seed)
+    coarse = rng.integers(0, 256, (height // 32 + 2, width // 32 + 2, 3), dtype=np.uint8)
+    return cv2.resize(coarse, (width, height), interpolation=cv2.INTER_LINEAR)
+
+
+def load_images(materials, sizes):
+    """
+    依次产生 (名称, 图像)：素材目录中的图像和指定大小的合成图像；合成图像用到时才生成，测完即释放
+    """
+    if materials:
+        for path in list_images(materials):
+            img = read_image(path)
+            if img is not None:
+                yield path.name, img
+    for size in sizes:
+        yield f"synthetic_{size:g}MP", synthetic_image(size)
+
+
+def measure(func, img, repeat):
+    """
+    返回 (耗时中位数, 最短耗时, 峰值内存字节数)
+
+    峰值内存由 tracemalloc 在单独一次运行中统计，包括经 numpy 分配的数组（OpenCV 的输出数组也经
+    numpy 分配），不包括 OpenCV 内部的临时缓冲区。
+    """
+    times = []
+    for _ in range(repeat):
+        clear_caches()
+        start = time.perf_counter()
+        func(img)
+        times.append(time.perf_counter() - start)
+
+    clear_caches()
+    tracemalloc.start()
+    try:
+        func(img)
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    times.sort()
+    return times[len(times) // 2], times[0], peak
+
+
+def run_benchmarks(materials, sizes, repeat=3, pattern=None, verbose=True):
+    """
+    对每幅图像执行每个测量项，返回 {"名称@图像": 结果} 字典；出错的项记录错误信息
+    """
+    cases = benchmark_cases()
+    if pattern:
+        cases = {name: func for name, func in cases.items() if re.search(pattern, name)}
+
+    results = {}
+    for image_name, img in load_images(materials, sizes):
+        megapixels = img.shape[0] * img.shape[1] / 1e6
+        for name, func in cases.items():
+            key = f"{name}@{image_name}"
+            try:
+                median, best, peak = measure(func, img, repeat)
+            except (cv2.error, ValueError, MemoryError) as e:
+                results[key] = {"error": str(e).strip().splitlines()[0]}
+                print(f"[FAIL] {key}: {results[key]['error']}")
+                continue
+            results[key] = {
+                "seconds": median,
+                "min_seconds": best,
+                "peak_mb": peak / 2 ** 20,
+                "megapixels": megapixels,
+            }
+            if verbose:
+                print(f"{key:<48} {median * 1000:9.2f} ms {megapixels / median:8.1f} MP/s "
+                      f"{peak / 2 ** 20:9.1f} MB")
+    return results
+
+
+def environment():
+    return {
+        "timestamp": datetime.now().isoformat(timespec="seconds"),
+        "platform": platform.platform(),
+        "processor": platform.processor() or platform.machine(),
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "opencv": cv2.__version__,
+        "opencv_threads": cv2.getNumThreads(),
+    }
+
+
+def compare(results, baseline, threshold=DEFAULT_THRESHOLD):
+    """
+    与基准结果比较，返回 [(名称, 基准耗时, 当前耗时)]，只包含慢于基准超过 threshold 的项
+    """
+    regressions = []
+    for key, result in results.items():
+        old = baseline.get(key)
+        if old is None or "seconds" not in old or "seconds" not in result:
+            continue
+        if old["seconds"] < MIN_SECONDS:
+            continue
+        if result["seconds"] > old["seconds"] * (1 + threshold):
+            regressions.append((key, old["seconds"], result["seconds"]))
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="测量各图像操作的耗时与峰值内存，并与基准结果比较")
+    parser.add_argument("--materials", default="materials", help="素材图像目录，传入空字符串时不使用素材")
+    parser.add_argument("--sizes", default=",".join(f"{s:g}" for s in DEFAULT_SIZES),
+                        help="合成图像大小（百万像素），逗号分隔，例如 1,16,100；传入空字符串时不生成")
+    parser.add_argument("-r", "--repeat", type=int, default=3, help="每项重复测量的次数，取中位数")
+    parser.add_argument("-k", "--filter", default=None, help="只运行名称匹配该正则表达式的测量项，例如 \"edge|blur\"")
+    parser.add_argument("-o", "--output", default=None, help="将结果保存为 JSON 文件")
+    parser.add_argument("--baseline", default=None, help="基准结果 JSON 文件，慢于基准的项将被标出")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD,
+                        help=f"判定为回退的相对变慢比例，默认 {DEFAULT_THRESHOLD}")
+    parser.add_argument("--threads", type=int, default=None, help="OpenCV 线程数，默认由 OpenCV 决定")
+    args = parser.parse_args(argv)
+
+    try:
+        sizes = [float(s) for s in args.sizes.split(",") if s.strip()]
+    except ValueError:
+        parser.error(f"Invalid --sizes: {args.sizes}")
+    if args.threads is not None:
+        cv2.setNumThreads(args.threads)
+
+    results = run_benchmarks(args.materials, sizes, args.repeat, args.filter)
+    report = {"environment": environment(), "repeat": args.repeat, "results": results}
+    if args.output:
+        Path(args.output).write_text(json.dumps(report, indent=2), encoding="utf-8")
+        print(f"Results written to {args.output}")
+
+    failed = sum(1 for r in results.values() if "error" in r)
+    if args.baseline:
+        baseline = json.loads(Path(args.baseline).read_text(encoding="utf-8"))["results"]
+        regressions = compare(results, baseline, args.threshold)
+        compared = sum(1 for key in results if key in baseline)
+        print(f"Compared {compared} results with {args.baseline}: {len(regressions)} regression(s)")
+        for key, old, new in regressions:
+            print(f"[SLOW] {key}: {old * 1000:.2f} ms -> {new * 1000:.2f} ms ({new / old - 1:+.0%})")
+        if regressions:
+            return 1
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
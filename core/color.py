@@ -0,0 +1,165 @@
+"""
+颜色空间模型。
+
+图像数组本身不记录颜色空间，处理步骤决定了结果所处的空间：从 BGR（或灰度）原图出发，
+颜色空间转换步骤切换空间，Canny 边缘检测总是得到单通道的灰度图，其余边缘检测保持通道数，
+其余步骤不改变空间。track_space 由步骤推出
+任意一个中间结果的空间，转换、显示和直方图据此解释数据，而不是总把三通道数据当作 BGR。
+
+任意两个空间之间直接转换：
+  * OpenCV 有直接转换代码的（BGR 与其他空间之间）一次完成
+  * 灰度到其他空间：每个输出通道只取决于一个灰度值，预先对 256 个灰度级计算好各通道的查找表；
+    常数通道直接填充，恒等通道直接使用灰度图，其余通道 cv2.LUT 查表，最后合并
+  * YCrCb 到灰度：Y 通道就是灰度（系数相同），直接取出该通道
+  * 其余（HSV、Lab、YCrCb 之间，HSV、Lab 到灰度）按行分块经 BGR 中转，中转缓冲只有一块的大小，
+    不生成整幅的 BGR 副本，数据只读写一遍
+"""
+from functools import lru_cache
+
+import cv2
+import numpy as np
+
+from core.noise import row_chunks
+
+# 颜色空间 -> 通道名称
+SPACES = {
+    "bgr": ("B", "G", "R"),
+    "gray": ("Gray",),
+    "hsv": ("H", "S", "V"),
+    "lab": ("L", "a", "b"),
+    "ycrcb": ("Y", "Cr", "Cb"),
+}
+# 显示用的名称
+SPACE_LABELS = {"bgr": "BGR", "gray": "GRAY", "hsv": "HSV", "lab": "Lab", "ycrcb": "YCrCb"}
+# OpenCV 直接转换代码：(源空间, 目标空间) -> 转换代码
+DIRECT_CODES = {
+    ("bgr", "gray"): cv2.COLOR_BGR2GRAY,
+    ("bgr", "hsv"): cv2.COLOR_BGR2HSV,
+    ("bgr", "lab"): cv2.COLOR_BGR2Lab,
+    ("bgr", "ycrcb"): cv2.COLOR_BGR2YCrCb,
+    ("gray", "bgr"): cv2.COLOR_GRAY2BGR,
+    ("hsv", "bgr"): cv2.COLOR_HSV2BGR,
+    ("lab", "bgr"): cv2.COLOR_Lab2BGR,
+    ("ycrcb", "bgr"): cv2.COLOR_YCrCb2BGR,
+}
+# 转换后丢失颜色信息、不能再转换回来的空间；连续转换经过这些空间时不能合并为一次直接转换
+LOSSY_SPACES = ("gray",)
+
+
+def infer_space(img):
+    """
+    没有步骤信息时按通道数推断：单通道为灰度，否则假定为 BGR
+    """
+    return "gray" if img.ndim == 2 or img.shape[2] == 1 else "bgr"
+
+
+def space_after(step, space):
+    """
+    执行一个步骤之后图像所处的颜色空间
+    """
+    if step.op == "color_space":
+        return step.mode
+    if step.op == "edge" and step.mode == "canny":
+        return "gray"
+    return space
+
+
+def track_space(steps, space="bgr"):
+    """
+    从 space 空间的图像出发，依次执行 steps 后所处的颜色空间
+    """
+    for step in steps:
+        space = space_after(step, space)
+    return space
+
+
+def channel_names(img, space):
+    """
+    图像各通道的名称；通道数与空间不符时（例如带 Alpha 的图像）按位置补全
+    """
+    channels = 1 if img.ndim == 2 else img.shape[2]
+    names = SPACES.get(space, ())
+    if len(names) != channels:
+        names = SPACES["gray"] if channels == 1 else SPACES["bgr"] + ("A",)
+    return names[:channels]
+
+
+@lru_cache(maxsize=None)
+def gray_tables(space):
+    """
+    灰度级 0-255 转换到 space 后各通道的查找表，每个空间只计算一次。
+    每个通道为 int（常数通道）、None（与灰度相同）或长度 256 的 uint8 数组
+    """
+    levels = np.arange(256, dtype=np.uint8).reshape(1, 256)
+    bgr = cv2.cvtColor(levels, cv2.COLOR_GRAY2BGR)
+    table = cv2.cvtColor(bgr, DIRECT_CODES[("bgr", space)]).reshape(256, -1)
+    tables = []
+    for column in table.T:
+        if (column == column[0]).all():
+            tables.append(int(column[0]))
+        elif (column == levels[0]).all():
+            tables.append(None)
+        else:
+            tables.append(np.ascontiguousarray(column))
+    return tuple(tables)
+
+
+def from_gray(img, space):
+    """
+    8 位灰度图像按查找表转换到 space
+    """
+    planes = []
+    for table in gray_tables(space):
+        if table is None:
+            planes.append(img)
+        elif isinstance(table, int):
+            planes.append(np.full_like(img, table))
+        else:
+            planes.append(cv2.LUT(img, table))
+    return cv2.merge(planes)
+
+
+def via_bgr(img, source, target):
+    """
+    按行分块经 BGR 中转转换，中转缓冲只有一块大小
+    """
+    to_bgr = DIRECT_CODES[(source, "bgr")]
+    from_bgr = DIRECT_CODES[("bgr", target)]
+    out = None
+    for rows in row_chunks(img):
+        converted = cv2.cvtColor(cv2.cvtColor(img[rows], to_bgr), from_bgr)
+        if out is None:
+            out = np.empty((img.shape[0],) + converted.shape[1:], dtype=converted.dtype)
+        out[rows] = converted
+    return out
+
+
+def convert(img, source, target):
+    """
+    将 source 空间的图像直接转换到 target 空间；空间相同时原样返回
+    """
+    if source not in SPACES or target not in SPACES:
+        raise ValueError(f"Unknown color space conversion: {source} -> {target}")
+    if source == target:
+        return img
+    if source == "gray":
+        if img.ndim == 3:
+            img = img[:, :, 0]
+        if target != "bgr" and img.dtype == np.uint8:
+            return from_gray(img, target)
+    if img.ndim == 2 and source != "gray":
+        raise ValueError(f"Expected a 3-channel {SPACE_LABELS[source]} image, got a single-channel image")
+    if (source, target) in DIRECT_CODES:
+        return cv2.cvtColor(img, DIRECT_CODES[(source, target)])
+    if (source, target) == ("ycrcb", "gray"):
+        return cv2.extractChannel(img, 0)
+    return via_bgr(img, source, target)
+
+
+def to_bgr(img, space):
+    """
+    转换为可以直接显示或按 BGR 解释的图像；灰度图像保持单通道
+    """
+    if space in (None, "bgr", "gray") or img.ndim == 2 or img.shape[2] != 3:
+        return img
+    return convert(img, space, "bgr")
@@ -0,0 +1,190 @@
+"""
+边缘检测引擎。
+
+同一幅图像的梯度只计算一次并缓存：Sobel 幅值与方向、Scharr 和 Canny 都由缓存的 dx/dy 导出，
+对比多种检测器或拖动 Canny 阈值时不再重复计算梯度。8 位图像的梯度以 int16 保存
+（精确且只占 float64 的四分之一内存），其他情况使用 float32。彩色图像的每个通道分别求梯度。
+"""
+import threading
+from collections import OrderedDict
+
+import cv2
+import numpy as np
+
+from core.memory import budget, freeze, object_bytes
+from core.noise import row_chunks
+
+# 缓存中最多保留的图像个数
+CACHE_SIZE = 4
+# Canny 之前的高斯平滑（与原实现一致）
+CANNY_SIGMA = 0.6
+
+
+def exact_in_int16(img, ksize):
+    """
+    8 位图像用不超过该孔径的导数核时，结果不会超出 int16 的范围
+    """
+    return img.dtype == np.uint8 and ksize <= 5
+
+
+class Gradients:
+    """
+    一组 x/y 方向梯度，幅值和方向在第一次用到时计算
+    """
+    def __init__(self, img, ksize=3, scharr=False, border=cv2.BORDER_DEFAULT):
+        depth = cv2.CV_16S if exact_in_int16(img, 3 if scharr else ksize) else cv2.CV_32F
+        if scharr:
+            self.dx = cv2.Scharr(img, depth, 1, 0, borderType=border)
+            self.dy = cv2.Scharr(img, depth, 0, 1, borderType=border)
+        else:
+            self.dx = cv2.Sobel(img, depth, 1, 0, ksize=ksize, borderType=border)
+            self.dy = cv2.Sobel(img, depth, 0, 1, ksize=ksize, borderType=border)
+        self._magnitude = None
+        self._orientation = None
+
+    def _polar(self, func, **kwargs):
+        """
+        按行分块将 int16 梯度转换为 float32 后计算，不生成整幅图像大小的浮点梯度副本
+        """
+        out = np.empty(self.dx.shape, dtype=np.float32)
+        for rows in row_chunks(self.dx):
+            dx = self.dx[rows].astype(np.float32, copy=False)
+            dy = self.dy[rows].astype(np.float32, copy=False)
+            out[rows] = func(dx, dy, **kwargs)
+        return out
+
+    def magnitude(self):
+        """
+        梯度幅值（float32）
+        """
+        if self._magnitude is None:
+            self._magnitude = self._polar(cv2.magnitude)
+        return self._magnitude
+
+    def orientation(self):
+        """
+        梯度方向（float32，单位为度）
+        """
+        if self._orientation is None:
+            self._orientation = self._polar(cv2.phase, angleInDegrees=True)
+        return self._orientation
+
+
+class EdgeEngine:
+    """
+    一幅图像的边缘检测缓存
+    """
+    def __init__(self, img):
+        self.img = img
+        self._gradients = {}
+        self._laplacian = {}
+        self._blurred = None
+        self.lock = threading.Lock()
+
+    def gradients(self, ksize=3, scharr=False, smoothed=False):
+        """
+        返回缓存的梯度
+
+        参数:
+            ksize (int): Sobel 孔径
+            scharr (bool): 使用 3x3 Scharr 核
+            smoothed (bool): 在 Canny 使用的高斯平滑图像上求梯度（边界复制，与 cv2.Canny 内部一致）
+        """
+        key = (ksize, scharr, smoothed)
+        with self.lock:
+            if key not in self._gradients:
+                if smoothed:
+                    if self._blurred is None:
+                        self._blurred = cv2.GaussianBlur(self.img, (5, 5), CANNY_SIGMA)
+                    self._gradients[key] = Gradients(self._blurred, ksize, scharr, cv2.BORDER_REPLICATE)
+                else:
+                    self._gradients[key] = Gradients(self.img, ksize, scharr)
+            return self._gradients[key]
+
+    def laplacian(self, ksize=1):
+        """
+        Laplacian 响应的绝对值
+        """
+        with self.lock:
+            if ksize not in self._laplacian:
+                depth = cv2.CV_16S if exact_in_int16(self.img, 3) and ksize <= 3 else cv2.CV_32F
+                response = cv2.Laplacian(self.img, depth, ksize=ksize)
+                self._laplacian[ksize] = np.absolute(response)
+            return self._laplacian[ksize]
+
+    def response(self, mode, ksize=None):
+        """
+        Laplacian、Sobel 或 Scharr 的响应强度（归一化之前）
+        """
+        if mode == "laplacian":
+            return self.laplacian(ksize or 1)
+        elif mode == "sobel":
+            return self.gradients(ksize or 3).magnitude()
+        elif mode == "scharr":
+            return self.gradients(scharr=True).magnitude()
+        raise ValueError(f"Edge mode has no raw response: {mode}")
+
+    def canny(self, low=50, high=150):
+        """
+        Canny 边缘，由平滑图像上缓存的 int16 梯度计算，结果与 cv2.Canny(平滑图像) 相同
+        """
+        if self.img.dtype != np.uint8:
+            # cv2.Canny 只支持 8 位图像，交给 OpenCV 报告错误
+            return cv2.Canny(cv2.GaussianBlur(self.img, (5, 5), CANNY_SIGMA), low, high)
+        gradients = self.gradients(smoothed=True)
+        return cv2.Canny(gradients.dx, gradients.dy, low, high)
+
+
+def normalize(response, peak=None):
+    """
+    将响应按峰值线性缩放到 0-255（截断取整），峰值为 0 的平坦图像返回全黑
+
+    参数:
+        peak (float, optional): 缩放所用的最大响应，默认取 response 的最大值
+    """
+    if peak is None:
+        peak = float(np.max(response)) if response.size else 0.0
+    if peak <= 0:
+        return np.zeros(response.shape, dtype=np.uint8)
+    scaled = np.multiply(response, np.float32(255.0 / peak), dtype=np.float32)
+    # 分块处理时块内响应可能略超全图峰值的近似，饱和到 255
+    np.minimum(scaled, 255, out=scaled)
+    return scaled.astype(np.uint8)
+
+
+_cache = OrderedDict()
+_cache_lock = threading.Lock()
+
+
+def engine(img):
+    """
+    返回图像的边缘检测引擎；以数组对象本身作为图像版本，同一幅图像重复调用时复用缓存
+    """
+    key = id(img)
+    with _cache_lock:
+        entry = _cache.get(key)
+        if entry is not None and entry.img is img:
+            _cache.move_to_end(key)
+            return entry
+        # 缓存持有图像，标记为共享（只读），之后不会被原地修改
+        entry = _cache[key] = EdgeEngine(freeze(img))
+        while len(_cache) > CACHE_SIZE:
+            _cache.popitem(last=False)
+        return entry
+
+
+def clear_cache():
+    with _cache_lock:
+        _cache.clear()
+
+
+def cache_bytes():
+    """
+    缓存的梯度等中间结果占用的字节数（不含图像本身）
+    """
+    with _cache_lock:
+        entries = list(_cache.values())
+    return sum(object_bytes(entry, exclude=(entry.img,)) for entry in entries)
+
+
+budget.register("梯度缓存", cache_bytes, lambda excess: clear_cache())
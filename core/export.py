@@ -0,0 +1,77 @@
+"""
+批量导出：在多个线程中并行地读取、处理并编码一组图像。
+
+OpenCV 的解码、处理和编码都会释放 GIL，线程即可并行；与 batch.py 的进程池相比，
+不需要在进程间传递图像，适合在界面程序内使用。同时处理的图像数等于线程数，内存占用有上限。
+"""
+import os
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from pathlib import Path
+
+import cv2
+
+from core.io import read_image, write_image
+from core.pipeline import apply_pipeline
+from core.profiling import span
+
+# 默认导出线程数：每幅图像的处理本身也会使用 OpenCV 的多线程，线程过多只会增加内存占用
+EXPORT_THREADS = min(4, os.cpu_count() or 1)
+
+
+def export_targets(files, output_dir, suffix):
+    """
+    每个源文件对应的输出路径：输出目录下同名、扩展名为 suffix 的文件
+    """
+    output_dir = Path(output_dir)
+    return [output_dir / (Path(f).stem + suffix) for f in files]
+
+
+def export_file(src, dst, steps, params):
+    """
+    处理并保存单个文件，返回错误信息，成功时返回 None
+    """
+    with span("export", "io", path=str(src)):
+        img = read_image(src)
+        if img is None:
+            return "failed to read"
+        try:
+            result = apply_pipeline(img, steps)
+        except (cv2.error, ValueError) as e:
+            return str(e).strip()
+        try:
+            written = write_image(dst, result, params)
+        except (cv2.error, OSError) as e:
+            return str(e).strip()
+        if not written:
+            return "failed to write"
+    return None
+
+
+def export_images(files, output_dir, steps, suffix, params=None, jobs=None, report=None):
+    """
+    对每个文件执行 steps 并以 suffix 格式保存到 output_dir
+
+    参数:
+        params (list, optional): 编码参数，见 core.io.encode_params
+        jobs (int, optional): 并行线程数，默认 EXPORT_THREADS
+        report (callable, optional): 进度回调 report(fraction)，抛出异常时取消尚未开始的文件
+    返回:
+        list[tuple]: 失败的 (源文件, 错误信息)
+    """
+    output_dir = Path(output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+    targets = export_targets(files, output_dir, suffix)
+    failed = []
+    pool = ThreadPoolExecutor(max_workers=jobs or EXPORT_THREADS, thread_name_prefix="export")
+    try:
+        futures = {pool.submit(export_file, src, dst, steps, params): src for src, dst in zip(files, targets)}
+        for done, future in enumerate(as_completed(futures), 1):
+            error = future.result()
+            if error:
+                failed.append((futures[future], error))
+            if report:
+                report(done / len(futures))
+    finally:
+        # 取消时丢弃排队中的文件，只等待正在处理的文件完成
+        pool.shutdown(wait=True, cancel_futures=True)
+    return failed
@@ -0,0 +1,230 @@
+"""
+惰性操作图：记录待执行的步骤，只在需要结果（显示或保存）时才计算。
+
+计算前会先优化步骤序列：
+  * 连续的翻转/旋转合并为一次重映射，相互抵消时完全跳过
+  * 连续的线性滤波（均值、高斯、二维卷积）合并为一次可分离卷积，合并后的核较大时在频域中计算
+  * 连续的颜色空间转换合并为从起始空间到最终空间的一次直接转换，回到起始空间时完全跳过；
+    转换到灰度会丢失颜色，合并在转换到灰度的步骤处断开
+  * 连续的点运算（亮度、对比度、伽马等）复合为一张查找表，只查一遍
+
+执行时，点运算和加噪节点直接写回上一个节点在本次执行中新产生、没有被任何一方持有的结果，
+被替换的中间结果放回临时缓冲区池，供之后的节点和操作复用。
+"""
+import cv2
+import numpy as np
+
+from core.color import LOSSY_SPACES, convert, infer_space, track_space
+from core.frequency import convolve
+from core.memory import is_private, scratch
+from core.operations import INPLACE_OPERATIONS, apply_operation, linear_blur_kernel
+from core.point import apply_table, steps_table
+from core.profiling import image_info, span
+
+# 几何变换在 numpy 视图上的等价写法，仅用于推导多个变换组合后的结果
+GEOMETRIC_VIEWS = {
+    "hflip": lambda a: a[:, ::-1],
+    "vflip": lambda a: a[::-1],
+    "rotate_cw": lambda a: a[::-1].swapaxes(0, 1),
+    "rotate_ccw": lambda a: a.swapaxes(0, 1)[::-1],
+}
+
+# 二面体群的 8 个元素：(名称, numpy 视图写法, 一次完成的实现)
+ORIENTATIONS = [
+    ("identity", lambda a: a, lambda img: img),
+    ("hflip", lambda a: a[:, ::-1], lambda img: cv2.flip(img, 1)),
+    ("vflip", lambda a: a[::-1], lambda img: cv2.flip(img, 0)),
+    ("rotate_180", lambda a: a[::-1, ::-1], lambda img: cv2.flip(img, -1)),
+    ("rotate_cw", lambda a: a[::-1].swapaxes(0, 1), lambda img: cv2.rotate(img, cv2.ROTATE_90_CLOCKWISE)),
+    ("rotate_ccw", lambda a: a.swapaxes(0, 1)[::-1], lambda img: cv2.rotate(img, cv2.ROTATE_90_COUNTERCLOCKWISE)),
+    ("transpose", lambda a: a.swapaxes(0, 1), lambda img: cv2.transpose(img)),
+    ("anti_transpose", lambda a: a[::-1, ::-1].swapaxes(0, 1),
+     lambda img: np.ascontiguousarray(img[::-1, ::-1].swapaxes(0, 1))),
+]
+
+
+class StepNode:
+    """
+    未经合并的单个步骤
+    """
+    def __init__(self, step):
+        self.steps = [step]
+        # 结果可以写入给定的数组（包括输入本身）
+        self.inplace = step.op in INPLACE_OPERATIONS
+
+    def __call__(self, img, out=None):
+        step = self.steps[0]
+        return apply_operation(img, step.op, step.mode, step.params, out=out)
+
+
+class OrientationNode:
+    """
+    由若干翻转/旋转合并而成的一次重映射
+    """
+    def __init__(self, steps):
+        self.steps = steps
+        # 在一个很小的索引数组上依次执行各步骤，再找出结果相同的单个变换
+        probe = np.arange(6).reshape(2, 3)
+        result = probe
+        for step in steps:
+            result = GEOMETRIC_VIEWS[step.mode](result)
+        for name, view, func in ORIENTATIONS:
+            if np.array_equal(view(probe), result):
+                self.name, self.view, self.func = name, view, func
+                break
+
+    def __call__(self, img):
+        return self.func(img)
+
+
+class ConvolutionNode:
+    """
+    由若干线性滤波合并而成的一次可分离卷积
+    """
+    def __init__(self, steps):
+        self.steps = steps
+        kernel_x, kernel_y, self.border = linear_blur_kernel(steps[0].mode, steps[0].params)
+        for step in steps[1:]:
+            next_x, next_y, _ = linear_blur_kernel(step.mode, step.params)
+            # 两次相关运算等价于与两个核的完整卷积做一次相关运算
+            kernel_x = np.convolve(kernel_x, next_x)
+            kernel_y = np.convolve(kernel_y, next_y)
+        self.kernel_x, self.kernel_y = kernel_x, kernel_y
+
+    def __call__(self, img):
+        return convolve(img, self.kernel_x, self.kernel_y, self.border)
+
+
+class ColorNode:
+    """
+    由若干颜色空间转换合并而成的一次直接转换
+    """
+    def __init__(self, steps, source):
+        self.steps = steps
+        self.source = source
+        self.target = steps[-1].mode
+
+    def __call__(self, img):
+        return convert(img, self.source, self.target)
+
+
+class PointNode:
+    """
+    由若干点运算复合而成的一次查表；查找表取决于图像的位深，执行时才生成
+    """
+    inplace = True
+
+    def __init__(self, steps):
+        self.steps = steps
+
+    def __call__(self, img, out=None):
+        return apply_table(img, steps_table(self.steps, img.dtype), out=out)
+
+
+def is_geometric(step):
+    return step.op == "geometric" and step.mode in GEOMETRIC_VIEWS
+
+
+def linear_border(step):
+    """
+    线性滤波步骤返回其边界类型（只有边界类型相同的滤波才能合并），否则返回 None
+    """
+    if step.op != "blur":
+        return None
+    kernel = linear_blur_kernel(step.mode, step.params)
+    return None if kernel is None else kernel[2]
+
+
+def optimize(steps, space="bgr"):
+    """
+    将步骤序列转换为优化后的执行节点列表
+
+    参数:
+        space (str): 输入图像所处的颜色空间，颜色空间转换据此选择转换方式
+
+    合并后的线性滤波在中间过程不再取整到 8 位，结果与逐步执行相差不超过 1 个灰度级；
+    只有紧贴图像边缘、核半径以内的像素因边界外推方式不同会有稍大差异。
+    合并的颜色空间转换省去了中间空间的 8 位取整（经 HSV 中转时逐步执行的误差可达数个灰度级），
+    经过灰度的转换不合并，与逐步执行一致。
+    """
+    nodes = []
+    i = 0
+    while i < len(steps):
+        j = i + 1
+        if is_geometric(steps[i]):
+            while j < len(steps) and is_geometric(steps[j]):
+                j += 1
+            nodes.append(OrientationNode(steps[i:j]))
+        elif linear_border(steps[i]) is not None:
+            border = linear_border(steps[i])
+            while j < len(steps) and linear_border(steps[j]) == border:
+                j += 1
+            # 单个滤波仍使用 OpenCV 的专用实现，结果与逐步执行完全一致
+            nodes.append(ConvolutionNode(steps[i:j]) if j - i > 1 else StepNode(steps[i]))
+        elif steps[i].op == "color_space":
+            # 中间经过有损空间（灰度）时，之后的转换必须从有损的结果出发
+            while j < len(steps) and steps[j].op == "color_space" and steps[j - 1].mode not in LOSSY_SPACES:
+                j += 1
+            nodes.append(ColorNode(steps[i:j], space))
+        elif steps[i].op == "point":
+            while j < len(steps) and steps[j].op == "point":
+                j += 1
+            nodes.append(PointNode(steps[i:j]))
+        else:
+            nodes.append(StepNode(steps[i]))
+        space = track_space(steps[i:j], space)
+        i = j
+    return nodes
+
+
+def execute(img, steps, report=None, space=None):
+    """
+    优化并执行步骤序列
+
+    参数:
+        report (callable, optional): 每个节点开始前以完成比例调用
+        space (str, optional): 输入图像所处的颜色空间，默认按通道数推断（灰度或 BGR）
+    """
+    done = 0
+    # 当前结果是否由本次执行新产生、且没有被任何一方持有（输入图像和被缓存的中间结果都不是）
+    private = False
+    for node in optimize(steps, infer_space(img) if space is None else space):
+        if report is not None:
+            report(done / len(steps))
+        name = ",".join(f"{step.op}:{step.mode}" for step in node.steps)
+        with span(name, "process", input_bytes=int(img.nbytes)) as info:
+            if getattr(node, "inplace", False):
+                # 可以原地执行的节点：写回私有的中间结果，否则写入池中的缓冲区
+                result = node(img, out=img if private and is_private(img) else scratch.take(img.shape, img.dtype))
+            else:
+                result = node(img)
+            info.update(image_info(result))
+        if result is not img:
+            if private and is_private(img) and not np.may_share_memory(result, img):
+                scratch.give(img)
+            private = is_private(result)
+        img = result
+        done += len(node.steps)
+    return img
+
+
+class LazyImage:
+    """
+    惰性图像：源图像加上尚未执行的步骤，第一次取结果时才优化并计算
+    """
+    def __init__(self, source, steps=(), space=None):
+        self.source = source
+        self.steps = list(steps)
+        self.space = space
+        self.result = None
+
+    def then(self, step):
+        """
+        返回追加了一个步骤的新惰性图像，不进行任何计算
+        """
+        return LazyImage(self.source, self.steps + [step], self.space)
+
+    def evaluate(self, report=None):
+        if self.result is None:
+            self.result = execute(self.source, self.steps, report, self.space)
+        return self.result
@@ -0,0 +1,169 @@
+"""
+直方图计算。
+
+8 位图像使用 256 个灰度级，16 位图像使用 65536 个灰度级；
+每个通道的直方图用 cv2.calcHist 直接在交错存储的像素上统计，不复制、不展平图像。
+图像按行分块统计并累加到 int64 计数中：块足够小，各通道依次统计时数据仍在缓存里，
+同时避免 calcHist 的 float32 计数在超大图像上丢失精度。
+percentiles 由直方图的累积计数求百分位数，不需要对像素排序。
+HistogramEngine 保存一幅图像的直方图，图像中只有一块区域改变时只统计这块区域新旧像素的差别。
+"""
+import cv2
+import numpy as np
+
+# 每块统计的像素个数
+CHUNK_PIXELS = 1 << 18
+
+
+def levels(dtype):
+    """
+    图像类型对应的灰度级数
+    """
+    if dtype == np.uint8:
+        return 256
+    if dtype == np.uint16:
+        return 65536
+    raise ValueError(f"Histogram supports 8- and 16-bit images, got {dtype}")
+
+
+def crop(img, roi):
+    """
+    按 (x, y, 宽, 高) 截取区域视图，roi 为 None 时返回整幅图像
+    """
+    if roi is None:
+        return img
+    x, y, w, h = roi
+    return img[y:y + h, x:x + w]
+
+
+def histogram(img, roi=None, mask=None):
+    """
+    计算每个通道的直方图
+
+    参数:
+        img (numpy.ndarray): 8 位或 16 位灰度/多通道图像
+        roi (tuple, optional): 只统计 (x, y, 宽, 高) 区域
+        mask (numpy.ndarray, optional): 与区域同尺寸的 8 位掩码，只统计非零位置
+    返回:
+        numpy.ndarray: 形状为 (通道数, 灰度级数) 的 int64 计数
+    """
+    bins = levels(img.dtype)
+    region = crop(img, roi)
+    channels = 1 if region.ndim == 2 else region.shape[2]
+    hist = np.zeros((channels, bins), dtype=np.int64)
+    if region.size == 0:
+        return hist
+
+    rows = max(1, CHUNK_PIXELS // max(1, region.shape[1]))
+    for y in range(0, region.shape[0], rows):
+        block = region[y:y + rows]
+        block_mask = None if mask is None else mask[y:y + rows]
+        for c in range(channels):
+            counts = cv2.calcHist([block], [c], block_mask, [bins], [0, bins])
+            hist[c] += counts.ravel().astype(np.int64)
+    return hist
+
+
+def cumulative(hist):
+    """
+    累积直方图（每个通道沿灰度级累加）
+    """
+    return np.cumsum(hist, axis=-1)
+
+
+def percentiles(hist, q):
+    """
+    由直方图求各通道的百分位数对应的灰度值
+
+    参数:
+        hist (numpy.ndarray): histogram() 的结果
+        q (float 或 list[float]): 0-100 之间的百分位
+    返回:
+        numpy.ndarray: 形状为 (通道数, len(q)) 的灰度值
+    """
+    cdf = cumulative(np.atleast_2d(hist))
+    q = np.atleast_1d(q)
+    result = np.empty((cdf.shape[0], len(q)), dtype=np.int64)
+    for c in range(cdf.shape[0]):
+        # 第一个累积计数达到 q% 总数的灰度级
+        targets = np.maximum(q / 100.0 * cdf[c, -1], 1)
+        result[c] = np.minimum(np.searchsorted(cdf[c], targets), cdf.shape[1] - 1)
+    return result
+
+
+
+def intersect(a, b):
+    """
+    两个 (x, y, 宽, 高) 区域的交集，不相交时宽或高为 0
+    """
+    x, y = max(a[0], b[0]), max(a[1], b[1])
+    w = max(0, min(a[0] + a[2], b[0] + b[2]) - x)
+    h = max(0, min(a[1] + a[3], b[1] + b[3]) - y)
+    return x, y, w, h
+
+
+def changed_roi(old, new):
+    """
+    两幅同尺寸图像中像素不同的外接矩形 (x, y, 宽, 高)，完全相同时返回 None
+    """
+    diff = old != new
+    if diff.ndim == 3:
+        diff = diff.any(axis=2)
+    rows = np.flatnonzero(diff.any(axis=1))
+    if rows.size == 0:
+        return None
+    cols = np.flatnonzero(diff[rows[0]:rows[-1] + 1].any(axis=0))
+    return int(cols[0]), int(rows[0]), int(cols[-1] - cols[0] + 1), int(rows[-1] - rows[0] + 1)
+
+
+class HistogramEngine:
+    """
+    保存一幅图像（或其中一块区域、掩码内的像素）每个通道的直方图，支持区域更新时的增量维护
+
+    参数:
+        img (numpy.ndarray): 8 位或 16 位灰度/多通道图像
+        roi (tuple, optional): 只统计 (x, y, 宽, 高) 区域
+        mask (numpy.ndarray, optional): 与统计区域同尺寸的 8 位掩码，只统计非零位置
+    """
+    def __init__(self, img, roi=None, mask=None):
+        self.shape = img.shape
+        self.dtype = img.dtype
+        self.roi = (0, 0, img.shape[1], img.shape[0]) if roi is None else tuple(roi)
+        self.mask = mask
+        self.hist = histogram(img, roi, mask)
+
+    def matches(self, img):
+        """
+        img 与统计的图像尺寸、类型相同时可以增量更新
+        """
+        return img.shape == self.shape and img.dtype == self.dtype
+
+    def update(self, roi, old_pixels, new_pixels):
+        """
+        图像中 roi 区域的像素由 old_pixels 变为 new_pixels 后，只统计这块区域来更新直方图；
+        只有落在统计区域和掩码内的像素参与计算
+
+        参数:
+            roi (tuple): 改变的区域 (x, y, 宽, 高)，图像坐标
+            old_pixels, new_pixels (numpy.ndarray): 该区域改变前后的像素
+        """
+        x, y, w, h = intersect(roi, self.roi)
+        if w == 0 or h == 0:
+            return
+        # 改变的区域中与统计区域相交的部分（相对 roi 的坐标）
+        part = (x - roi[0], y - roi[1], w, h)
+        mask = None if self.mask is None else crop(self.mask, (x - self.roi[0], y - self.roi[1], w, h))
+        self.hist -= histogram(old_pixels, part, mask)
+        self.hist += histogram(new_pixels, part, mask)
+
+    def cumulative(self):
+        return cumulative(self.hist)
+
+    def percentiles(self, q):
+        return percentiles(self.hist, q)
+
+    def total(self):
+        """
+        每个通道统计的像素总数
+        """
+        return self.hist.sum(axis=-1)
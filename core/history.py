@@ -0,0 +1,178 @@
+"""
+撤销/重做历史记录。
+
+状态 i 表示在基准图像上依次执行前 i 个步骤后的结果（状态 0 即基准图像）。
+翻转、90° 旋转与反相可以通过逆操作精确撤销，不保存图像；
+其余步骤保存结果快照，快照总大小受内存预算限制，超出时按最近最少使用淘汰，
+被淘汰的状态需要时从最近的更早快照（或基准图像）重放步骤重新计算。
+基准图像与快照都被标记为共享（只读），不会被原地修改。
+"""
+import threading
+from collections import OrderedDict
+
+from core.color import infer_space, track_space
+from core.memory import freeze
+from core.pipeline import Step, apply_pipeline
+
+# 可以通过逆操作撤销的步骤：(操作, 模式) -> 逆步骤
+INVERSE_STEPS = {
+    ("geometric", "hflip"): Step("geometric", "hflip"),
+    ("geometric", "vflip"): Step("geometric", "vflip"),
+    ("geometric", "rotate_cw"): Step("geometric", "rotate_ccw"),
+    ("geometric", "rotate_ccw"): Step("geometric", "rotate_cw"),
+    # 反相的查找表是自身的逆
+    ("point", "invert"): Step("point", "invert"),
+}
+
+
+def inverse_step(step):
+    """
+    返回步骤的逆步骤，不可逆时返回 None
+    """
+    return INVERSE_STEPS.get((step.op, step.mode))
+
+
+class History:
+    """
+    线性的撤销/重做历史。
+
+    record/extend/move 只应在界面线程调用；image_for_undo/image_for_redo
+    只做计算、不改变当前位置，可以在后台线程中调用。
+    """
+    def __init__(self, base, budget_bytes):
+        """
+        参数:
+            base (numpy.ndarray): 基准图像（状态 0），始终保留
+            budget_bytes (int): 快照可使用的最大内存字节数
+        """
+        self.base = freeze(base)
+        self.budget_bytes = budget_bytes
+        self.steps = []
+        self.cursor = 0
+        # 状态序号 -> 快照图像，按最近使用顺序排列
+        self.snapshots = OrderedDict()
+        self.used_bytes = 0
+        self.lock = threading.Lock()
+
+    def active_steps(self):
+        """
+        从基准图像得到当前状态所执行的步骤
+        """
+        return self.steps[:self.cursor]
+
+    def space(self, index=None):
+        """
+        状态 index（默认为当前状态）的图像所处的颜色空间
+        """
+        index = self.cursor if index is None else index
+        return track_space(self.steps[:index], infer_space(self.base))
+
+    def can_undo(self):
+        return self.cursor > 0
+
+    def can_redo(self):
+        return self.cursor < len(self.steps)
+
+    def record(self, step, result):
+        """
+        记录新执行的步骤及其结果，丢弃当前位置之后可重做的步骤
+        """
+        self.extend([step], result)
+
+    def extend(self, steps, result):
+        """
+        一次记录多个步骤，只为最终结果保存快照
+        """
+        if not steps:
+            return
+        with self.lock:
+            del self.steps[self.cursor:]
+            for index in [i for i in self.snapshots if i > self.cursor]:
+                self.used_bytes -= self.snapshots.pop(index).nbytes
+        self.steps.extend(steps)
+        self.cursor = len(self.steps)
+        if inverse_step(steps[-1]) is None:
+            self._store(self.cursor, result)
+
+    def amend(self, step, result):
+        """
+        用参数调整后的步骤替换当前位置的最后一步，丢弃可重做的步骤
+        """
+        with self.lock:
+            del self.steps[self.cursor:]
+            for index in [i for i in self.snapshots if i >= self.cursor]:
+                self.used_bytes -= self.snapshots.pop(index).nbytes
+        self.steps[self.cursor - 1] = step
+        if inverse_step(step) is None:
+            self._store(self.cursor, result)
+
+    def move(self, delta):
+        """
+        撤销（-1）或重做（+1）后更新当前位置
+        """
+        self.cursor = min(max(self.cursor + delta, 0), len(self.steps))
+
+    def image_for_undo(self, current):
+        """
+        计算撤销一步后的图像
+
+        参数:
+            current (numpy.ndarray): 当前状态的图像
+        """
+        step = self.steps[self.cursor - 1]
+        inverse = inverse_step(step)
+        if inverse is not None:
+            return apply_pipeline(current, [inverse])
+        return self.state(self.cursor - 1)
+
+    def image_for_redo(self, current):
+        """
+        计算重做一步后的图像
+        """
+        step = self.steps[self.cursor]
+        if inverse_step(step) is not None:
+            return apply_pipeline(current, [step])
+        return self.state(self.cursor + 1)
+
+    def state(self, index):
+        """
+        返回状态 index 的图像：命中快照直接返回，否则从最近的更早快照重放
+        """
+        if index == 0:
+            return self.base
+        with self.lock:
+            if index in self.snapshots:
+                self.snapshots.move_to_end(index)
+                return self.snapshots[index]
+            start = max((i for i in self.snapshots if i < index), default=0)
+            img = self.snapshots[start] if start else self.base
+        img = apply_pipeline(img, self.steps[start:index], space=self.space(start))
+        self._store(index, img)
+        return img
+
+    def _store(self, index, img):
+        """
+        保存快照，超出预算时淘汰最久未使用的快照（不淘汰刚保存的这一个）
+        """
+        if img.nbytes > self.budget_bytes:
+            return
+        with self.lock:
+            if index in self.snapshots:
+                self.used_bytes -= self.snapshots.pop(index).nbytes
+            self.snapshots[index] = freeze(img)
+            self.used_bytes += img.nbytes
+            while self.used_bytes > self.budget_bytes:
+                _, evicted = self.snapshots.popitem(last=False)
+                self.used_bytes -= evicted.nbytes
+
+    def trim(self, nbytes):
+        """
+        淘汰最久未使用的快照，直到释放至少 nbytes 字节或没有快照；被淘汰的状态需要时重放得到
+        """
+        freed = 0
+        with self.lock:
+            while self.snapshots and freed < nbytes:
+                _, evicted = self.snapshots.popitem(last=False)
+                self.used_bytes -= evicted.nbytes
+                freed += evicted.nbytes
+        return freed
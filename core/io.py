@@ -0,0 +1,112 @@
+"""
+图像文件读写工具。
+
+使用 numpy 读写字节再交给 OpenCV 编解码，
+这样在 Windows 下包含中文的路径也能正常读写（cv2.imread 无法处理）。
+"""
+from pathlib import Path
+
+import cv2
+import numpy as np
+
+from core.profiling import image_info, span
+
+# 支持的图像文件扩展名
+IMAGE_EXTENSIONS = (".png", ".jpg", ".jpeg", ".bmp", ".tif", ".tiff", ".webp")
+
+# 保存格式：名称 -> 扩展名（第一个为默认扩展名）
+SAVE_FORMATS = {
+    "PNG": (".png",),
+    "JPEG": (".jpg", ".jpeg"),
+    "WebP": (".webp",),
+    "TIFF": (".tif", ".tiff"),
+}
+# 各格式可调的编码质量：格式 -> (OpenCV 参数, 说明, 最小值, 最大值, 默认值)
+QUALITY_SETTINGS = {
+    "PNG": (cv2.IMWRITE_PNG_COMPRESSION, "压缩级别（越大文件越小、编码越慢）", 0, 9, 3),
+    "JPEG": (cv2.IMWRITE_JPEG_QUALITY, "质量", 0, 100, 95),
+    # WebP 质量大于 100 时为无损压缩
+    "WebP": (cv2.IMWRITE_WEBP_QUALITY, "质量（101 为无损）", 1, 101, 90),
+}
+# TIFF 没有质量参数，只能选择压缩方式，默认与 OpenCV 相同使用 LZW
+TIFF_COMPRESSIONS = {
+    "LZW": cv2.IMWRITE_TIFF_COMPRESSION_LZW,
+    "Deflate": cv2.IMWRITE_TIFF_COMPRESSION_ADOBE_DEFLATE,
+    "无压缩": cv2.IMWRITE_TIFF_COMPRESSION_NONE,
+}
+
+
+def list_images(directory, extensions=IMAGE_EXTENSIONS):
+    """
+    按文件名排序列出目录下所有支持的图像文件
+    """
+    directory = Path(directory)
+    return sorted(p for p in directory.iterdir() if p.is_file() and p.suffix.lower() in extensions)
+
+
+def save_format(suffix):
+    """
+    按扩展名（例如 ".jpg"）返回保存格式名称，不在 SAVE_FORMATS 中的扩展名返回 None
+    """
+    for name, extensions in SAVE_FORMATS.items():
+        if suffix.lower() in extensions:
+            return name
+    return None
+
+
+def check_suffix(suffix):
+    """
+    检查 OpenCV 能否按扩展名编码图像（SAVE_FORMATS 之外还有 BMP 等），不能时抛出 ValueError
+    """
+    if save_format(suffix) is None and not cv2.haveImageWriter("image" + suffix):
+        raise ValueError(f"Unsupported output format: {suffix!r}")
+
+
+def encode_params(name, quality=None, compression=None):
+    """
+    生成 cv2.imencode 的编码参数
+
+    参数:
+        name (str): 保存格式名称，SAVE_FORMATS 的键；其他格式（例如 BMP）没有可调参数
+        quality (int, optional): PNG 为压缩级别，JPEG/WebP 为质量，None 时使用 QUALITY_SETTINGS 中的默认值
+        compression (str, optional): TIFF 的压缩方式，TIFF_COMPRESSIONS 的键，默认 LZW
+    """
+    if name == "TIFF":
+        return [cv2.IMWRITE_TIFF_COMPRESSION, TIFF_COMPRESSIONS[compression or "LZW"]]
+    if name not in QUALITY_SETTINGS:
+        return []
+    flag, _, minimum, maximum, default = QUALITY_SETTINGS[name]
+    if quality is None:
+        quality = default
+    if not minimum <= quality <= maximum:
+        raise ValueError(f"{name} quality must be between {minimum} and {maximum}, got {quality}")
+    return [flag, int(quality)]
+
+
+def read_image(path, flags=cv2.IMREAD_COLOR):
+    """
+    读取图像，失败时返回 None（与 cv2.imread 行为一致）
+    """
+    try:
+        data = np.fromfile(str(path), dtype=np.uint8)
+    except OSError:
+        return None
+    if data.size == 0:
+        return None
+    with span("decode", "io", path=str(path), file_bytes=int(data.size)) as info:
+        img = cv2.imdecode(data, flags)
+        info.update(image_info(img))
+    return img
+
+
+def write_image(path, img, params=None):
+    """
+    按扩展名编码并写出图像，成功返回 True
+    """
+    with span("encode", "io", path=str(path), **image_info(img)) as info:
+        ok, buffer = cv2.imencode(Path(path).suffix, img, params or [])
+        info["file_bytes"] = int(buffer.size) if ok else 0
+    if not ok:
+        return False
+    buffer.tofile(str(path))
+    return True
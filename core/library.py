@@ -0,0 +1,139 @@
+"""
+目录浏览与解码缓存。
+
+DirectoryBrowser 记录当前图像所在目录中的图像文件，提供上一张/下一张和预取邻居的顺序；
+ImageCache 按最近最少使用淘汰已解码的图像，总大小不超过内存预算。
+"""
+import threading
+from collections import OrderedDict
+from pathlib import Path
+
+import cv2
+
+from core.io import list_images
+from core.memory import freeze
+
+# 只有 JPEG 能在解码时直接按比例缩小（libjpeg 的 DCT 缩放），其他格式缩小解码并不比完整解码快
+REDUCED_DECODE_EXTENSIONS = (".jpg", ".jpeg")
+# 快速显示时的缩小解码，1/4 边长
+REDUCED_DECODE_FLAGS = cv2.IMREAD_REDUCED_COLOR_4
+
+
+def reduced_flags(path):
+    """
+    可以快速缩小解码的文件返回对应的读取标志，否则返回 None
+    """
+    if Path(path).suffix.lower() in REDUCED_DECODE_EXTENSIONS:
+        return REDUCED_DECODE_FLAGS
+    return None
+
+
+def cache_key(path):
+    """
+    缓存键包含修改时间，文件被改写后不会取到旧的解码结果
+    """
+    path = Path(path)
+    try:
+        return str(path.resolve()), path.stat().st_mtime_ns
+    except OSError:
+        return str(path), None
+
+
+class ImageCache:
+    """
+    已解码图像的 LRU 缓存，线程安全
+    """
+    def __init__(self, budget_bytes):
+        self.budget_bytes = budget_bytes
+        self.images = OrderedDict()
+        self.used_bytes = 0
+        self.lock = threading.Lock()
+
+    def get(self, path):
+        key = cache_key(path)
+        with self.lock:
+            img = self.images.get(key)
+            if img is not None:
+                self.images.move_to_end(key)
+            return img
+
+    def __contains__(self, path):
+        with self.lock:
+            return cache_key(path) in self.images
+
+    def put(self, path, img):
+        """
+        放入缓存，超出预算时淘汰最久未使用的图像；单幅超过预算的图像不缓存
+        """
+        if img is None or img.nbytes > self.budget_bytes:
+            return
+        key = cache_key(path)
+        with self.lock:
+            if key in self.images:
+                self.used_bytes -= self.images.pop(key).nbytes
+            # 缓存中的图像可能同时被界面使用，标记为共享（只读）
+            self.images[key] = freeze(img)
+            self.used_bytes += img.nbytes
+            while self.used_bytes > self.budget_bytes:
+                _, evicted = self.images.popitem(last=False)
+                self.used_bytes -= evicted.nbytes
+
+    def trim(self, nbytes):
+        """
+        淘汰最久未使用的图像，直到释放至少 nbytes 字节或缓存为空
+        """
+        freed = 0
+        with self.lock:
+            while self.images and freed < nbytes:
+                _, evicted = self.images.popitem(last=False)
+                self.used_bytes -= evicted.nbytes
+                freed += evicted.nbytes
+        return freed
+
+    def clear(self):
+        with self.lock:
+            self.images.clear()
+            self.used_bytes = 0
+
+
+class DirectoryBrowser:
+    """
+    当前图像所在目录中的图像列表（按文件名排序）
+    """
+    def __init__(self, path):
+        path = Path(path)
+        self.directory = path.parent
+        self.files = list_images(self.directory)
+        self.index = self.find(path)
+
+    def find(self, path):
+        path = Path(path)
+        for i, f in enumerate(self.files):
+            if f.name == path.name:
+                return i
+        # 文件扩展名不在列表中时单独加入，仍然可以浏览
+        self.files.append(path)
+        return len(self.files) - 1
+
+    def current(self):
+        return self.files[self.index]
+
+    def move(self, delta):
+        """
+        移动到上一张（-1）或下一张（+1），到达两端时不再移动；返回新的当前文件，没有移动时返回 None
+        """
+        index = self.index + delta
+        if not 0 <= index < len(self.files):
+            return None
+        self.index = index
+        return self.current()
+
+    def neighbours(self, ahead=2, behind=1):
+        """
+        预取顺序：先是后面的 ahead 张，再是前面的 behind 张（按浏览方向更可能用到的优先）
+        """
+        order = [self.index + i for i in range(1, ahead + 1)] + [self.index - i for i in range(1, behind + 1)]
+        return [self.files[i] for i in order if 0 <= i < len(self.files)]
+
+    def position(self):
+        return f"{self.index + 1}/{len(self.files)}"
@@ -0,0 +1,239 @@
+"""
+矩形区域的颜色测量（比色分析等）。
+
+每幅图像在每个颜色空间下只计算一次积分图和平方积分图（cv2.integral2），
+之后任意矩形区域任意通道的均值和方差都只需读取四个角的值，与区域大小无关；
+数百个区域一次性用数组索引查询。中位数无法由积分图得到，需要时在区域内直接计算。
+积分图为 float64，每个通道每像素占 16 字节。
+"""
+import csv
+import os
+import threading
+from collections import OrderedDict, namedtuple
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from pathlib import Path
+
+import cv2
+import numpy as np
+
+from core.color import SPACES, channel_names, convert
+from core.io import read_image
+from core.memory import budget, freeze, object_bytes
+
+# 测量区域：名称与左上角坐标、宽、高（像素）
+Region = namedtuple("Region", ["name", "x", "y", "w", "h"])
+
+# 缓存的积分图个数（图像 x 颜色空间）
+CACHE_SIZE = 2
+
+
+def convert_space(img, space):
+    """
+    将 BGR（或灰度）图像转换到测量的颜色空间（core.color.SPACES 之一）；
+    注意 HSV 的色调是环形的，区域跨越红色（0/180）时均值没有意义
+    """
+    if space not in SPACES:
+        raise ValueError(f"Unknown color space: {space}")
+    if img.ndim == 2 or img.shape[2] == 1:
+        if space not in ("bgr", "gray"):
+            raise ValueError(f"Cannot measure a grayscale image in {space}")
+        return img
+    return convert(img, "bgr", space)
+
+
+class RegionStats:
+    """
+    一幅图像在一个颜色空间下的积分图，查询矩形区域的均值与标准差
+    """
+    def __init__(self, img, space="bgr"):
+        self.img = img
+        self.space = space
+        self.data = convert_space(img, space)
+        self.channels = channel_names(self.data, space)
+        self.height, self.width = self.data.shape[:2]
+        sums, squares = cv2.integral2(self.data, sdepth=cv2.CV_64F, sqdepth=cv2.CV_64F)
+        # 统一为 (高+1, 宽+1, 通道) 的形状
+        self.sums = sums.reshape(self.height + 1, self.width + 1, -1)
+        self.squares = squares.reshape(self.height + 1, self.width + 1, -1)
+
+    def clip(self, regions):
+        """
+        将区域裁剪到图像范围内，返回 (x1, y1, x2, y2) 四个整数数组
+        """
+        boxes = np.array([(r.x, r.y, r.x + r.w, r.y + r.h) for r in regions], dtype=np.int64).reshape(-1, 4)
+        boxes[:, 0::2] = boxes[:, 0::2].clip(0, self.width)
+        boxes[:, 1::2] = boxes[:, 1::2].clip(0, self.height)
+        return boxes.T
+
+    def box_sum(self, table, x1, y1, x2, y2):
+        return table[y2, x2] - table[y1, x2] - table[y2, x1] + table[y1, x1]
+
+    def mean_std(self, regions):
+        """
+        所有区域各通道的均值与标准差，形状均为 (区域数, 通道数)；空区域为 NaN
+        """
+        x1, y1, x2, y2 = self.clip(regions)
+        count = ((x2 - x1) * (y2 - y1)).astype(np.float64)[:, None]
+        with np.errstate(invalid="ignore", divide="ignore"):
+            mean = self.box_sum(self.sums, x1, y1, x2, y2) / count
+            variance = self.box_sum(self.squares, x1, y1, x2, y2) / count - mean ** 2
+        # 两个大数相减的舍入误差可能使方差略小于 0
+        return mean, np.sqrt(np.maximum(variance, 0))
+
+    def median(self, regions):
+        """
+        各区域各通道的中位数（在区域内直接计算，耗时与区域面积成正比）
+        """
+        x1, y1, x2, y2 = self.clip(regions)
+        medians = np.full((len(regions), len(self.channels)), np.nan)
+        for i in range(len(regions)):
+            if x2[i] > x1[i] and y2[i] > y1[i]:
+                roi = self.data[y1[i]:y2[i], x1[i]:x2[i]].reshape(-1, len(self.channels))
+                medians[i] = np.median(roi, axis=0)
+        return medians
+
+    def measure(self, regions, median=False):
+        """
+        测量所有区域，返回每个区域一个字典：name, x, y, w, h, pixels, 以及各通道的 mean_通道、std_通道（、median_通道）
+        """
+        mean, std = self.mean_std(regions)
+        medians = self.median(regions) if median else None
+        x1, y1, x2, y2 = self.clip(regions)
+        rows = []
+        for i, region in enumerate(regions):
+            row = {"name": region.name, "x": region.x, "y": region.y, "w": region.w, "h": region.h,
+                   "pixels": int((x2[i] - x1[i]) * (y2[i] - y1[i]))}
+            for c, channel in enumerate(self.channels):
+                row[f"mean_{channel}"] = float(mean[i, c])
+                row[f"std_{channel}"] = float(std[i, c])
+                if medians is not None:
+                    row[f"median_{channel}"] = float(medians[i, c])
+            rows.append(row)
+        return rows
+
+
+_cache = OrderedDict()
+_cache_lock = threading.Lock()
+
+
+def region_stats(img, space="bgr"):
+    """
+    返回图像在颜色空间下的积分图；以数组对象本身作为图像版本，同一幅图像重复查询时复用
+    """
+    key = (id(img), space)
+    with _cache_lock:
+        entry = _cache.get(key)
+        if entry is not None and entry.img is img:
+            _cache.move_to_end(key)
+            return entry
+    # 缓存持有图像，标记为共享（只读），之后不会被原地修改
+    entry = RegionStats(freeze(img), space)
+    with _cache_lock:
+        _cache[key] = entry
+        while len(_cache) > CACHE_SIZE:
+            _cache.popitem(last=False)
+    return entry
+
+
+def clear_cache():
+    with _cache_lock:
+        _cache.clear()
+
+
+def cache_bytes():
+    """
+    缓存的积分图占用的字节数（不含图像本身）
+    """
+    with _cache_lock:
+        entries = list(_cache.values())
+    return sum(object_bytes(entry, exclude=(entry.img,)) for entry in entries)
+
+
+budget.register("积分图缓存", cache_bytes, lambda excess: clear_cache())
+
+
+def row_label(row):
+    """
+    行号对应的字母：0 -> A, 25 -> Z, 26 -> AA（与孔板和表格的行列命名一致）
+    """
+    label = ""
+    row += 1
+    while row:
+        row, rest = divmod(row - 1, 26)
+        label = chr(ord("A") + rest) + label
+    return label
+
+
+def grid_regions(x, y, columns, rows, pitch_x, pitch_y, w, h):
+    """
+    按网格排列的区域（例如孔板），名称为行字母加列号：A1, A2, ..., B1, ...
+    """
+    return [Region(f"{row_label(row)}{column + 1}", round(x + column * pitch_x), round(y + row * pitch_y), w, h)
+            for row in range(rows) for column in range(columns)]
+
+
+def read_regions(path):
+    """
+    从 CSV 文件读取区域，需要 name, x, y, w, h 列；测量结果文件本身也可以作为区域文件（同名区域只取一次）
+    """
+    regions = {}
+    with open(path, newline="", encoding="utf-8-sig") as f:
+        for row in csv.DictReader(f):
+            try:
+                region = Region(row["name"], *(int(float(row[key])) for key in ("x", "y", "w", "h")))
+            except KeyError as e:
+                raise ValueError(f"Region file {path} is missing column {e}") from None
+            regions.setdefault(region.name, region)
+    return list(regions.values())
+
+
+def measure_file(path, regions, space="bgr", median=False):
+    """
+    读取并测量一个图像文件，每行前加上图像文件名；无法读取时抛出 ValueError
+    """
+    img = read_image(path)
+    if img is None:
+        raise ValueError(f"Cannot read image {path}")
+    rows = RegionStats(img, space).measure(regions, median)
+    return [{"image": Path(path).name, **row} for row in rows]
+
+
+def measure_images(files, regions, space="bgr", median=False, jobs=None, report=None):
+    """
+    用同一组区域测量多幅图像，多线程并行；结果按文件顺序排列
+
+    参数:
+        report (callable, optional): 进度回调 report(fraction)，抛出异常时取消尚未开始的文件
+    返回:
+        tuple: (测量结果行的列表, 失败的 (文件, 错误信息) 列表)
+    """
+    results = [None] * len(files)
+    failed = []
+    pool = ThreadPoolExecutor(max_workers=jobs or min(4, os.cpu_count() or 1), thread_name_prefix="measure")
+    try:
+        futures = {pool.submit(measure_file, path, regions, space, median): i for i, path in enumerate(files)}
+        for done, future in enumerate(as_completed(futures), 1):
+            i = futures[future]
+            try:
+                results[i] = future.result()
+            except (cv2.error, ValueError) as e:
+                failed.append((files[i], str(e).strip()))
+            if report:
+                report(done / len(futures))
+    finally:
+        pool.shutdown(wait=True, cancel_futures=True)
+    return [row for rows in results if rows for row in rows], failed
+
+
+def write_measurements(path, rows):
+    """
+    将测量结果写为 CSV；不同图像的通道不同时（灰度与彩色）列取并集
+    """
+    fields = []
+    for row in rows:
+        fields.extend(key for key in row if key not in fields)
+    # utf-8-sig 使 Excel 能正确识别中文文件名
+    with open(path, "w", newline="", encoding="utf-8-sig") as f:
+        writer = csv.DictWriter(f, fieldnames=fields)
+        writer.writeheader()
+        writer.writerows(rows)
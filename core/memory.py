@@ -0,0 +1,235 @@
+"""
+内存管理：图像数组的写时复制、临时缓冲区的复用，以及整个进程的内存预算与占用统计。
+
+写时复制：处理函数从不修改输入，结果图像可以被多处同时持有（原图与结果图、历史快照、
+各种按图像缓存的中间结果）。持有图像的一方用 freeze 把数组标记为只读，之后 numpy 和 OpenCV
+都拒绝写入；需要修改图像的一方用 writable 取得可写的数组，只有已被共享（只读）时才复制。
+core.graph 据此在流水线内部对自己刚产生、未被任何一方持有的中间结果原地执行点运算和加噪。
+
+临时缓冲区：按 (形状, 类型) 保存用完的缓冲区，之后的操作直接复用，不再重新分配。
+
+内存预算：各个占用内存的部分（缓存、历史记录、临时缓冲区）登记自己的占用统计和释放方法，
+总占用超过预算时先释放重新计算代价小的部分，直到回到预算以内。
+"""
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+
+import numpy as np
+
+# 默认的进程内存预算（MB）
+DEFAULT_BUDGET_MB = 2048
+# 临时缓冲区池最多保存的字节数
+SCRATCH_LIMIT_MB = 256
+# 超出预算时的释放顺序：先释放重新计算代价小的部分
+RELEASE_SCRATCH = 0
+RELEASE_DERIVED = 1
+RELEASE_DECODED = 2
+RELEASE_HISTORY = 3
+
+
+def root(img):
+    """
+    数组实际占用内存的所有者：沿视图的 base 向上直到拥有数据的数组
+    """
+    while isinstance(img.base, np.ndarray):
+        img = img.base
+    return img
+
+
+def buffer_bytes(arrays):
+    """
+    若干数组实际占用的字节数；共享同一块内存的数组（同一对象、视图）只计一次
+    """
+    owners = {}
+    for img in arrays:
+        if img is not None:
+            owner = root(img)
+            owners[id(owner)] = owner.nbytes
+    return sum(owners.values())
+
+
+def object_bytes(obj, exclude=()):
+    """
+    对象（及其属性、字典、列表中）持有的 numpy 数组的字节数，exclude 中的数组不计
+    """
+    seen = {id(root(img)) for img in exclude if img is not None}
+    total = 0
+    stack = [obj]
+    visited = set()
+    while stack:
+        item = stack.pop()
+        if id(item) in visited:
+            continue
+        visited.add(id(item))
+        if isinstance(item, np.ndarray):
+            owner = root(item)
+            if id(owner) not in seen:
+                seen.add(id(owner))
+                total += owner.nbytes
+        elif isinstance(item, dict):
+            stack.extend(item.values())
+        elif isinstance(item, (list, tuple)):
+            stack.extend(item)
+        elif hasattr(item, "__dict__"):
+            stack.extend(vars(item).values())
+    return total
+
+
+def freeze(img):
+    """
+    将数组（以及它作为视图所依赖的数组）标记为只读，表示它已被共享，返回 img
+    """
+    item = img
+    while isinstance(item, np.ndarray):
+        item.flags.writeable = False
+        item = item.base
+    return img
+
+
+def is_private(img):
+    """
+    数组是否可以原地修改：拥有自己的数据且未被标记为共享
+    """
+    return img.base is None and img.flags.writeable
+
+
+def writable(img):
+    """
+    写时复制：未共享的数组直接返回，已共享的数组返回一份可写的副本
+    """
+    return img if is_private(img) else img.copy()
+
+
+class ScratchPool:
+    """
+    临时缓冲区池，线程安全。同一 (形状, 类型) 的缓冲区用完放回后可被之后的操作复用
+    """
+    def __init__(self, limit_bytes):
+        self.limit_bytes = limit_bytes
+        self.buffers = OrderedDict()
+        self.used_bytes = 0
+        self.lock = threading.Lock()
+
+    def take(self, shape, dtype):
+        """
+        取出一个缓冲区（内容未初始化），池中没有时新分配
+        """
+        key = (tuple(shape), np.dtype(dtype))
+        with self.lock:
+            free = self.buffers.get(key)
+            if free:
+                buffer = free.pop()
+                self.used_bytes -= buffer.nbytes
+                if not free:
+                    del self.buffers[key]
+                return buffer
+        return np.empty(shape, dtype)
+
+    def give(self, buffer):
+        """
+        放回不再使用的缓冲区；已共享或是视图的数组不接受，超出上限时丢弃最久未用的
+        """
+        if not is_private(buffer) or buffer.nbytes > self.limit_bytes:
+            return
+        key = (buffer.shape, buffer.dtype)
+        with self.lock:
+            self.buffers.setdefault(key, []).append(buffer)
+            self.buffers.move_to_end(key)
+            self.used_bytes += buffer.nbytes
+            while self.used_bytes > self.limit_bytes:
+                oldest = next(iter(self.buffers))
+                free = self.buffers[oldest]
+                self.used_bytes -= free.pop(0).nbytes
+                if not free:
+                    del self.buffers[oldest]
+
+    @contextmanager
+    def borrow(self, shape, dtype):
+        """
+        在 with 语句中使用一个缓冲区，结束后放回
+        """
+        buffer = self.take(shape, dtype)
+        try:
+            yield buffer
+        finally:
+            self.give(buffer)
+
+    def usage(self):
+        return self.used_bytes
+
+    def clear(self):
+        with self.lock:
+            self.buffers.clear()
+            self.used_bytes = 0
+
+
+class MemoryBudget:
+    """
+    进程的内存预算：登记各部分的占用与释放方法，统计总占用，超出预算时释放
+    """
+    def __init__(self, limit_bytes):
+        self.limit_bytes = limit_bytes
+        # 名称 -> (释放顺序, 占用统计函数, 释放函数或 None)
+        self.consumers = {}
+        self.lock = threading.Lock()
+
+    def register(self, name, usage, release=None, order=RELEASE_DERIVED):
+        """
+        登记一个占用内存的部分，同名的部分被替换
+
+        参数:
+            usage (callable): 返回当前占用的字节数
+            release (callable, optional): release(字节数) 释放至少这么多内存（做不到时尽量释放）；
+                                          不可释放的部分（例如正在显示的图像）为 None
+            order (int): 释放顺序，小的先释放
+        """
+        with self.lock:
+            self.consumers[name] = (order, usage, release)
+
+    def unregister(self, name):
+        with self.lock:
+            self.consumers.pop(name, None)
+
+    def set_limit(self, limit_bytes):
+        self.limit_bytes = limit_bytes
+        self.enforce()
+
+    def report(self):
+        """
+        各部分当前的占用：[(名称, 字节数)]
+        """
+        with self.lock:
+            consumers = sorted(self.consumers.items(), key=lambda item: item[1][0])
+        return [(name, int(usage())) for name, (_, usage, _) in consumers]
+
+    def total(self):
+        return sum(size for _, size in self.report())
+
+    def enforce(self):
+        """
+        总占用超出预算时按释放顺序依次释放，返回释放的字节数
+        """
+        excess = self.total() - self.limit_bytes
+        freed = 0
+        if excess <= 0:
+            return 0
+        with self.lock:
+            consumers = sorted(self.consumers.values(), key=lambda consumer: consumer[0])
+        for _, usage, release in consumers:
+            if excess <= 0:
+                break
+            if release is None:
+                continue
+            before = usage()
+            release(excess)
+            released = before - usage()
+            freed += released
+            excess -= released
+        return freed
+
+
+# 整个进程共用的临时缓冲区池与内存预算
+scratch = ScratchPool(SCRATCH_LIMIT_MB * 1024 * 1024)
+budget = MemoryBudget(DEFAULT_BUDGET_MB * 1024 * 1024)
+budget.register("临时缓冲区", scratch.usage, lambda excess: scratch.clear(), RELEASE_SCRATCH)
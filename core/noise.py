@@ -0,0 +1,162 @@
+"""
+噪声生成引擎。
+
+所有噪声都由带种子的 numpy Generator 产生，相同的种子和图像尺寸得到完全相同的结果。
+噪声按行分块计算：每块只使用一个可复用的 int16/float32 缓冲区并原地运算，
+避免生成与整幅图像同样大小的 float64 中间数组；分块缓冲区取自 core.memory 的临时缓冲区池，
+连续的加噪操作复用同一块内存。每块先读出输入再写入结果，因此结果可以直接写回输入图像。
+"""
+from functools import lru_cache
+from statistics import NormalDist
+
+import numpy as np
+
+from core.memory import scratch
+
+# 每块处理的元素个数（float32 缓冲区约 4 MB，能较好地留在缓存中）
+CHUNK_ELEMENTS = 1 << 20
+
+
+def row_chunks(img):
+    """
+    按行把图像划分为若干块，返回各块的行切片
+    """
+    row_size = max(1, img.size // max(1, img.shape[0]))
+    rows = max(1, CHUNK_ELEMENTS // row_size)
+    return [slice(start, start + rows) for start in range(0, img.shape[0], rows)]
+
+
+@lru_cache(maxsize=None)
+def normal_quantiles():
+    """
+    标准正态分布的 65536 个等概率分位点（float32，只计算一次）
+
+    用 16 位均匀随机整数查这张表即可得到正态分布样本（截断在约 ±4.3σ），
+    比直接生成正态随机数快得多，对 8 位图像的噪声已足够精确。
+    """
+    dist = NormalDist()
+    return np.array([dist.inv_cdf((i + 0.5) / 65536) for i in range(65536)], dtype=np.float32)
+
+
+def max_value(dtype):
+    """
+    图像类型的最大像素值：整数类型取类型上限，浮点类型按 [0, 1] 处理
+    """
+    if np.issubdtype(dtype, np.integer):
+        return np.iinfo(dtype).max
+    return 1.0
+
+
+class NoiseGenerator:
+    """
+    带种子的噪声生成器。所有方法默认返回新图像、不修改输入；
+    给出 out 时结果写入 out，out 可以就是输入图像（原地加噪）
+    """
+    def __init__(self, seed=None):
+        self.rng = np.random.default_rng(seed)
+
+    def gaussian(self, img, mean=0.0, variance=500.0, out=None):
+        """
+        加性高斯噪声
+
+        参数:
+            mean (float): 噪声均值
+            variance (float): 噪声方差（以像素值为单位）
+        """
+        sigma = float(variance) ** 0.5
+        out = np.empty_like(img) if out is None else out
+        if img.dtype == np.uint8:
+            # 8 位图像：噪声先量化为 int16 查找表，之后全部是整数运算
+            table = np.rint(normal_quantiles() * sigma + mean).astype(np.int16)
+            with scratch.borrow((CHUNK_ELEMENTS,), np.int16) as buffer:
+                for rows in row_chunks(img):
+                    src = img[rows]
+                    noise = buffer[:src.size].reshape(src.shape)
+                    np.take(table, self.rng.integers(0, 65536, src.shape, dtype=np.uint16), out=noise)
+                    noise += src
+                    self._store(out[rows], noise)
+            return out
+
+        with scratch.borrow((CHUNK_ELEMENTS,), np.float32) as buffer:
+            for rows in row_chunks(img):
+                src = img[rows]
+                noise = buffer[:src.size].reshape(src.shape)
+                self.rng.standard_normal(out=noise, dtype=np.float32)
+                # noise = noise * sigma + mean + src，全部原地完成
+                noise *= sigma
+                noise += mean
+                noise += src
+                self._store(out[rows], noise)
+        return out
+
+    def speckle(self, img, variance=0.04, out=None):
+        """
+        乘性散斑噪声：out = img * (1 + n)，n 服从均值 0、方差 variance 的高斯分布
+        """
+        sigma = float(variance) ** 0.5
+        out = np.empty_like(img) if out is None else out
+        with scratch.borrow((CHUNK_ELEMENTS,), np.float32) as buffer:
+            for rows in row_chunks(img):
+                src = img[rows]
+                noise = buffer[:src.size].reshape(src.shape)
+                self.rng.standard_normal(out=noise, dtype=np.float32)
+                noise *= sigma
+                noise += 1.0
+                noise *= src
+                self._store(out[rows], noise)
+        return out
+
+    def poisson(self, img, peak=255.0, out=None):
+        """
+        泊松（散粒）噪声：把像素值按 peak 换算为光子数后采样
+
+        参数:
+            peak (float): 最亮像素对应的光子数，越小噪声越明显
+        """
+        scale = float(peak) / max_value(img.dtype)
+        out = np.empty_like(img) if out is None else out
+        for rows in row_chunks(img):
+            src = img[rows]
+            counts = self.rng.poisson(src * scale).astype(np.float32)
+            counts /= scale
+            self._store(out[rows], counts)
+        return out
+
+    def salt_pepper(self, img, probability=0.01, salt_ratio=0.5, out=None):
+        """
+        椒盐噪声：每个像素以 probability 的概率被替换为白色（盐）或黑色（椒）
+
+        每个像素独立地以 probability 的概率被选中，因此按行分块时每块被选中的像素数服从二项分布：
+        先抽取个数，再不放回地抽取这么多个互不相同的像素下标，耗时与被替换的像素数成正比，
+        不需要为每个像素生成随机数。被选中的像素按行列下标写入，out 不连续时也直接写入 out 本身。
+
+        参数:
+            probability (float): 每个像素被替换的概率
+            salt_ratio (float): 被替换像素中设为白色的概率
+        """
+        if out is None:
+            out = img.copy()
+        elif out is not img:
+            np.copyto(out, img)
+        width = img.shape[1]
+        for rows in row_chunks(img):
+            block = out[rows]
+            pixels = block.shape[0] * width
+            count = self.rng.binomial(pixels, probability)
+            # 下标的先后顺序无关紧要，不需要打乱
+            ys, xs = np.divmod(self.rng.choice(pixels, count, replace=False, shuffle=False), width)
+            salt = self.rng.random(count) < salt_ratio
+            # 彩色图像同一像素的所有通道一起替换
+            block[ys[salt], xs[salt]] = max_value(img.dtype)
+            block[ys[~salt], xs[~salt]] = 0
+        return out
+
+    @staticmethod
+    def _store(dst, values):
+        """
+        将结果原地截断到图像取值范围后写入 dst（浮点结果写入整数图像时四舍五入）
+        """
+        np.clip(values, 0, max_value(dst.dtype), out=values)
+        if values.dtype.kind == "f" and dst.dtype.kind in "iu":
+            np.rint(values, out=values)
+        np.copyto(dst, values, casting="unsafe")
@@ -0,0 +1,356 @@
+"""
+图像处理核心操作。
+
+本模块不依赖 Qt，所有函数都接收并返回 numpy 图像数组，
+既可以被主窗口调用，也可以在脚本或批处理中直接导入使用。
+"""
+import math
+from collections import namedtuple
+
+import cv2
+import numpy as np
+
+from core import edges
+from core.color import convert, infer_space
+from core.frequency import FFT_KERNEL_SIZE, FILTER_BANDS, convolve, filter_radius, frequency_filter
+from core.noise import NoiseGenerator
+from core.point import apply_table, point_table
+from core.rank import max_filter, median_filter, min_filter, rank_filter
+
+# 界面下拉框中的文字与操作模式名称的对应关系
+COLOR_SPACE_MODES = {
+    "BGR": "bgr",
+    "GRAY": "gray",
+    "HSV": "hsv",
+    "YCrCb": "ycrcb",
+}
+GEOMETRIC_MODES = {
+    "水平翻转": "hflip",
+    "竖直翻转": "vflip",
+    "顺时针旋转": "rotate_cw",
+    "逆时针旋转": "rotate_ccw",
+}
+NOISE_MODES = {
+    "高斯噪声": "gaussian",
+    "椒盐噪声": "salt_pepper",
+    "泊松噪声": "poisson",
+    "散斑噪声": "speckle",
+}
+BLUR_MODES = {
+    "均值滤波": "mean",
+    "中值滤波": "median",
+    "百分位滤波": "percentile",
+    "最小值滤波": "min",
+    "最大值滤波": "max",
+    "高斯滤波": "gaussian",
+    "二维卷积": "filter2d",
+    "低通滤波": "lowpass",
+    "高通滤波": "highpass",
+    "带通滤波": "bandpass",
+}
+EDGE_MODES = {
+    "Canny": "canny",
+    "Laplacian": "laplacian",
+    "Sobel": "sobel",
+    "Scharr": "scharr",
+}
+POINT_MODES = {
+    "亮度": "brightness",
+    "对比度": "contrast",
+    "伽马校正": "gamma",
+    "二值化": "threshold",
+    "反相": "invert",
+    "色阶拉伸": "levels",
+}
+# 秩滤波模式：窗口内排序后取值，任意核大小的耗时都相同（见 core.rank）
+RANK_BLUR_MODES = ("median", "percentile", "min", "max")
+# 输出按最大响应归一化的边缘检测模式
+NORMALIZED_EDGE_MODES = ("laplacian", "sobel", "scharr")
+
+
+def change_color_space(img, mode, source=None):
+    """
+    图像颜色空间转换，在任意两个空间之间直接转换，参见 core.color.convert
+
+    参数:
+        img (numpy.ndarray): 输入图像
+        mode (str): 目标空间 "bgr"、"gray"、"hsv" 或 "ycrcb"
+        source (str, optional): 输入图像所处的空间，默认按通道数推断（灰度或 BGR）；
+                                流水线中由 core.graph 根据之前的步骤给出
+    """
+    if mode not in COLOR_SPACE_MODES.values():
+        raise ValueError(f"Unknown color space mode: {mode}")
+    return convert(img, infer_space(img) if source is None else source, mode)
+
+
+def geometric_transform(img, mode):
+    """
+    图像几何变换
+
+    参数:
+        img (numpy.ndarray): 输入图像
+        mode (str): "hflip"、"vflip"、"rotate_cw" 或 "rotate_ccw"
+    """
+    if mode == "hflip":
+        return cv2.flip(img, 1)
+    elif mode == "vflip":
+        return cv2.flip(img, 0)
+    elif mode == "rotate_cw":
+        return cv2.rotate(img, cv2.ROTATE_90_CLOCKWISE)
+    elif mode == "rotate_ccw":
+        return cv2.rotate(img, cv2.ROTATE_90_COUNTERCLOCKWISE)
+    raise ValueError(f"Unknown geometric mode: {mode}")
+
+
+def add_noise(img, mode, seed=None, variance=None, probability=0.01, peak=255, out=None):
+    """
+    图像加噪，返回新的图像，不修改输入；给出 out 时结果写入 out（可以就是 img）
+
+    参数:
+        img (numpy.ndarray): 输入图像
+        mode (str): "gaussian"、"salt_pepper"、"poisson" 或 "speckle"
+        seed (int, optional): 随机种子，相同种子与图像尺寸得到相同的噪声
+        variance (float, optional): 高斯噪声的方差（默认 500）或散斑噪声的相对方差（默认 0.04）
+        probability (float): 椒盐噪声中每个像素被替换的概率
+        peak (float): 泊松噪声中最亮像素对应的光子数
+        out (numpy.ndarray, optional): 与 img 形状、类型相同的输出数组
+    """
+    generator = NoiseGenerator(seed)
+
+    if mode == "gaussian":
+        # 均值 0 的高斯噪声
+        return generator.gaussian(img, mean=0, variance=500 if variance is None else variance, out=out)
+    elif mode == "salt_pepper":
+        return generator.salt_pepper(img, probability=probability, out=out)
+    elif mode == "poisson":
+        return generator.poisson(img, peak=peak, out=out)
+    elif mode == "speckle":
+        return generator.speckle(img, variance=0.04 if variance is None else variance, out=out)
+
+    raise ValueError(f"Unknown noise mode: {mode}")
+
+
+def image_blur(img, mode, ksize=None, sigma=None, kind="gaussian", cutoff=0.1, cutoff_high=0.4, order=2,
+               percentile=25):
+    """
+    图像滤波
+
+    参数:
+        img (numpy.ndarray): 输入图像
+        mode (str): 空域的 "mean"、"median"、"gaussian"、"filter2d"，
+                    秩滤波的 "percentile"、"min"、"max"，
+                    或频域的 "lowpass"、"highpass"、"bandpass"
+        ksize (int, optional): 空域滤波核边长，默认高斯为 5（给出 sigma 时取 3 倍 sigma），其余为 3
+        sigma (float, optional): 高斯滤波的标准差，默认 0.6
+        kind, cutoff, cutoff_high, order: 频域滤波器的类型与参数，见 core.frequency.transfer_function
+        percentile (float): 百分位滤波取窗口内的第几百分位（0-100）
+    """
+    if mode in FILTER_BANDS:
+        return frequency_filter(img, mode, kind, cutoff, cutoff_high if mode == "bandpass" else None, order)
+    if mode == "median":
+        return median_filter(img, ksize or 3)
+    elif mode == "percentile":
+        return rank_filter(img, ksize or 3, percentile)
+    elif mode == "min":
+        return min_filter(img, ksize or 3)
+    elif mode == "max":
+        return max_filter(img, ksize or 3)
+
+    kernel = linear_blur_kernel(mode, {"ksize": ksize, "sigma": sigma})
+    if kernel is None:
+        raise ValueError(f"Unknown blur mode: {mode}")
+    kernel_x, kernel_y, border = kernel
+    size = len(kernel_x)
+    if size >= FFT_KERNEL_SIZE:
+        # 大核在频域中卷积，耗时与核大小无关
+        return convolve(img, kernel_x, kernel_y, border)
+    if mode == "mean":
+        return cv2.blur(img, (size, size))
+    elif mode == "gaussian":
+        return cv2.GaussianBlur(img, (size, size), gaussian_size(ksize, sigma)[1])
+    kernel = np.ones((size, size)) / size ** 2
+    return cv2.filter2D(img, -1, kernel, borderType=cv2.BORDER_CONSTANT)
+
+
+def gaussian_size(ksize, sigma):
+    """
+    高斯滤波的 (核边长, 标准差)：都未给出时为 5 与 0.6，只给出 sigma 时核覆盖 ±3 sigma
+    """
+    if ksize is None:
+        if sigma is None:
+            return 5, 0.6
+        ksize = 2 * math.ceil(3 * sigma) + 1
+    return ksize, 0 if sigma is None else sigma
+
+
+def linear_blur_kernel(mode, params=None):
+    """
+    返回线性滤波模式对应的可分离卷积核 (kernel_x, kernel_y, 边界类型)，
+    与 image_blur 使用的参数一致；中值滤波、频域滤波等模式返回 None。
+    """
+    params = params or {}
+    ksize = params.get("ksize")
+    if mode == "mean":
+        kernel = np.full(ksize or 3, 1 / (ksize or 3))
+        return kernel, kernel, cv2.BORDER_DEFAULT
+    elif mode == "gaussian":
+        kernel = cv2.getGaussianKernel(*gaussian_size(ksize, params.get("sigma"))).ravel()
+        return kernel, kernel, cv2.BORDER_DEFAULT
+    elif mode == "filter2d":
+        kernel = np.full(ksize or 3, 1 / (ksize or 3))
+        return kernel, kernel, cv2.BORDER_CONSTANT
+    return None
+
+
+def edge_response(img, mode, ksize=None):
+    """
+    Laplacian、Sobel、Scharr 归一化之前的响应强度（Laplacian 取绝对值），由缓存的梯度得到
+
+    参数:
+        ksize (int, optional): 算子孔径，默认 Laplacian 为 1、Sobel 为 3
+    """
+    return edges.engine(img).response(mode, ksize)
+
+
+def edge_detect(img, mode, peak=None, ksize=None, low=50, high=150):
+    """
+    图像边缘检测
+
+    参数:
+        img (numpy.ndarray): 输入图像，彩色图像的每个通道分别计算
+        mode (str): "canny"、"laplacian"、"sobel" 或 "scharr"
+        peak (float, optional): 归一化所用的最大响应，默认取本图像的最大值；
+                                分块处理时传入整幅图像的最大值，保证各块亮度一致
+        ksize (int, optional): Laplacian/Sobel 的算子孔径
+        low, high (float): Canny 的滞后阈值
+    """
+    if mode in NORMALIZED_EDGE_MODES:
+        return edges.normalize(edge_response(img, mode, ksize), peak)
+
+    elif mode == "canny":
+        # 在高斯平滑后的图像上使用Canny算子进行边缘检测
+        return edges.engine(img).canny(low, high)
+
+    raise ValueError(f"Unknown edge mode: {mode}")
+
+
+def point_operation(img, mode, out=None, **params):
+    """
+    点运算：按查找表逐像素映射，彩色图像的每个通道使用同一张表
+
+    参数:
+        img (numpy.ndarray): 8 位或 16 位输入图像
+        mode (str): "brightness"、"contrast"、"gamma"、"threshold"、"invert" 或 "levels"
+        out (numpy.ndarray, optional): 与 img 形状、类型相同的输出数组（可以就是 img）
+        params: 点运算的参数，见 core.point.point_table
+    """
+    return apply_table(img, point_table(mode, img.dtype, **params), out=out)
+
+
+# Canny 的滞后阈值连接不是局部运算，分块处理时用较宽的重叠区域近似
+CANNY_TILE_RADIUS = 32
+
+
+def operation_radius(op, mode, params=None):
+    """
+    操作的邻域半径：输出像素最多依赖输入中这么远的像素，分块处理时据此确定重叠宽度
+    """
+    params = params or {}
+    if op == "blur":
+        if mode in FILTER_BANDS:
+            return filter_radius(mode, params.get("kind", "gaussian"), params.get("cutoff", 0.1),
+                                 params.get("cutoff_high", 0.4) if mode == "bandpass" else None,
+                                 params.get("order", 2))
+        if mode in RANK_BLUR_MODES:
+            return (params.get("ksize") or 3) // 2
+        return len(linear_blur_kernel(mode, params)[0]) // 2
+    if op == "edge":
+        if mode == "canny":
+            return CANNY_TILE_RADIUS
+        return max(1, (params.get("ksize") or 3) // 2)
+    # 颜色空间转换、噪声与点运算是逐像素运算；几何变换在分块处理中单独处理
+    return 0
+
+
+# 可调参数：名称、界面标签、取值范围、步长与默认值（默认值与处理函数的默认行为一致）
+Parameter = namedtuple("Parameter", ["name", "label", "minimum", "maximum", "step", "default"])
+
+KSIZE = Parameter("ksize", "核大小", 1, 31, 2, 3)
+# 秩滤波的耗时与核大小无关，允许更大的核
+RANK_KSIZE = Parameter("ksize", "核大小", 1, 201, 2, 3)
+CUTOFF = Parameter("cutoff", "截止频率", 0.01, 1.0, 0.01, 0.1)
+
+PARAMETERS = {
+    ("noise", "gaussian"): [Parameter("variance", "方差", 0, 5000, 10, 500)],
+    ("noise", "salt_pepper"): [Parameter("probability", "比例", 0, 0.2, 0.002, 0.01)],
+    ("noise", "poisson"): [Parameter("peak", "峰值光子数", 1, 1000, 1, 255)],
+    ("noise", "speckle"): [Parameter("variance", "相对方差", 0, 0.5, 0.01, 0.04)],
+    ("blur", "mean"): [KSIZE],
+    ("blur", "median"): [RANK_KSIZE],
+    ("blur", "percentile"): [RANK_KSIZE, Parameter("percentile", "百分位", 0, 100, 1, 25)],
+    ("blur", "min"): [RANK_KSIZE],
+    ("blur", "max"): [RANK_KSIZE],
+    ("blur", "gaussian"): [Parameter("sigma", "标准差", 0.1, 30, 0.1, 0.6)],
+    ("blur", "filter2d"): [KSIZE],
+    ("blur", "lowpass"): [CUTOFF],
+    ("blur", "highpass"): [CUTOFF],
+    ("blur", "bandpass"): [CUTOFF, Parameter("cutoff_high", "上限频率", 0.02, 1.0, 0.01, 0.4)],
+    ("edge", "canny"): [Parameter("low", "低阈值", 0, 255, 1, 50), Parameter("high", "高阈值", 0, 255, 1, 150)],
+    ("edge", "laplacian"): [Parameter("ksize", "孔径", 1, 7, 2, 1)],
+    ("edge", "sobel"): [Parameter("ksize", "孔径", 1, 7, 2, 3)],
+    ("point", "brightness"): [Parameter("offset", "亮度", -255, 255, 1, 40)],
+    ("point", "contrast"): [Parameter("gain", "增益", 0, 5, 0.05, 1.5)],
+    ("point", "gamma"): [Parameter("gamma", "伽马", 0.1, 5, 0.05, 2.2)],
+    ("point", "threshold"): [Parameter("thresh", "阈值", 0, 255, 1, 128)],
+    ("point", "levels"): [Parameter("low", "黑场", 0, 254, 1, 30), Parameter("high", "白场", 1, 255, 1, 225)],
+}
+
+
+def parameters(op, mode):
+    """
+    操作的可调参数列表，没有可调参数时返回空列表
+    """
+    return PARAMETERS.get((op, mode), [])
+
+
+# 操作名称 -> (处理函数, 界面文字到模式名的映射)
+OPERATIONS = {
+    "color_space": (change_color_space, COLOR_SPACE_MODES),
+    "geometric": (geometric_transform, GEOMETRIC_MODES),
+    "noise": (add_noise, NOISE_MODES),
+    "blur": (image_blur, BLUR_MODES),
+    "edge": (edge_detect, EDGE_MODES),
+    "point": (point_operation, POINT_MODES),
+}
+# 逐像素、可以把结果直接写回输入（out=img）的操作
+INPLACE_OPERATIONS = ("noise", "point")
+
+
+def resolve_mode(op, mode):
+    """
+    将界面文字或模式名统一为模式名，无法识别时抛出 ValueError
+    """
+    if op not in OPERATIONS:
+        raise ValueError(f"Unknown operation: {op}")
+    modes = OPERATIONS[op][1]
+    if mode in modes:
+        return modes[mode]
+    if mode in modes.values():
+        return mode
+    raise ValueError(f"Unknown mode for {op}: {mode}")
+
+
+def apply_operation(img, op, mode, params=None, out=None):
+    """
+    按操作名称和模式对图像执行一次处理
+
+    参数:
+        params (dict, optional): 传给处理函数的额外关键字参数，例如噪声的 seed
+        out (numpy.ndarray, optional): 结果写入的数组，只有 INPLACE_OPERATIONS 中的操作支持
+    """
+    func = OPERATIONS[op][0]
+    if out is None:
+        return func(img, resolve_mode(op, mode), **(params or {}))
+    if op not in INPLACE_OPERATIONS:
+        raise ValueError(f"Operation {op} cannot write into an output array")
+    return func(img, resolve_mode(op, mode), out=out, **(params or {}))
@@ -0,0 +1,105 @@
+"""
+处理流水线：由若干 (操作, 模式) 步骤组成，按顺序作用于图像。
+"""
+from collections import namedtuple
+
+import cv2
+import numpy as np
+
+from core.graph import execute
+from core.operations import resolve_mode
+
+# 流水线中的一个步骤，例如 Step("blur", "gaussian") 或 Step("noise", "gaussian", {"seed": 1})
+Step = namedtuple("Step", ["op", "mode", "params"], defaults=[None])
+
+
+def parse_value(text):
+    """
+    将参数文字转换为 int、float 或保留为字符串
+    """
+    for convert in (int, float):
+        try:
+            return convert(text)
+        except ValueError:
+            pass
+    return text
+
+
+def parse_pipeline(text):
+    """
+    解析流水线描述字符串
+
+    参数:
+        text (str): 形如 "geometric:hflip,blur:gaussian,edge:canny" 的字符串，
+                    模式也可以直接写界面上的文字，例如 "blur:高斯滤波"；
+                    模式后可以跟若干 "名称=值" 参数，例如 "noise:gaussian:seed=42"
+    返回:
+        list[Step]: 解析后的步骤列表
+    """
+    steps = []
+    for item in text.split(","):
+        item = item.strip()
+        if not item:
+            continue
+        parts = [part.strip() for part in item.split(":")]
+        if len(parts) < 2:
+            raise ValueError(f"Pipeline step must look like op:mode, got {item!r}")
+        op, mode = parts[0], parts[1]
+        params = {}
+        for part in parts[2:]:
+            name, sep, value = part.partition("=")
+            if not sep:
+                raise ValueError(f"Step parameter must look like name=value, got {part!r}")
+            params[name.strip()] = parse_value(value.strip())
+        steps.append(Step(op, resolve_mode(op, mode), params or None))
+    return steps
+
+
+def format_pipeline(steps):
+    """
+    将步骤列表转换回描述字符串，与 parse_pipeline 互逆
+    """
+    return ",".join(":".join([step.op, step.mode] + [f"{k}={v}" for k, v in (step.params or {}).items()])
+                    for step in steps)
+
+
+def seed_steps(steps, entropy=None):
+    """
+    为没有指定种子的噪声步骤分配种子，使其在重放（撤销、保存、批处理）时结果可复现
+
+    参数:
+        entropy (int 或 list[int], optional): 派生种子所用的熵，相同的熵得到相同的种子；
+                                               为 None 时使用系统随机熵
+    """
+    sequence = np.random.SeedSequence(entropy)
+    seeded = []
+    for step, child in zip(steps, sequence.spawn(len(steps))):
+        if step.op == "noise" and "seed" not in (step.params or {}):
+            step = step._replace(params={**(step.params or {}), "seed": int(child.generate_state(1)[0])})
+        seeded.append(step)
+    return seeded
+
+
+def apply_pipeline(img, steps, report=None, space=None):
+    """
+    依次执行流水线中的每个步骤，返回处理后的图像
+
+    连续的翻转/旋转、连续的线性滤波和连续的颜色空间转换会被合并执行，参见 core.graph.optimize。
+
+    参数:
+        report (callable, optional): 每个步骤开始前以完成比例调用，可在其中抛出异常以中断执行
+        space (str, optional): 输入图像所处的颜色空间，默认按通道数推断（灰度或 BGR）
+    """
+    return execute(img, steps, report, space)
+
+
+def make_proxy(img, max_side):
+    """
+    生成用于交互预览的缩小代理图；图像本身不超过 max_side 时直接返回原图
+    """
+    height, width = img.shape[:2]
+    scale = max_side / max(height, width)
+    if scale >= 1:
+        return img
+    size = (max(1, round(width * scale)), max(1, round(height * scale)))
+    return cv2.resize(img, size, interpolation=cv2.INTER_AREA)
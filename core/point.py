@@ -0,0 +1,92 @@
+"""
+点运算：亮度、对比度、伽马、二值化、反相与色阶拉伸。
+
+每种点运算都表示为一张查找表（8 位图像 256 项，16 位图像 65536 项），输出像素只取决于
+同一位置的输入值。每张表的值已取整到图像的位深，连续的点运算把表依次复合为一张
+（后一张表按前一张表的值索引），与逐步执行完全一致；复合后的表对整幅图像只查一遍，
+因此连续十次调整与一次调整的耗时相同。
+"""
+from functools import lru_cache
+
+import cv2
+import numpy as np
+
+
+def table_size(dtype):
+    """
+    图像类型对应的查找表长度，不支持的类型抛出 ValueError
+    """
+    if dtype == np.uint8:
+        return 256
+    if dtype == np.uint16:
+        return 65536
+    raise ValueError(f"Point operations support 8- and 16-bit images, got {dtype}")
+
+
+@lru_cache(maxsize=64)
+def point_table(mode, dtype, offset=40, gain=1.5, gamma=2.2, thresh=128, low=30, high=225):
+    """
+    点运算的查找表（只读），同一模式、位深与参数只计算一次。
+    灰度参数按 8 位灰度级给出，16 位图像按比例换算到 0-65535
+
+    参数:
+        mode (str): "brightness"、"contrast"、"gamma"、"threshold"、"invert" 或 "levels"
+        dtype (numpy.dtype): 图像类型，uint8 或 uint16
+        offset (float): 亮度增加的灰度级
+        gain (float): 对比度增益，以灰度范围的中点为中心
+        gamma (float): 伽马值，输出为 (x / 最大值) ** (1 / gamma)，大于 1 时提亮暗部
+        thresh (float): 二值化阈值，大于阈值的像素为最大值，其余为 0（与 cv2.THRESH_BINARY 一致）
+        low, high (float): 色阶拉伸的输入范围，拉伸到整个灰度范围
+    """
+    size = table_size(dtype)
+    top = size - 1
+    scale = top / 255
+    x = np.arange(size, dtype=np.float64)
+    if mode == "brightness":
+        values = x + offset * scale
+    elif mode == "contrast":
+        values = (x - top / 2) * gain + top / 2
+    elif mode == "gamma":
+        if gamma <= 0:
+            raise ValueError(f"Gamma must be positive, got {gamma}")
+        values = top * (x / top) ** (1 / gamma)
+    elif mode == "threshold":
+        values = np.where(x > thresh * scale, top, 0)
+    elif mode == "invert":
+        values = top - x
+    elif mode == "levels":
+        if high <= low:
+            raise ValueError(f"Levels need low < high, got {low} and {high}")
+        values = (x - low * scale) * (255 / (high - low))
+    else:
+        raise ValueError(f"Unknown point mode: {mode}")
+    table = np.clip(np.rint(values), 0, top).astype(dtype)
+    table.flags.writeable = False
+    return table
+
+
+def compose_tables(tables):
+    """
+    将依次执行的若干查找表复合为一张
+    """
+    table = tables[0]
+    for following in tables[1:]:
+        table = following[table]
+    return table
+
+
+def steps_table(steps, dtype):
+    """
+    连续若干点运算步骤复合后的查找表
+    """
+    return compose_tables([point_table(step.mode, np.dtype(dtype), **(step.params or {})) for step in steps])
+
+
+def apply_table(img, table, out=None):
+    """
+    对图像的每个通道查表，整幅图像只遍历一次；给出 out 时结果写入 out（可以就是 img）
+    """
+    if img.dtype == np.uint8:
+        return cv2.LUT(img, table, dst=out)
+    # take 在 out 与输入重叠时先写入内部缓冲，原地查表也是正确的
+    return table.take(img, out=out)
@@ -0,0 +1,156 @@
+"""
+耗时记录。
+
+在关键路径上用 span 记录每段代码的开始时间、耗时和附加信息（图像尺寸、输出字节数等），
+可以查询最近一次某类记录，也可以导出为 Chrome 跟踪格式（chrome://tracing 或 Perfetto 打开）
+进行离线分析。记录本身只是两次 perf_counter 和一次追加，开销可以忽略。
+"""
+import json
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+# 最多保留的记录条数，超出时丢弃最早的记录
+MAX_EVENTS = 100000
+
+
+class Profiler:
+    """
+    线程安全的耗时记录器
+    """
+    def __init__(self, max_events=MAX_EVENTS):
+        self.events = deque(maxlen=max_events)
+        self.lock = threading.Lock()
+        self.enabled = True
+        self.origin = time.perf_counter()
+
+    @contextmanager
+    def span(self, name, category="", **args):
+        """
+        记录 with 语句块的耗时；as 得到的字典可以在块内补充附加信息
+
+        例如:
+            with profiler.span("decode", "io", path=str(path)) as info:
+                img = cv2.imread(path)
+                info["bytes"] = img.nbytes
+        """
+        if not self.enabled:
+            yield args
+            return
+        start = time.perf_counter()
+        try:
+            yield args
+        finally:
+            end = time.perf_counter()
+            event = {
+                "name": name,
+                "cat": category,
+                "start": start - self.origin,
+                "duration": end - start,
+                "thread": threading.current_thread().name,
+                "tid": threading.get_ident(),
+                "args": args,
+            }
+            with self.lock:
+                self.events.append(event)
+
+    def last(self, name=None, category=None):
+        """
+        最近一条名称或类别匹配的记录，没有时返回 None
+        """
+        with self.lock:
+            for event in reversed(self.events):
+                if (name is None or event["name"] == name) and (category is None or event["cat"] == category):
+                    return event
+        return None
+
+    def since(self, start):
+        """
+        开始时间不早于 start（相对 origin 的秒数）的所有记录
+        """
+        with self.lock:
+            return [event for event in self.events if event["start"] >= start]
+
+    def now(self):
+        return time.perf_counter() - self.origin
+
+    def clear(self):
+        with self.lock:
+            self.events.clear()
+
+    def summary(self):
+        """
+        按名称汇总：名称 -> (次数, 总耗时, 最长耗时)
+        """
+        totals = {}
+        with self.lock:
+            for event in self.events:
+                count, total, longest = totals.get(event["name"], (0, 0.0, 0.0))
+                totals[event["name"]] = (count + 1, total + event["duration"], max(longest, event["duration"]))
+        return totals
+
+    def chrome_trace(self):
+        """
+        转换为 Chrome 跟踪格式的字典（时间单位为微秒）
+        """
+        pid = os.getpid()
+        with self.lock:
+            events = list(self.events)
+        trace = []
+        threads = {}
+        for event in events:
+            threads[event["tid"]] = event["thread"]
+            trace.append({
+                "name": event["name"],
+                "cat": event["cat"],
+                "ph": "X",
+                "ts": event["start"] * 1e6,
+                "dur": event["duration"] * 1e6,
+                "pid": pid,
+                "tid": event["tid"],
+                "args": {key: json_value(value) for key, value in event["args"].items()},
+            })
+        # 线程名称元数据，使时间线上显示可读的线程名
+        for tid, thread in threads.items():
+            trace.append({"name": "thread_name", "ph": "M", "pid": pid, "tid": tid, "args": {"name": thread}})
+        return {"traceEvents": trace, "displayTimeUnit": "ms"}
+
+    def export(self, path):
+        """
+        将记录写为 Chrome 跟踪 JSON 文件
+        """
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(self.chrome_trace(), f, ensure_ascii=False)
+
+
+def json_value(value):
+    """
+    附加信息转换为 JSON 可表示的值
+    """
+    if isinstance(value, (str, int, float, bool)) or value is None:
+        return value
+    if isinstance(value, (tuple, list)):
+        return [json_value(v) for v in value]
+    return str(value)
+
+
+def image_info(img):
+    """
+    图像的尺寸、类型和字节数，作为记录的附加信息
+    """
+    if img is None:
+        return {}
+    return {"shape": tuple(img.shape), "dtype": str(img.dtype), "bytes": int(img.nbytes)}
+
+
+def format_bytes(count):
+    if count >= 2 ** 20:
+        return f"{count / 2 ** 20:.1f} MB"
+    return f"{count / 2 ** 10:.1f} KB"
+
+
+# 进程内共享的记录器
+profiler = Profiler()
+span = profiler.span
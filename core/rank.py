@@ -0,0 +1,258 @@
+"""
+任意半径的秩滤波：中值、百分位、最小值与最大值。
+
+8 位图像：窗口内第 r 小的值等于使"窗口内不大于 v 的像素数 C_v 达到 r"的最小灰度级 v，
+而 C_v 正是二值图 (img <= v) 的盒式滤波（计数）结果。C_v 随 v 单调，
+结果 = 最小灰度级 + 各灰度级上 [C_v < r] 乘以到下一个灰度级的间隔之和；只需要图像中实际出现的灰度级，
+最大的一个不需要计算。盒式滤波的耗时与窗口大小无关，每像素的耗时与半径无关，
+但与图像中不同灰度级的个数成正比（最多 255 遍整幅盒式滤波）。
+
+16 位图像使用滑动直方图：窗口逐行向下滑动，每行加入新进入窗口的一行像素、移除离开的一行。
+直方图存为二维 Fenwick 树（树状数组）：
+
+  * 值维度共 16 层，前 8 层即高字节的粗直方图，后 8 层是每个桶内低字节的细直方图；
+    从根向下逐位选取，先在粗直方图中确定结果所在的桶，再在该桶的细直方图中确定结果（Perreault–Hébert 的两级直方图）
+  * 列维度：任意连续 ksize 列的计数由两个前缀和相减得到，窗口在行内移动时不需要逐列累加
+
+每像素的更新与查询都是 16 x log2(列数) 量级的数组操作，与半径和图像内容（不同值的个数）都无关；
+按列分条处理时每条左右各多出一个半径的列，半径很大时更新量略有增加。
+最小值与最大值滤波即腐蚀与膨胀。
+
+8 位图像的中值滤波直接使用 cv2.medianBlur，它本身就是每像素常数时间的直方图算法。
+边界按复制边缘像素处理（与 cv2.medianBlur 一致），每个窗口始终有 ksize² 个像素，
+分块处理时各块的结果与整幅处理相同。每个灰度级的二值图、计数和比较结果写入从临时缓冲区池
+借来的同一组缓冲区，逐级计算时不再重新分配。
+"""
+import os
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+
+import cv2
+import numpy as np
+
+from core.memory import scratch
+
+# 各灰度级的计算相互独立，分给多个线程（OpenCV 在计算时释放 GIL）
+RANK_THREADS = min(4, os.cpu_count() or 1)
+# 16 位滑动直方图每条处理的列数；每条的直方图约占 (列数 + 2 x 半径) x 128KB
+HISTOGRAM_STRIP = 512
+
+
+def check_depth(img):
+    if img.dtype not in (np.uint8, np.uint16):
+        raise ValueError(f"Rank filters support 8- and 16-bit images, got {img.dtype}")
+
+
+def count_type(ksize):
+    """
+    窗口计数的类型：窗口内像素数不超过 65535 时用 16 位计数，更快
+    """
+    return np.uint16 if ksize * ksize <= 65535 else np.int32
+
+
+def window_count(mask, ksize, dst=None):
+    """
+    每个窗口中 mask 为 1 的像素个数
+    """
+    depth = cv2.CV_16U if count_type(ksize) == np.uint16 else cv2.CV_32S
+    return cv2.boxFilter(mask, depth, (ksize, ksize), dst=dst, normalize=False, borderType=cv2.BORDER_REPLICATE)
+
+
+def count_levels(img, pairs, rank, ksize):
+    """
+    对 (灰度级, 下一个灰度级) 依次累加 [C_v < rank] 乘以两者的间隔
+    """
+    acc = np.zeros(img.shape, dtype=np.uint8)
+    with scratch.borrow(img.shape, np.bool_) as mask, \
+            scratch.borrow(img.shape, count_type(ksize)) as counts, \
+            scratch.borrow(img.shape, np.uint8) as below:
+        for level, following in pairs:
+            np.less_equal(img, level, out=mask)
+            window_count(mask.view(np.uint8), ksize, dst=counts)
+            cv2.compare(counts, rank, cv2.CMP_LT, dst=below)
+            # C_v 随 v 单调不减：所有窗口都已达到 rank 时，更高的灰度级不再有贡献
+            if not cv2.countNonZero(below):
+                break
+            cv2.add(acc, int(following) - int(level), dst=acc, mask=below)
+    return acc
+
+
+def rank_levels(img, levels, rank, ksize):
+    """
+    单通道图像在 levels（升序、互不相同）上的 Σ [C_v < rank] x 到下一个灰度级的间隔（8 位）；
+    levels 的最大值不需要计算（该处 C_v 一定不小于 rank）
+    """
+    pairs = list(zip(levels[:-1], levels[1:]))
+    jobs = min(RANK_THREADS, len(pairs))
+    if jobs <= 1:
+        return count_levels(img, pairs, rank, ksize)
+    chunks = [pairs[i::jobs] for i in range(jobs)]
+    with ThreadPoolExecutor(max_workers=jobs, thread_name_prefix="rank") as pool:
+        parts = list(pool.map(lambda chunk: count_levels(img, chunk, rank, ksize), chunks))
+    acc = parts[0]
+    for part in parts[1:]:
+        # 间隔之和不超过 255，不会溢出
+        cv2.add(acc, part, dst=acc)
+    return acc
+
+
+def rank_channel8(img, rank, ksize):
+    """
+    8 位单通道图像的秩滤波
+    """
+    levels = np.flatnonzero(np.bincount(img.ravel(), minlength=256))
+    # 低于图像最小值的灰度级处处有贡献
+    return cv2.add(rank_levels(img, levels, rank, ksize), int(levels[0]))
+
+
+@lru_cache(maxsize=None)
+def update_nodes(size):
+    """
+    Fenwick 树（位置 1..size）中更新位置 i 时要修改的节点，第 i-1 行；
+    不足的部分用 size + 1 补齐（该节点只写不读）
+    """
+    current = np.arange(1, size + 1)
+    nodes = []
+    while (current <= size).any():
+        nodes.append(np.where(current <= size, current, size + 1))
+        current = current + (current & -current)
+    return np.stack(nodes, axis=1)
+
+
+def prefix_nodes(size):
+    """
+    Fenwick 树中前缀 [1, i] 之和要累加的节点，第 i 行（i = 0..size）；不足的部分用 0 补齐（该节点恒为 0）
+    """
+    current = np.arange(size + 1)
+    nodes = []
+    while (current > 0).any():
+        nodes.append(current.copy())
+        current = current - (current & -current)
+    return np.stack(nodes, axis=1)
+
+
+def build_tree(tree, columns, values):
+    """
+    把 tree[1..columns, 1..values] 中的计数原地变换为二维 Fenwick 树；values 为 2 的幂
+    """
+    step = 1
+    while step <= columns:
+        child = np.arange(step, columns + 1, 2 * step)
+        parent = child + step
+        keep = parent <= columns
+        tree[parent[keep]] += tree[child[keep]]
+        step *= 2
+    body = tree[:, 1:values + 1]
+    step = 1
+    while step < values:
+        blocks = body.reshape(tree.shape[0], -1, 2 * step)
+        blocks[:, :, 2 * step - 1] += blocks[:, :, step - 1]
+        step *= 2
+
+
+def rank_strip(padded, out, rank, ksize):
+    """
+    对 padded（已按复制边界上下左右各扩展一个半径）逐行滑动窗口，结果写入 out。
+    计数为 16 位，按 2^16 取模累加：窗口计数不超过 ksize² <= 65535，两个前缀和相减的结果仍然正确
+    """
+    values = 65536
+    height, width = out.shape
+    columns = padded.shape[1]
+    stride = values + 2
+    with scratch.borrow((columns + 2, stride), np.uint16) as tree:
+        tree.fill(0)
+        # 第一个窗口的前 ksize - 1 行先计数，再一次性变换为 Fenwick 树
+        first = padded[:ksize - 1].astype(np.intp) + 1
+        np.add.at(tree, (np.broadcast_to(np.arange(1, columns + 1), first.shape), first), 1)
+        build_tree(tree, columns, values)
+        flat = tree.ravel()
+        value_nodes = update_nodes(values)
+        column_nodes = (update_nodes(columns) * stride)[:, :, None]
+        prefix = prefix_nodes(columns) * stride
+        right, left = prefix[ksize:ksize + width], prefix[:width]
+        count = columns * column_nodes.shape[1] * value_nodes.shape[1]
+        # 加入与移除合并为一次 add.at，移除即加 65535（按 2^16 取模）
+        weights = np.concatenate([np.ones(count, np.uint16), np.full(count, 65535, np.uint16)])
+        steps = [1 << bit for bit in range(15, -1, -1)]
+        for y in range(height):
+            entering = (column_nodes + value_nodes[padded[y + ksize - 1]][:, None, :]).ravel()
+            if y:
+                leaving = (column_nodes + value_nodes[padded[y - 1]][:, None, :]).ravel()
+                np.add.at(flat, np.concatenate([entering, leaving]), weights)
+            else:
+                np.add.at(flat, entering, weights[:count])
+            # 从根向下逐位确定结果：前 8 位在高字节的粗直方图中选桶，后 8 位在桶内的细直方图中选值
+            found = np.zeros(width, np.intp)
+            remaining = np.full(width, rank, np.intp)
+            for step in steps:
+                node = (found + step)[:, None]
+                below = (flat[right + node].sum(axis=1, dtype=np.uint16)
+                         - flat[left + node].sum(axis=1, dtype=np.uint16)).astype(np.intp)
+                less = below < remaining
+                found += step * less
+                remaining -= below * less
+            out[y] = found
+
+
+def rank_channel16(img, rank, ksize):
+    """
+    16 位单通道图像的秩滤波：按列分条，每条内逐行滑动直方图
+    """
+    if ksize * ksize > 65535:
+        raise ValueError(f"16-bit rank filter size must not exceed 255, got {ksize}")
+    radius = ksize // 2
+    padded = cv2.copyMakeBorder(img, radius, radius, radius, radius, cv2.BORDER_REPLICATE)
+    out = np.empty_like(img)
+    width = img.shape[1]
+    for x in range(0, width, HISTOGRAM_STRIP):
+        end = min(width, x + HISTOGRAM_STRIP)
+        rank_strip(padded[:, x:end + 2 * radius], out[:, x:end], rank, ksize)
+    return out
+
+
+def rank_filter(img, ksize, percentile=50):
+    """
+    百分位滤波：每个像素取 ksize x ksize 窗口内第 percentile 百分位的值
+
+    参数:
+        img (numpy.ndarray): 8 位或 16 位图像，彩色图像的每个通道分别计算
+        ksize (int): 窗口边长（奇数）
+        percentile (float): 0 为最小值，50 为中值，100 为最大值
+    """
+    check_depth(img)
+    if ksize < 1 or ksize % 2 == 0:
+        raise ValueError(f"Rank filter size must be a positive odd number, got {ksize}")
+    if not 0 <= percentile <= 100:
+        raise ValueError(f"Percentile must be within [0, 100], got {percentile}")
+    if percentile == 0:
+        return min_filter(img, ksize)
+    if percentile == 100:
+        return max_filter(img, ksize)
+    # 窗口内从小到大第 rank 个值（从 1 开始）
+    rank = round(percentile / 100 * (ksize * ksize - 1)) + 1
+    channel = rank_channel8 if img.dtype == np.uint8 else rank_channel16
+    if img.ndim == 2:
+        return channel(img, rank, ksize)
+    return cv2.merge([channel(np.ascontiguousarray(plane), rank, ksize) for plane in cv2.split(img)])
+
+
+def median_filter(img, ksize):
+    """
+    中值滤波；8 位图像和 16 位的 3、5 窗口由 cv2.medianBlur 完成
+    """
+    check_depth(img)
+    if img.dtype == np.uint8 or ksize <= 5:
+        return cv2.medianBlur(img, ksize)
+    return rank_filter(img, ksize, 50)
+
+
+def min_filter(img, ksize):
+    check_depth(img)
+    kernel = cv2.getStructuringElement(cv2.MORPH_RECT, (ksize, ksize))
+    return cv2.erode(img, kernel, borderType=cv2.BORDER_REPLICATE)
+
+
+def max_filter(img, ksize):
+    check_depth(img)
+    kernel = cv2.getStructuringElement(cv2.MORPH_RECT, (ksize, ksize))
+    return cv2.dilate(img, kernel, borderType=cv2.BORDER_REPLICATE)
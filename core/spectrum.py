@@ -0,0 +1,182 @@
+"""
+图像频谱计算。
+
+图像补零到 cv2.getOptimalDFTSize 给出的尺寸（只含 2、3、5 因子），再用实数到复数的
+np.fft.rfft2 对每个通道同时变换：实数图像的频谱共轭对称，只需计算和保存一半的列。
+幅度、相位、对数幅度在第一次用到时计算并缓存，滤波等其他功能可以直接复用。
+
+频域滤波需要先按边界类型向四周外推再变换，外推宽度和边界类型也是缓存键的一部分；
+滤波使用每个通道 cv2.dft 的 CCS 压缩频谱（比复数输出快数倍），同样在第一次用到时计算并缓存。
+同一幅图像以相同的外推宽度重复滤波（例如拖动截止频率实时预览）时只变换一次。
+"""
+import threading
+from collections import OrderedDict
+
+import cv2
+import numpy as np
+
+from core.memory import budget, freeze, object_bytes
+
+# 频谱缓存中最多保留的图像个数
+CACHE_SIZE = 4
+
+
+def optimal_shape(shape):
+    """
+    不小于 (高, 宽) 的最快 DFT 尺寸
+    """
+    return cv2.getOptimalDFTSize(shape[0]), cv2.getOptimalDFTSize(shape[1])
+
+
+class Spectrum:
+    """
+    一幅图像的频谱
+
+    属性:
+        shape (tuple): 原图的 (高, 宽)
+        margin (tuple): 变换前向四周外推的 (行数, 列数)
+        padded (tuple): 外推并补齐后参与变换的 (高, 宽)
+        data (numpy.ndarray): 形状为 (补零高, 补零宽 // 2 + 1, 通道数) 的 complex64 半平面频谱
+    """
+    def __init__(self, img, margin=(0, 0), border=cv2.BORDER_CONSTANT):
+        self.shape = img.shape[:2]
+        self.margin = tuple(margin)
+        self.border = border
+        self.padded = optimal_shape((self.shape[0] + 2 * self.margin[0], self.shape[1] + 2 * self.margin[1]))
+        self.source = img.reshape(img.shape[0], img.shape[1], -1)
+        self._cache = {}
+
+    def channels(self):
+        return self.source.shape[2]
+
+    def _cached(self, name, compute):
+        value = self._cache.get(name)
+        if value is None:
+            value = self._cache[name] = compute()
+        return value
+
+    def extended(self, c):
+        """
+        第 c 个通道按边界类型外推 margin、再补齐到 padded 尺寸的 float32 图像
+        """
+        (height, width), (my, mx) = self.shape, self.margin
+        channel = np.ascontiguousarray(self.source[:, :, c]).astype(np.float32, copy=False)
+        return cv2.copyMakeBorder(channel, my, self.padded[0] - height - my,
+                                  mx, self.padded[1] - width - mx, self.border)
+
+    def crop(self, values):
+        """
+        从参与变换的尺寸中裁出原图对应的部分
+        """
+        (height, width), (my, mx) = self.shape, self.margin
+        return values[my:my + height, mx:mx + width]
+
+    def _transform(self):
+        if self.margin == (0, 0) and self.border == cv2.BORDER_CONSTANT:
+            # 补零由 s 参数完成，不需要先复制出补零后的图像
+            return np.fft.rfft2(self.source.astype(np.float32), s=self.padded, axes=(0, 1))
+        planes = np.dstack([self.extended(c) for c in range(self.channels())])
+        return np.fft.rfft2(planes, axes=(0, 1))
+
+    @property
+    def data(self):
+        return self._cached("data", self._transform)
+
+    def planes(self):
+        """
+        每个通道的 CCS 压缩格式实数频谱（cv2.dft 的结果），可直接与传递函数做 cv2.mulSpectrums
+        """
+        return self._cached("planes", lambda: [cv2.dft(self.extended(c)) for c in range(self.channels())])
+
+    def magnitude(self):
+        return self._cached("magnitude", lambda: np.abs(self.data))
+
+    def phase(self):
+        return self._cached("phase", lambda: np.angle(self.data))
+
+    def log_magnitude(self):
+        """
+        log(1 + 幅度)，用于显示动态范围很大的幅度谱
+        """
+        return self._cached("log_magnitude", lambda: np.log1p(self.magnitude()))
+
+    def centered(self, values):
+        """
+        将半平面上的实数谱（幅度或对数幅度）按共轭对称补全为整个平面，并把零频移到中心
+
+        参数:
+            values (numpy.ndarray): 与 data 同形状的实数数组
+        返回:
+            numpy.ndarray: 形状为 (补零高, 补零宽, 通道数) 的数组
+        """
+        height, width = self.padded
+        half = values.shape[1]
+        full = np.empty((height, width, values.shape[2]), dtype=values.dtype)
+        full[:, :half] = values
+        # 实数图像的频谱满足 |F(-u, -v)| = |F(u, v)|，缺少的列由对称位置取得
+        rows = (-np.arange(height)) % height
+        cols = width - np.arange(half, width)
+        full[:, half:] = values[rows][:, cols]
+        return np.fft.fftshift(full, axes=(0, 1))
+
+    def inverse(self, data=None):
+        """
+        由半平面频谱（默认为本图像的频谱）反变换回空间域，并裁掉补零部分
+
+        返回:
+            numpy.ndarray: 与原图同尺寸的 float32 图像，通道数与原图一致
+        """
+        if data is None:
+            data = self.data
+        out = np.fft.irfft2(data, s=self.padded, axes=(0, 1))
+        out = self.crop(out).astype(np.float32)
+        return out[:, :, 0] if out.shape[2] == 1 else out
+
+
+_cache = OrderedDict()
+_cache_lock = threading.Lock()
+
+
+def spectrum(img, margin=(0, 0), border=cv2.BORDER_CONSTANT):
+    """
+    返回图像的频谱，同一幅图像以相同的外推宽度和边界类型重复调用时直接返回缓存
+
+    每次处理都会产生新的图像数组，因此以数组对象本身作为图像版本：缓存中同时持有图像的引用，
+    保证在缓存期间其 id 不会被其他数组复用。
+
+    参数:
+        margin (tuple): 变换前向四周外推的 (行数, 列数)，默认不外推、只在右下补零
+        border (int): 外推与补齐使用的 OpenCV 边界类型
+    """
+    key = (id(img), tuple(margin), border)
+    with _cache_lock:
+        entry = _cache.get(key)
+        if entry is not None and entry[0] is img:
+            _cache.move_to_end(key)
+            return entry[1]
+
+    result = Spectrum(img, margin, border)
+    with _cache_lock:
+        # 缓存持有图像，标记为共享（只读），之后不会被原地修改
+        _cache[key] = (freeze(img), result)
+        _cache.move_to_end(key)
+        while len(_cache) > CACHE_SIZE:
+            _cache.popitem(last=False)
+    return result
+
+
+def clear_cache():
+    with _cache_lock:
+        _cache.clear()
+
+
+def cache_bytes():
+    """
+    缓存的频谱占用的字节数（不含图像本身）
+    """
+    with _cache_lock:
+        entries = list(_cache.values())
+    return sum(object_bytes(result, exclude=(img,)) for img, result in entries)
+
+
+budget.register("频谱缓存", cache_bytes, lambda excess: clear_cache())
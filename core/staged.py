@@ -0,0 +1,224 @@
+"""
+分阶段的多进程批处理：解码 -> 处理 -> 编码。
+
+主进程中的解码线程把图像写入共享内存块，工作进程直接在共享内存上读取输入、
+把结果写回同一块内存，主进程中的编码线程再从共享内存编码写出。
+进程之间只传递块的编号、形状等几十字节的消息，不序列化、不拷贝图像数据。
+
+共享内存块的数量固定（每个工作进程 SLOTS_PER_WORKER 块），所有块都在使用中时解码线程等待，
+相当于一个有界队列：同时在内存中的图像数有上限，解码再快也不会堆积。
+块的大小按需增长，只在该块空闲时由主进程重新分配。
+"""
+import multiprocessing
+import os
+import queue
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from multiprocessing import resource_tracker, shared_memory
+from pathlib import Path
+
+import cv2
+import numpy as np
+
+from core.io import check_suffix, read_image, write_image
+from core.pipeline import apply_pipeline
+
+# 每个工作进程对应的共享内存块数：一块在处理时，另一块可以同时在解码或编码
+SLOTS_PER_WORKER = 2
+# 主进程中的解码、编码线程数（OpenCV 编解码时释放 GIL）
+DECODE_THREADS = 2
+ENCODE_THREADS = 2
+# 等待工作进程结果时检查进程是否意外退出的间隔（秒）
+POLL_INTERVAL = 1.0
+
+
+class SharedSlots:
+    """
+    主进程持有的一组共享内存块，负责分配、按需扩容和最终释放
+    """
+    def __init__(self, count):
+        self.blocks = [None] * count
+        self.free = queue.Queue()
+        for index in range(count):
+            self.free.put(index)
+        self.lock = threading.Lock()
+
+    def acquire(self, nbytes, timeout=None):
+        """
+        取得一个空闲块（都在使用中时等待），容量不足时重新分配；返回 (块编号, 块名称)，等待超时返回 None
+        """
+        try:
+            index = self.free.get(timeout=timeout)
+        except queue.Empty:
+            return None
+        with self.lock:
+            block = self.blocks[index]
+            if block is None or block.size < nbytes:
+                if block is not None:
+                    block.close()
+                    block.unlink()
+                block = self.blocks[index] = shared_memory.SharedMemory(create=True, size=max(nbytes, 1))
+        return index, block.name
+
+    def view(self, index, shape, dtype):
+        return np.ndarray(shape, dtype, buffer=self.blocks[index].buf)
+
+    def release(self, index):
+        self.free.put(index)
+
+    def close(self):
+        with self.lock:
+            for block in self.blocks:
+                if block is not None:
+                    block.close()
+                    block.unlink()
+            self.blocks = [None] * len(self.blocks)
+
+
+def worker_main(tasks, results):
+    """
+    工作进程：从 tasks 取出 (序号, 块编号, 块名称, 形状, 类型, 步骤)，
+    在共享内存上处理，结果写回同一块；放不下时（结果比输入大）随消息一起发送。
+    收到 None 时退出。
+    """
+    cv2.setNumThreads(1)
+    attached = {}
+    try:
+        for i, index, name, shape, dtype, steps in iter(tasks.get, None):
+            block = attached.get(index)
+            if block is None or block.name != name:
+                # 主进程为该块重新分配了更大的内存
+                if block is not None:
+                    block.close()
+                block = attached[index] = shared_memory.SharedMemory(name=name)
+            start = time.perf_counter()
+            results.put((i, index) + process_frame(block, shape, dtype, steps) + (time.perf_counter() - start,))
+    finally:
+        for block in attached.values():
+            block.close()
+
+
+def process_frame(block, shape, dtype, steps):
+    """
+    处理共享内存中的一帧，返回 (结果形状, 结果类型, 未写入共享内存的结果或 None, 错误信息或 None)
+    """
+    img = np.ndarray(shape, dtype, buffer=block.buf)
+    try:
+        result = apply_pipeline(img, steps)
+    except (cv2.error, ValueError) as e:
+        return None, None, None, str(e).strip()
+    finally:
+        del img
+    if result.nbytes > block.size:
+        return result.shape, result.dtype.str, result, None
+    out = np.ndarray(result.shape, result.dtype, buffer=block.buf)
+    np.copyto(out, result)
+    return result.shape, result.dtype.str, None, None
+
+
+def run_staged(files, targets, steps_list, params_list, jobs=None):
+    """
+    按 解码 -> 工作进程处理 -> 编码 的流水线处理文件，按完成顺序逐个产生
+    (源文件, 处理耗时秒数, 像素数, 错误信息或 None)，与 batch.process_file 的返回值相同
+
+    参数:
+        steps_list (list[list[Step]]): 每个文件的处理步骤（已分配噪声种子）
+        params_list (list[list]): 每个文件的编码参数，见 core.io.encode_params
+
+    输出格式不受支持时在启动工作进程之前抛出 ValueError。
+    """
+    for target in targets:
+        check_suffix(Path(target).suffix)
+    jobs = jobs or os.cpu_count() or 1
+    if os.name == "posix":
+        # 工作进程共用主进程的资源跟踪进程；否则工作进程各自启动的跟踪进程退出时会删除仍在使用的共享内存
+        resource_tracker.ensure_running()
+    slots = SharedSlots(jobs * SLOTS_PER_WORKER)
+    tasks = multiprocessing.Queue()
+    results = multiprocessing.Queue()
+    workers = [multiprocessing.Process(target=worker_main, args=(tasks, results), daemon=True) for _ in range(jobs)]
+    for worker in workers:
+        worker.start()
+    done = queue.Queue()
+    stop = threading.Event()
+
+    # 解码和编码线程中的任何异常都必须作为该文件的失败结果报告，否则主线程会一直等待它的结果
+
+    def decode(i):
+        acquired = None
+        try:
+            img = read_image(files[i])
+            if img is None:
+                results.put((i, None, None, None, None, "failed to read", 0.0))
+                return
+            # 所有块都在使用中时等待，取消或出错后不再等待
+            while acquired is None:
+                if stop.is_set():
+                    return
+                acquired = slots.acquire(img.nbytes, POLL_INTERVAL)
+            index, name = acquired
+            np.copyto(slots.view(index, img.shape, img.dtype), img)
+            tasks.put((i, index, name, img.shape, img.dtype.str, steps_list[i]))
+            # 块已交给工作进程，由编码线程释放
+            acquired = None
+        except Exception as e:
+            results.put((i, None, None, None, None, str(e).strip() or type(e).__name__, 0.0))
+        finally:
+            if acquired is not None:
+                slots.release(acquired[0])
+
+    def encode(i, index, shape, dtype, result, error, seconds):
+        try:
+            if error is None:
+                if result is None:
+                    result = slots.view(index, shape, dtype)
+                if not write_image(targets[i], result, params_list[i]):
+                    error = "failed to write"
+        except Exception as e:
+            error = str(e).strip() or type(e).__name__
+        finally:
+            del result
+            if index is not None:
+                slots.release(index)
+        done.put((files[i], seconds, 0 if error else shape[0] * shape[1], error))
+
+    def collect():
+        """
+        把工作进程的结果交给编码线程；工作进程意外退出时报告剩余的文件失败
+        """
+        pending = set(range(len(files)))
+        while pending and not stop.is_set():
+            try:
+                message = results.get(timeout=POLL_INTERVAL)
+            except queue.Empty:
+                if all(worker.is_alive() for worker in workers):
+                    continue
+                for i in pending:
+                    done.put((files[i], 0.0, 0, "worker process exited"))
+                return
+            pending.discard(message[0])
+            encoders.submit(encode, *message)
+
+    decoders = ThreadPoolExecutor(DECODE_THREADS, thread_name_prefix="decode")
+    encoders = ThreadPoolExecutor(ENCODE_THREADS, thread_name_prefix="encode")
+    collector = threading.Thread(target=collect, name="collect", daemon=True)
+    try:
+        for i in range(len(files)):
+            decoders.submit(decode, i)
+        collector.start()
+        for _ in range(len(files)):
+            yield done.get()
+    finally:
+        stop.set()
+        decoders.shutdown(wait=True, cancel_futures=True)
+        if collector.is_alive():
+            collector.join()
+        for _ in workers:
+            tasks.put(None)
+        for worker in workers:
+            worker.join(timeout=5)
+            if worker.is_alive():
+                worker.terminate()
+        encoders.shutdown(wait=True)
+        slots.close()
@@ -0,0 +1,246 @@
+"""
+视频流处理：摄像头或视频文件逐帧经过与静态图像相同的处理流水线。
+
+采集、处理、写出分别在独立的线程中执行，三者同时工作：
+采集线程把帧放入只保存最新一帧的信箱（LatestFrame），处理跟不上时丢弃旧帧而不是排队，
+因此延迟不会随时间累积；写出线程通过有界队列接收处理后的帧，编码不占用处理的时间。
+"""
+import sys
+import threading
+import time
+from collections import deque
+from pathlib import Path
+from queue import Queue
+
+import cv2
+
+from core.pipeline import apply_pipeline
+from core.profiling import image_info, span
+
+# 摄像头在 Linux 下直接使用 V4L2，避免 OpenCV 依次尝试其他后端
+CAMERA_BACKEND = cv2.CAP_V4L2 if sys.platform.startswith("linux") else cv2.CAP_ANY
+# 视频源没有提供帧率时使用的帧率
+DEFAULT_FPS = 30.0
+# 写出队列的长度：写出暂时落后时最多缓存的帧数
+WRITER_QUEUE = 8
+# 统计帧率和延迟的时间窗口（秒）
+STATS_WINDOW = 1.0
+# 输出视频的编码：扩展名 -> FourCC
+VIDEO_CODECS = {".mp4": "mp4v", ".avi": "MJPG", ".mkv": "mp4v"}
+
+
+def open_capture(source):
+    """
+    打开视频源：整数为摄像头编号，否则为视频文件路径；无法打开时抛出 ValueError
+    """
+    if isinstance(source, int):
+        capture = cv2.VideoCapture(source, CAMERA_BACKEND)
+    else:
+        capture = cv2.VideoCapture(str(source))
+    if not capture.isOpened():
+        capture.release()
+        raise ValueError(f"Cannot open video source {source!r}")
+    return capture
+
+
+def capture_fps(capture):
+    fps = capture.get(cv2.CAP_PROP_FPS)
+    return fps if fps and fps > 0 else DEFAULT_FPS
+
+
+def fit_frame(frame, size, color):
+    """
+    将帧转换为视频文件要求的固定尺寸和通道数（处理步骤在录制过程中改变时，例如旋转或转为灰度）
+    """
+    if (frame.shape[1], frame.shape[0]) != size:
+        frame = cv2.resize(frame, size, interpolation=cv2.INTER_AREA)
+    if color and frame.ndim == 2:
+        frame = cv2.cvtColor(frame, cv2.COLOR_GRAY2BGR)
+    elif not color and frame.ndim == 3:
+        frame = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+    return frame
+
+
+class LatestFrame:
+    """
+    只保存一帧的信箱。drop 为 True 时新帧覆盖尚未取走的旧帧（计入 dropped），
+    否则放入时等待旧帧被取走（处理视频文件时不丢帧）。
+    """
+    def __init__(self, drop=True):
+        self.drop = drop
+        self.item = None
+        self.closed = False
+        self.dropped = 0
+        self.condition = threading.Condition()
+
+    def put(self, item):
+        with self.condition:
+            if not self.drop:
+                self.condition.wait_for(lambda: self.item is None or self.closed)
+            if self.item is not None:
+                self.dropped += 1
+            self.item = item
+            self.condition.notify_all()
+
+    def get(self):
+        """
+        取走最新的一帧；信箱关闭且为空时返回 None
+        """
+        with self.condition:
+            self.condition.wait_for(lambda: self.item is not None or self.closed)
+            item, self.item = self.item, None
+            self.condition.notify_all()
+            return item
+
+    def close(self):
+        with self.condition:
+            self.closed = True
+            self.condition.notify_all()
+
+
+class StreamStats:
+    """
+    最近 STATS_WINDOW 秒内显示的帧率，以及从采集到显示的平均延迟
+    """
+    def __init__(self, window=STATS_WINDOW):
+        self.window = window
+        self.frames = deque()
+
+    def add(self, captured, shown=None):
+        shown = time.perf_counter() if shown is None else shown
+        self.frames.append((shown, shown - captured))
+        while self.frames and self.frames[0][0] < shown - self.window:
+            self.frames.popleft()
+
+    def fps(self):
+        if len(self.frames) < 2:
+            return 0.0
+        return (len(self.frames) - 1) / (self.frames[-1][0] - self.frames[0][0])
+
+    def latency(self):
+        if not self.frames:
+            return 0.0
+        return sum(latency for _, latency in self.frames) / len(self.frames)
+
+
+class VideoStream:
+    """
+    采集 -> 处理 -> 写出 的视频流水线
+
+    on_frame(frame, result, captured) 在处理线程中对每个处理完成的帧调用，captured 为采集时刻
+    （perf_counter）；on_error(message) 在处理出错时调用（该帧被跳过）；
+    on_end() 在视频文件读完或摄像头断开、所有帧处理完成后调用。回调都不在调用方线程中执行。
+    """
+    def __init__(self, source, steps=None, output=None, on_frame=None, on_error=None, on_end=None):
+        """
+        参数:
+            source (int 或 str): 摄像头编号或视频文件路径
+            steps (list[Step], optional): 每帧执行的处理步骤，可以随时用 set_steps 更换
+            output (str, optional): 处理后的视频写出路径；视频文件在写出时不丢帧、不按原速播放
+        """
+        self.source = source
+        self.capture = open_capture(source)
+        self.fps = capture_fps(self.capture)
+        self.steps = list(steps or [])
+        self.output = output
+        self.on_frame = on_frame
+        self.on_error = on_error
+        self.on_end = on_end
+        self.is_camera = isinstance(source, int)
+        # 摄像头无法等待，处理不过来时只能丢帧；播放视频文件时按原速播放并丢帧；写出视频文件时逐帧处理
+        self.realtime = self.is_camera or output is None
+        self.frames = LatestFrame(drop=self.realtime)
+        self.writer_queue = Queue(WRITER_QUEUE)
+        self.captured = 0
+        self.processed = 0
+        self.stopping = threading.Event()
+        self.threads = [threading.Thread(target=self._capture_loop, name="stream-capture", daemon=True),
+                        threading.Thread(target=self._process_loop, name="stream-process", daemon=True)]
+        if output is not None:
+            self.threads.append(threading.Thread(target=self._write_loop, name="stream-write", daemon=True))
+
+    def start(self):
+        for thread in self.threads:
+            thread.start()
+
+    def set_steps(self, steps):
+        """
+        更换处理步骤，从下一帧开始生效
+        """
+        self.steps = list(steps)
+
+    def dropped(self):
+        return self.frames.dropped
+
+    def stop(self):
+        """
+        停止采集并等待各线程结束，释放视频源和输出文件（不能在回调中调用）
+        """
+        self.stopping.set()
+        self.frames.close()
+        for thread in self.threads:
+            if thread.is_alive():
+                thread.join()
+        self.capture.release()
+
+    def _capture_loop(self):
+        start = time.perf_counter()
+        try:
+            while not self.stopping.is_set():
+                ok, frame = self.capture.read()
+                if not ok:
+                    break
+                captured = time.perf_counter()
+                self.captured += 1
+                self.frames.put((frame, captured))
+                if self.realtime and not self.is_camera:
+                    # 视频文件按原帧率读取；摄像头的 read 本身就按帧率阻塞
+                    delay = start + self.captured / self.fps - time.perf_counter()
+                    if delay > 0:
+                        self.stopping.wait(delay)
+        finally:
+            self.frames.close()
+
+    def _process_loop(self):
+        try:
+            for frame, captured in iter(self.frames.get, None):
+                steps = self.steps
+                try:
+                    with span("stream_frame", "stream", **image_info(frame)):
+                        result = apply_pipeline(frame, steps)
+                except (cv2.error, ValueError) as e:
+                    if self.on_error:
+                        self.on_error(str(e).strip())
+                    continue
+                self.processed += 1
+                if self.output is not None:
+                    self.writer_queue.put(result)
+                if self.on_frame:
+                    self.on_frame(frame, result, captured)
+        finally:
+            if self.output is not None:
+                self.writer_queue.put(None)
+        if self.on_end and not self.stopping.is_set():
+            self.on_end()
+
+    def _write_loop(self):
+        writer = None
+        try:
+            while True:
+                # 帧是数组，不能用 iter(get, None) 与哨兵比较
+                result = self.writer_queue.get()
+                if result is None:
+                    break
+                if writer is None:
+                    # 输出尺寸和通道数由第一帧决定
+                    size = (result.shape[1], result.shape[0])
+                    color = result.ndim == 3
+                    fourcc = cv2.VideoWriter_fourcc(*VIDEO_CODECS.get(Path(self.output).suffix.lower(), "mp4v"))
+                    writer = cv2.VideoWriter(str(self.output), fourcc, self.fps, size, color)
+                    if not writer.isOpened() and self.on_error:
+                        self.on_error(f"Cannot write video {self.output}")
+                with span("stream_write", "stream"):
+                    writer.write(fit_frame(result, size, color))
+        finally:
+            if writer is not None:
+                writer.release()
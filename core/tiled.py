@@ -0,0 +1,213 @@
+"""
+分块（out-of-core）处理超大图像。
+
+源图像以内存映射方式打开，按块读取；每块向外扩展足够的重叠区域（各邻域操作半径之和），
+处理后裁掉重叠部分写入同样以内存映射方式打开的输出文件。
+峰值内存只与块大小有关，与图像尺寸无关。
+
+流水线按以下步骤切分为若干段，每段的结果写入临时的内存映射文件：
+  * 翻转/旋转：按输出块从上一段结果的对应区域读取并重映射
+  * 噪声：逐像素但不能跨块复现，之后的邻域操作必须读取已落盘的带噪图像
+  * Laplacian/Sobel：需要整幅图像的最大响应做归一化，分两遍完成
+每段从之前各段的步骤推出输入所处的颜色空间，颜色空间转换与整幅执行一致。
+"""
+import tempfile
+from pathlib import Path
+
+import numpy as np
+
+from core.color import infer_space, track_space
+from core.graph import OrientationNode, execute
+from core.io import read_image, write_image
+from core.operations import NORMALIZED_EDGE_MODES, apply_operation, edge_response, operation_radius
+
+# 默认块边长（像素）
+DEFAULT_TILE = 1024
+
+
+def open_source(path):
+    """
+    打开源图像：.npy 文件以只读内存映射方式打开，不读入内存；
+    其他格式 OpenCV 无法按块解码，只能整幅读入
+    """
+    path = Path(path)
+    if path.suffix.lower() == ".npy":
+        return np.load(path, mmap_mode="r")
+    img = read_image(path)
+    if img is None:
+        raise ValueError(f"Failed to read image {path}")
+    return img
+
+
+def tiles(height, width, tile):
+    """
+    依次返回每个块的 (y, x, 高, 宽)
+    """
+    for y in range(0, height, tile):
+        for x in range(0, width, tile):
+            yield y, x, min(tile, height - y), min(tile, width - x)
+
+
+def is_normalized_edge(step):
+    return step.op == "edge" and step.mode in NORMALIZED_EDGE_MODES
+
+
+def split_segments(steps):
+    """
+    将步骤序列切分为 (类型, 步骤列表) 段，类型为 "geometric" 或 "local"
+    """
+    segments = []
+    current = []
+    for step in steps:
+        if step.op == "geometric":
+            if current:
+                segments.append(("local", current))
+                current = []
+            if segments and segments[-1][0] == "geometric":
+                segments[-1][1].append(step)
+            else:
+                segments.append(("geometric", [step]))
+            continue
+        current.append(step)
+        # 噪声和需要全局归一化的边缘检测结束当前段
+        if step.op == "noise" or is_normalized_edge(step):
+            segments.append(("local", current))
+            current = []
+    if current or not segments:
+        segments.append(("local", current))
+    return segments
+
+
+class TiledExecutor:
+    """
+    分块执行流水线，输出写入内存映射文件
+    """
+    def __init__(self, tile=DEFAULT_TILE, workdir=None, report=None):
+        """
+        参数:
+            tile (int): 块边长
+            workdir (str, optional): 存放中间结果的目录，默认为系统临时目录
+            report (callable, optional): 以完成比例调用的进度回调
+        """
+        self.tile = tile
+        self.workdir = workdir
+        self.report = report
+
+    def run(self, source, steps, output_path):
+        """
+        对 source（数组或内存映射）执行步骤序列
+
+        参数:
+            output_path (str): 最终结果写入的 .npy 路径
+        返回:
+            numpy.memmap: 结果
+        """
+        segments = split_segments(steps)
+        space = infer_space(source)
+        with tempfile.TemporaryDirectory(dir=self.workdir, ignore_cleanup_errors=True) as temp_dir:
+            current = source
+            for index, (kind, segment) in enumerate(segments):
+                last = index == len(segments) - 1
+                path = Path(output_path) if last else Path(temp_dir) / f"segment{index}.npy"
+                progress = (index / len(segments), 1 / len(segments))
+                if kind == "geometric":
+                    current = self.run_geometric(current, segment, path, progress)
+                else:
+                    current = self.run_local(current, segment, path, progress, space)
+                space = track_space(segment, space)
+        return current
+
+    def _report(self, progress, fraction):
+        if self.report is not None:
+            start, span = progress
+            self.report(start + span * fraction)
+
+    def run_geometric(self, src, steps, path, progress):
+        """
+        翻转/旋转段：在源数组上构造变换后的视图，按输出块读取并写出
+        """
+        view = OrientationNode(steps).view(src)
+        out = np.lib.format.open_memmap(path, mode="w+", dtype=src.dtype, shape=view.shape)
+        blocks = list(tiles(view.shape[0], view.shape[1], self.tile))
+        for i, (y, x, h, w) in enumerate(blocks):
+            self._report(progress, i / len(blocks))
+            out[y:y + h, x:x + w] = view[y:y + h, x:x + w]
+        out.flush()
+        return out
+
+    def run_local(self, src, steps, path, progress, space=None):
+        """
+        逐像素/邻域操作段：每块带重叠区域读取、处理、裁剪后写出
+
+        参数:
+            space (str, optional): 段输入所处的颜色空间，默认按通道数推断
+        """
+        height, width = src.shape[:2]
+        # 段末尾的噪声或需要归一化的边缘检测单独处理
+        last = steps[-1] if steps and (steps[-1].op == "noise" or is_normalized_edge(steps[-1])) else None
+        head = steps[:-1] if last is not None else steps
+        halo = sum(operation_radius(step.op, step.mode, step.params) for step in steps)
+        blocks = list(tiles(height, width, self.tile))
+        passes = 2 if last is not None and is_normalized_edge(last) else 1
+
+        def process(y, x, h, w):
+            # 读取带重叠区域的块（图像边缘处由各操作自身的边界外推处理，与整图处理一致）
+            y0, x0 = max(0, y - halo), max(0, x - halo)
+            y1, x1 = min(height, y + h + halo), min(width, x + w + halo)
+            region = execute(np.ascontiguousarray(src[y0:y1, x0:x1]), head, space=space)
+            return region, (slice(y - y0, y - y0 + h), slice(x - x0, x - x0 + w))
+
+        # 第一遍：统计整幅图像的最大边缘响应
+        peak = None
+        if passes == 2:
+            peak = -np.inf
+            for i, (y, x, h, w) in enumerate(blocks):
+                self._report(progress, i / len(blocks) / 2)
+                region, crop = process(y, x, h, w)
+                response = edge_response(region, last.mode, (last.params or {}).get("ksize"))
+                peak = max(peak, float(np.max(response[crop])))
+
+        out = None
+        for i, (y, x, h, w) in enumerate(blocks):
+            self._report(progress, (passes - 1 + i / len(blocks)) / passes)
+            region, crop = process(y, x, h, w)
+            if last is None:
+                result = region[crop]
+            elif is_normalized_edge(last):
+                result = apply_operation(region, last.op, last.mode, {**(last.params or {}), "peak": peak})[crop]
+            else:
+                # 噪声：每块使用由 (种子, 块位置) 派生的独立种子，既可复现又不会在各块重复同一噪声
+                seed = (last.params or {}).get("seed")
+                entropy = None if seed is None else [seed, y, x]
+                params = {**(last.params or {}), "seed": np.random.SeedSequence(entropy)}
+                result = apply_operation(np.ascontiguousarray(region[crop]), last.op, last.mode, params)
+            if out is None:
+                # 输出的通道数和类型由第一块的结果确定
+                out = np.lib.format.open_memmap(path, mode="w+", dtype=result.dtype,
+                                                shape=(height, width) + result.shape[2:])
+            out[y:y + h, x:x + w] = result
+        out.flush()
+        return out
+
+
+def run_tiled(src_path, dst_path, steps, tile=DEFAULT_TILE, workdir=None, report=None, params=None):
+    """
+    分块处理一个图像文件
+
+    参数:
+        src_path (str): 源图像，.npy 文件按内存映射读取
+        dst_path (str): 输出路径；.npy 直接按块写入，其他格式在最后整幅编码
+        params (list, optional): 编码参数，见 core.io.encode_params
+    返回:
+        tuple: 源图像的 (高, 宽)，写出失败时返回 None
+    """
+    source = open_source(src_path)
+    executor = TiledExecutor(tile, workdir, report)
+    if Path(dst_path).suffix.lower() == ".npy":
+        executor.run(source, steps, dst_path)
+        return source.shape[:2]
+    with tempfile.TemporaryDirectory(dir=workdir, ignore_cleanup_errors=True) as temp_dir:
+        result = executor.run(source, steps, Path(temp_dir) / "result.npy")
+        ok = write_image(dst_path, result, params)
+        del result
+    return source.shape[:2] if ok else None
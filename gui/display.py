@@ -0,0 +1,176 @@
+"""
+图像显示：将 numpy 图像高效地显示到 QLabel 上。
+
+显示流程只做一次缩放：先用 OpenCV 将图像缩小到标签大小，
+再直接包装缩小后的 numpy 缓冲区创建 QImage（不做 BGR->RGB 拷贝），
+缩放后的 QPixmap 会被缓存，直到图像或标签尺寸发生变化。
+HSV、YCrCb 等颜色空间的图像在缩小之后才转换为 BGR 显示，转换只作用于标签大小的图像。
+叠加的标注（例如测量区域）同样画在缩小后的图像上，不复制原图。
+"""
+import cv2
+import numpy as np
+
+from PySide6.QtCore import QObject, QEvent, Qt
+from PySide6.QtGui import QImage, QPixmap
+
+from core.color import to_bgr
+from core.profiling import image_info, span
+
+
+def fit_size(width, height, max_width, max_height):
+    """
+    计算保持长宽比、恰好放入 (max_width, max_height) 的尺寸
+    """
+    scale = min(max_width / width, max_height / height)
+    return max(1, round(width * scale)), max(1, round(height * scale))
+
+
+def to_display_uint8(img):
+    """
+    将非 8 位图像转换为 8 位以便显示（只在缩小后的图像上调用，开销很小）
+    """
+    if img.dtype == np.uint8:
+        return img
+    if img.dtype == np.uint16:
+        return (img >> 8).astype(np.uint8)
+    # 浮点或其他类型：按实际范围线性拉伸到 0-255
+    return cv2.normalize(img, None, 0, 255, cv2.NORM_MINMAX, cv2.CV_8U)
+
+
+def to_qimage(img):
+    """
+    直接包装 numpy 缓冲区创建 QImage，不复制像素数据。
+
+    注意：返回的 QImage 引用 img 的内存，调用方必须在 QImage 使用完毕
+    （例如 QPixmap.fromImage 完成拷贝）之前保持 img 存活。
+
+    参数:
+        img (numpy.ndarray): 8 位灰度、BGR 或 BGRA 图像
+    """
+    if img.ndim == 3 and img.shape[2] == 1:
+        img = img[:, :, 0]
+    if img.ndim == 2:
+        image_format = QImage.Format_Grayscale8
+    elif img.shape[2] == 3:
+        image_format = QImage.Format_BGR888
+    elif img.shape[2] == 4:
+        # 小端机器上 BGRA 的内存布局与 ARGB32 相同
+        image_format = QImage.Format_ARGB32
+    else:
+        raise ValueError(f"Unsupported channel count for display: {img.shape[2]}")
+
+    # 翻转等操作得到的视图可能不连续，此时才需要拷贝一次
+    if not img.flags.c_contiguous:
+        img = np.ascontiguousarray(img)
+    # 显式传入每行字节数，宽度不是 4 的倍数时也不会错位
+    return QImage(img.data, img.shape[1], img.shape[0], img.strides[0], image_format)
+
+
+def scaled_for_display(img, max_width, max_height, space=None):
+    """
+    将图像缩放到能放入标签的大小，并转换为可直接显示的 8 位数组
+
+    参数:
+        space (str, optional): 图像所处的颜色空间，默认按灰度或 BGR 显示
+    """
+    height, width = img.shape[:2]
+    new_width, new_height = fit_size(width, height, max_width, max_height)
+    if (new_width, new_height) != (width, height):
+        # 缩小时使用区域插值避免摩尔纹，放大时使用双线性插值
+        interpolation = cv2.INTER_AREA if new_width < width else cv2.INTER_LINEAR
+        img = cv2.resize(img, (new_width, new_height), interpolation=interpolation)
+    return to_bgr(to_display_uint8(img), space)
+
+
+class ImageView(QObject):
+    """
+    负责在一个 QLabel 上显示图像，缓存缩放后的 QPixmap，
+    并在标签尺寸变化时自动重新缩放。
+    """
+    def __init__(self, label):
+        super().__init__(label)
+        self.label = label
+        self.image = None
+        self.space = None
+        self.overlay = None
+        self.cache_key = None
+
+        # 允许标签缩小到比当前 pixmap 更小，否则窗口无法缩小
+        self.label.setMinimumSize(1, 1)
+        self.label.setAlignment(Qt.AlignCenter)
+        self.label.installEventFilter(self)
+
+    def show(self, img, space=None, overlay=None):
+        """
+        显示图像；图像对象、颜色空间与标签尺寸都未变化且没有叠加标注时直接复用缓存
+
+        参数:
+            space (str, optional): 图像所处的颜色空间，参见 core.color
+            overlay (callable, optional): overlay(small, scale) 在缩小后的显示图像 small 上原地绘制标注，
+                                          scale 为显示图像与原图的宽度之比
+        """
+        self.image = img
+        self.space = space
+        self.overlay = overlay
+        if overlay is not None:
+            # 标注可能已经变化，重新绘制
+            self.cache_key = None
+        self.refresh()
+
+    def invalidate(self):
+        """
+        图像数据被原地修改后调用，强制下次重新生成 pixmap
+        """
+        self.cache_key = None
+        self.refresh()
+
+    def clear(self):
+        self.image = None
+        self.overlay = None
+        self.cache_key = None
+        self.label.clear()
+
+    def refresh(self):
+        if self.image is None:
+            return
+        size = self.label.contentsRect().size()
+        key = (id(self.image), self.space, self.overlay is not None, size.width(), size.height())
+        if key == self.cache_key:
+            return
+
+        with span("scale", "display", **image_info(self.image)) as info:
+            small = scaled_for_display(self.image, max(1, size.width()), max(1, size.height()), self.space)
+            info["output"] = small.shape
+        if self.overlay is not None:
+            # 没有缩放时 small 就是原图本身，先复制再绘制
+            if np.may_share_memory(small, self.image):
+                small = small.copy()
+            self.overlay(small, small.shape[1] / self.image.shape[1])
+        with span("qimage", "display"):
+            qimage = to_qimage(small)
+        # QPixmap.fromImage 会拷贝像素，small 只需在此期间存活
+        with span("pixmap", "display", bytes=int(small.nbytes)):
+            self.label.setPixmap(QPixmap.fromImage(qimage))
+        # self.image 保持对原图的引用，保证 id 在缓存有效期内不会被复用
+        self.cache_key = key
+
+    def map_to_image(self, x, y):
+        """
+        将标签上的坐标换算为图像上的像素坐标（限制在图像范围内），没有图像时返回 None
+        """
+        if self.image is None:
+            return None
+        height, width = self.image.shape[:2]
+        rect = self.label.contentsRect()
+        shown_width, shown_height = fit_size(width, height, max(1, rect.width()), max(1, rect.height()))
+        # 图像在标签中居中显示
+        left = rect.x() + (rect.width() - shown_width) / 2
+        top = rect.y() + (rect.height() - shown_height) / 2
+        image_x = (x - left) * width / shown_width
+        image_y = (y - top) * height / shown_height
+        return min(max(round(image_x), 0), width), min(max(round(image_y), 0), height)
+
+    def eventFilter(self, watched, event):
+        if watched is self.label and event.type() == QEvent.Resize:
+            self.refresh()
+        return False
@@ -0,0 +1,90 @@
+"""
+后台解码图像文件，并预取同一目录中的相邻图像。
+"""
+import cv2
+
+from PySide6.QtCore import QObject, QThreadPool, Signal
+
+from core.io import read_image
+from gui.worker import Worker
+
+# 解码使用的线程数；与图像处理的全局线程池分开，预取不会挤占处理操作
+DECODE_THREADS = 2
+# 当前图像的解码优先于预取
+CURRENT_PRIORITY = 1
+PREFETCH_PRIORITY = 0
+
+
+def decode(path, report=None):
+    """
+    解码文件，失败时图像为 None
+    """
+    try:
+        return path, read_image(path)
+    except cv2.error:
+        return path, None
+
+
+class ImageLoader(QObject):
+    """
+    在独立的线程池中解码图像，结果放入 ImageCache 并通过 loaded(路径, 图像) 发出；
+    图像解码失败时图像为 None。同一文件同一时刻只解码一次。
+    """
+    loaded = Signal(object, object)
+
+    def __init__(self, cache, parent=None):
+        super().__init__(parent)
+        self.cache = cache
+        self.pool = QThreadPool(self)
+        self.pool.setMaxThreadCount(DECODE_THREADS)
+        self.in_flight = {}
+
+    def request(self, path, priority=CURRENT_PRIORITY):
+        """
+        请求解码 path；已在缓存中时立即返回图像，否则在后台解码并返回 None
+        """
+        img = self.cache.get(path)
+        if img is not None:
+            return img
+        entry = self.in_flight.get(path)
+        if entry is not None:
+            # 已在解码；尚未开始的预取被请求为当前图像时，提高优先级重新排队
+            if priority <= entry[1] or not self._take(entry[0]):
+                return None
+        worker = Worker(decode, path)
+        worker.signals.finished.connect(self._on_finished)
+        self.in_flight[path] = (worker, priority)
+        self.pool.start(worker, priority)
+        return None
+
+    def prefetch(self, paths):
+        """
+        在后台解码尚未缓存的文件
+        """
+        for path in paths:
+            if path not in self.cache:
+                self.request(path, PREFETCH_PRIORITY)
+
+    def cancel_prefetch(self):
+        """
+        丢弃尚未开始的预取（已开始的解码完成后仍会进入缓存）
+        """
+        for path, (worker, priority) in list(self.in_flight.items()):
+            if priority == PREFETCH_PRIORITY and self._take(worker):
+                del self.in_flight[path]
+
+    def _take(self, worker):
+        """
+        从队列中取回尚未开始执行的任务，成功返回 True
+        """
+        try:
+            return self.pool.tryTake(worker)
+        except RuntimeError:
+            # 已执行完毕、对象已被释放，完成信号仍在排队中
+            return False
+
+    def _on_finished(self, result):
+        path, img = result
+        self.in_flight.pop(path, None)
+        self.cache.put(path, img)
+        self.loaded.emit(path, img)
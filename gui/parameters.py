@@ -0,0 +1,92 @@
+"""
+操作参数面板：为当前选择的操作生成滑块。
+"""
+from PySide6.QtCore import Qt, Signal
+from PySide6.QtWidgets import QFormLayout, QHBoxLayout, QLabel, QSlider, QWidget
+
+
+def format_value(value, step):
+    """
+    按步长的精度显示参数值
+    """
+    if float(step).is_integer():
+        return str(int(round(value)))
+    decimals = len(f"{step:g}".split(".")[1])
+    return f"{value:.{decimals}f}"
+
+
+class ParameterSlider(QWidget):
+    """
+    一个参数的滑块与数值标签；滑块使用整数刻度，第 i 格对应 minimum + i * step
+    """
+    valueChanged = Signal()
+
+    def __init__(self, parameter, value, parent=None):
+        super().__init__(parent)
+        self.parameter = parameter
+        self.slider = QSlider(Qt.Horizontal)
+        self.slider.setRange(0, round((parameter.maximum - parameter.minimum) / parameter.step))
+        self.label = QLabel()
+        self.label.setMinimumWidth(48)
+        layout = QHBoxLayout(self)
+        layout.setContentsMargins(0, 0, 0, 0)
+        layout.addWidget(self.slider)
+        layout.addWidget(self.label)
+        self.set_value(value)
+        self.slider.valueChanged.connect(self._on_slider)
+
+    def value(self):
+        p = self.parameter
+        value = p.minimum + self.slider.value() * p.step
+        # 整数步长的参数（如核大小、阈值）保持为整数
+        if float(p.step).is_integer() and float(p.minimum).is_integer():
+            return int(round(value))
+        return round(value, 6)
+
+    def set_value(self, value):
+        p = self.parameter
+        self.slider.setValue(round((value - p.minimum) / p.step))
+        self.label.setText(format_value(self.value(), p.step))
+
+    def _on_slider(self):
+        self.label.setText(format_value(self.value(), self.parameter.step))
+        self.valueChanged.emit()
+
+
+class ParameterPanel(QWidget):
+    """
+    显示一组参数的滑块，任一参数变化时发出 changed(参数字典)
+    """
+    changed = Signal(dict)
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.layout = QFormLayout(self)
+        self.sliders = []
+        self.empty_label = QLabel("当前操作没有可调参数")
+        self.layout.addRow(self.empty_label)
+
+    def set_parameters(self, parameters, values=None):
+        """
+        重新生成滑块
+
+        参数:
+            parameters (list[Parameter]): 参见 core.operations.PARAMETERS
+            values (dict, optional): 各参数的当前值，缺省时使用默认值
+        """
+        values = values or {}
+        while self.layout.rowCount() > 1:
+            self.layout.removeRow(1)
+        self.sliders = []
+        for parameter in parameters:
+            slider = ParameterSlider(parameter, values.get(parameter.name, parameter.default))
+            slider.valueChanged.connect(self._on_changed)
+            self.layout.addRow(parameter.label, slider)
+            self.sliders.append(slider)
+        self.empty_label.setVisible(not parameters)
+
+    def values(self):
+        return {slider.parameter.name: slider.value() for slider in self.sliders}
+
+    def _on_changed(self):
+        self.changed.emit(self.values())
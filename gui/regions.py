@@ -0,0 +1,52 @@
+"""
+在图像标签上拖动鼠标选择矩形区域。
+"""
+from PySide6.QtCore import QEvent, QObject, QRect, QSize, Qt, Signal
+from PySide6.QtWidgets import QRubberBand
+
+
+class RegionSelector(QObject):
+    """
+    在 ImageView 的标签上按住左键拖动选择区域，松开时发出 selected(x, y, w, h)（图像像素坐标）；
+    右键单击发出 cleared。
+    """
+    selected = Signal(int, int, int, int)
+    cleared = Signal()
+
+    def __init__(self, view):
+        super().__init__(view.label)
+        self.view = view
+        self.label = view.label
+        self.band = QRubberBand(QRubberBand.Rectangle, self.label)
+        self.origin = None
+        self.label.installEventFilter(self)
+
+    def eventFilter(self, watched, event):
+        if watched is not self.label:
+            return False
+        if event.type() == QEvent.MouseButtonPress:
+            if event.button() == Qt.RightButton:
+                self.cleared.emit()
+                return True
+            if event.button() == Qt.LeftButton and self.view.image is not None:
+                self.origin = event.position().toPoint()
+                self.band.setGeometry(QRect(self.origin, QSize()))
+                self.band.show()
+                return True
+        elif event.type() == QEvent.MouseMove and self.origin is not None:
+            self.band.setGeometry(QRect(self.origin, event.position().toPoint()).normalized())
+            return True
+        elif event.type() == QEvent.MouseButtonRelease and self.origin is not None and event.button() == Qt.LeftButton:
+            self.band.hide()
+            start = self.view.map_to_image(self.origin.x(), self.origin.y())
+            end_point = event.position().toPoint()
+            end = self.view.map_to_image(end_point.x(), end_point.y())
+            self.origin = None
+            if start is not None and end is not None:
+                x, y = min(start[0], end[0]), min(start[1], end[1])
+                w, h = abs(end[0] - start[0]), abs(end[1] - start[1])
+                # 单击（没有拖动）不产生区域
+                if w > 0 and h > 0:
+                    self.selected.emit(x, y, w, h)
+            return True
+        return False
@@ -0,0 +1,83 @@
+"""
+实时预览调度：拖动滑块时只计算和显示最新的请求。
+"""
+from PySide6.QtCore import QObject, QThreadPool, QTimer, Signal
+
+from gui.worker import Worker
+
+# 合并连续请求的等待时间（毫秒）
+DEBOUNCE_MS = 30
+
+
+class LatestScheduler(QObject):
+    """
+    只保留最新请求的调度器
+
+    短时间内的连续请求合并为一次；计算期间到来的新请求替换尚未开始的请求，
+    并将正在执行的计算标记为作废，其结果被丢弃。同一时刻最多只有一个计算在执行，
+    因此拖动滑块时不会堆积后台任务，只有最新请求的结果会被发出。
+    """
+    result_ready = Signal(object)
+    failed = Signal(str)
+
+    def __init__(self, parent=None, delay_ms=DEBOUNCE_MS):
+        super().__init__(parent)
+        self.pool = QThreadPool.globalInstance()
+        self.timer = QTimer(self)
+        self.timer.setSingleShot(True)
+        self.timer.setInterval(delay_ms)
+        self.timer.timeout.connect(self._start)
+        # 尚未开始的最新请求
+        self.request = None
+        self.current = None
+
+    def busy(self):
+        return self.current is not None or self.request is not None
+
+    def submit(self, func):
+        """
+        提交计算 func(report) -> 结果，取代之前所有未完成的请求
+        """
+        self.request = func
+        if self.current is not None:
+            self.current.token.cancel()
+        self.timer.start()
+
+    def cancel(self):
+        """
+        丢弃尚未开始的请求，并作废正在执行的计算
+        """
+        self.timer.stop()
+        self.request = None
+        if self.current is not None:
+            self.current.token.cancel()
+
+    def _start(self):
+        # 上一个计算结束后才开始下一个，结束时会再次检查是否有新请求
+        if self.current is not None or self.request is None:
+            return
+        func, self.request = self.request, None
+        worker = Worker(func)
+        worker.signals.finished.connect(self._on_finished)
+        worker.signals.error.connect(self._on_error)
+        worker.signals.cancelled.connect(self._on_done)
+        self.current = worker
+        self.pool.start(worker)
+
+    def _on_finished(self, result):
+        stale = self.current.token.cancelled
+        self._on_done()
+        if not stale:
+            self.result_ready.emit(result)
+
+    def _on_error(self, message):
+        stale = self.current.token.cancelled
+        self._on_done()
+        if not stale:
+            self.failed.emit(message)
+
+    def _on_done(self):
+        self.current = None
+        # 等待合并的请求由定时器启动，否则立即开始
+        if self.request is not None and not self.timer.isActive():
+            self._start()
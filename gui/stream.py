@@ -0,0 +1,57 @@
+"""
+视频流与界面之间的桥接：把处理线程中的回调转换为界面线程中的信号。
+"""
+import threading
+
+from PySide6.QtCore import QObject, Signal
+
+
+class StreamBridge(QObject):
+    """
+    接收 core.stream.VideoStream 的回调并以信号发出。
+
+    界面只显示最新的一帧：上一帧尚未被界面取走时新帧直接替换它，不会在事件队列中堆积，
+    界面绘制慢于处理时也不会增加延迟。
+    """
+    frame_ready = Signal()  # 有新帧可取，用 take() 取得 (原始帧, 处理结果, 采集时刻)
+    failed = Signal(str)
+    ended = Signal()
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.lock = threading.Lock()
+        self.pending = None
+        self.dropped = 0
+        self.last_error = None
+
+    def reset(self):
+        with self.lock:
+            self.pending = None
+            self.dropped = 0
+            self.last_error = None
+
+    def on_frame(self, frame, result, captured):
+        with self.lock:
+            waiting = self.pending is not None
+            if waiting:
+                self.dropped += 1
+            self.pending = (frame, result, captured)
+        if not waiting:
+            self.frame_ready.emit()
+
+    def take(self):
+        """
+        取走最新的一帧，没有时返回 None
+        """
+        with self.lock:
+            item, self.pending = self.pending, None
+            return item
+
+    def on_error(self, message):
+        # 同一错误每帧都会出现，只发出一次
+        if message != self.last_error:
+            self.last_error = message
+            self.failed.emit(message)
+
+    def on_end(self):
+        self.ended.emit()
@@ -0,0 +1,143 @@
+"""
+后台任务执行：在 QThreadPool 中运行图像处理，避免阻塞界面线程。
+"""
+import traceback
+
+from PySide6.QtCore import QObject, QRunnable, QThreadPool, Signal
+
+
+class TaskCancelled(Exception):
+    """
+    任务被取消时由进度回调抛出，用于在处理步骤之间中断任务
+    """
+
+
+class CancelToken:
+    """
+    取消标记，由界面线程设置，工作线程在进度回调中检查
+    """
+    def __init__(self):
+        self.cancelled = False
+
+    def cancel(self):
+        self.cancelled = True
+
+
+class WorkerSignals(QObject):
+    """
+    工作线程向界面线程发送的信号（跨线程自动排队到界面线程执行）
+    """
+    progress = Signal(int)  # 进度百分比 0-100
+    finished = Signal(object)  # 处理结果
+    error = Signal(str)  # 错误信息
+    cancelled = Signal()
+
+
+class Worker(QRunnable):
+    """
+    在线程池中执行 func(*args, report=...)，其中 report(fraction) 用于汇报进度并检查取消
+    """
+    def __init__(self, func, *args, **kwargs):
+        super().__init__()
+        self.func = func
+        self.args = args
+        self.kwargs = kwargs
+        self.token = CancelToken()
+        self.signals = WorkerSignals()
+
+    def report(self, fraction):
+        """
+        汇报进度，若任务已被取消则抛出 TaskCancelled
+        """
+        if self.token.cancelled:
+            raise TaskCancelled()
+        self.signals.progress.emit(int(fraction * 100))
+
+    def run(self):
+        try:
+            self.report(0)
+            result = self.func(*self.args, report=self.report, **self.kwargs)
+            if self.token.cancelled:
+                raise TaskCancelled()
+        except TaskCancelled:
+            self.signals.cancelled.emit()
+        except Exception as e:
+            traceback.print_exc()
+            self.signals.error.emit(str(e).strip() or type(e).__name__)
+        else:
+            self.signals.progress.emit(100)
+            self.signals.finished.emit(result)
+
+
+class OperationRunner(QObject):
+    """
+    按提交顺序串行执行图像操作：每个操作作用于上一个操作的结果，
+    界面线程只负责提交任务和接收结果。
+    """
+    started = Signal(str)  # 开始执行的操作名称
+    progress = Signal(int)
+    result_ready = Signal(object)
+    failed = Signal(str)
+    idle = Signal()  # 队列清空
+
+    def __init__(self, source, parent=None):
+        """
+        参数:
+            source (callable): 返回当前待处理图像的函数，在任务开始时调用
+        """
+        super().__init__(parent)
+        self.source = source
+        self.pool = QThreadPool.globalInstance()
+        self.pending = []
+        self.current = None
+
+    def busy(self):
+        return self.current is not None
+
+    def submit(self, func, name=""):
+        """
+        提交操作 func(img, report) -> img，若有任务正在执行则排队
+        """
+        self.pending.append((func, name))
+        if self.current is None:
+            self._start_next()
+
+    def cancel(self):
+        """
+        取消正在执行的任务并清空队列，正在执行的 OpenCV 调用结束后其结果将被丢弃
+        """
+        self.pending.clear()
+        if self.current is not None:
+            self.current.token.cancel()
+
+    def _start_next(self):
+        if not self.pending:
+            self.current = None
+            self.idle.emit()
+            return
+        func, name = self.pending.pop(0)
+        worker = Worker(func, self.source())
+        worker.signals.progress.connect(self.progress)
+        worker.signals.finished.connect(self._on_finished)
+        worker.signals.error.connect(self._on_error)
+        worker.signals.cancelled.connect(self._on_cancelled)
+        self.current = worker
+        self.started.emit(name)
+        self.pool.start(worker)
+
+    def _on_finished(self, result):
+        # 任务在取消之后才结束（例如已经打开了新的图像）时，结果已经过时，丢弃
+        if not self.current.token.cancelled:
+            self.result_ready.emit(result)
+        self._start_next()
+
+    def _on_error(self, message):
+        # 被取消的任务的错误同样过时，不影响取消之后提交的操作
+        if not self.current.token.cancelled:
+            # 出错后丢弃后续依赖该结果的操作
+            self.pending.clear()
+            self.failed.emit(message)
+        self._start_next()
+
+    def _on_cancelled(self):
+        self._start_next()
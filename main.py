@@ -1,16 +1,93 @@
-# pyinstaller -F -w --icon=./icons/toolkit.png main.py
+# pyinstaller main.spec
+# python main.py --startup-time
+# python main.py --memory-budget 1024
 
+import time
+
+# 进程开始执行本脚本的时刻，用于测量启动耗时
+STARTED = time.perf_counter()
+
+import argparse
 import sys
+import threading
 from pathlib import Path
 
 import cv2
 import numpy as np
-import matplotlib.pyplot as plt
 
-from PySide6.QtWidgets import QApplication, QMainWindow, QFileDialog
-from PySide6.QtGui import QPixmap, QImage, QIcon
+from PySide6.QtWidgets import QApplication, QMainWindow, QFileDialog, QProgressBar, QPushButton, QCheckBox, QDockWidget, QLabel, QInputDialog, QMessageBox
+from PySide6.QtGui import QIcon, QShortcut, QKeySequence
+from PySide6.QtCore import Qt, QTimer
 
 from ui.MainWindow_ui import Ui_MainWindow
+from core.color import SPACE_LABELS, SPACES, channel_names, infer_space, track_space
+from core.graph import LazyImage
+from core.history import History
+from core.io import (IMAGE_EXTENSIONS, QUALITY_SETTINGS, SAVE_FORMATS, TIFF_COMPRESSIONS, encode_params,
+                     read_image, save_format, write_image)
+from core.library import DirectoryBrowser, ImageCache, reduced_flags
+from core.memory import RELEASE_DECODED, RELEASE_HISTORY, budget, buffer_bytes, freeze
+from core.operations import (COLOR_SPACE_MODES, GEOMETRIC_MODES, NOISE_MODES, BLUR_MODES, EDGE_MODES, POINT_MODES,
+                             parameters)
+from core.pipeline import Step, apply_pipeline, make_proxy, seed_steps
+from core.profiling import format_bytes, image_info, profiler, span
+from gui.display import ImageView
+from gui.loader import ImageLoader
+from gui.parameters import ParameterPanel
+from gui.scheduler import LatestScheduler
+from gui.worker import OperationRunner, Worker
+# 视频、区域测量、批量导出、直方图与频谱只在对应的操作中用到，在处理函数中第一次用到时才导入
+
+# 快速预览模式下代理图的最长边（像素），远大于结果标签的显示尺寸
+PROXY_MAX_SIDE = 1280
+# 撤销历史中快照可占用的内存上限（MB）
+HISTORY_BUDGET_MB = 512
+# 已解码图像缓存的内存上限（MB），用于目录浏览时的预取
+IMAGE_CACHE_MB = 512
+# 整个进程的内存预算（MB），超出时依次释放临时缓冲区、各种缓存、解码缓存和历史快照；
+# 可用 --memory-budget 覆盖
+MEMORY_BUDGET_MB = 2048
+# 打开视频时可选的文件类型
+VIDEO_EXTENSIONS = (".mp4", ".avi", ".mkv", ".mov", ".webm")
+
+
+def pyplot():
+    """
+    第一次绘图时才导入 matplotlib（导入约需 0.6 秒，是启动时最大的开销）
+    """
+    import matplotlib.pyplot as plt
+    return plt
+
+
+def report_startup(imported, window):
+    """
+    打印启动各阶段的耗时（从脚本开始执行算起，不含 Python 解释器自身的启动）
+    """
+    painted = time.perf_counter()
+    print(f"Imports      : {(imported - STARTED) * 1000:.0f} ms")
+    print(f"Window       : {(window - imported) * 1000:.0f} ms")
+    print(f"First paint  : {(painted - window) * 1000:.0f} ms")
+    print(f"Total        : {(painted - STARTED) * 1000:.0f} ms")
+
+
+def positive_int(text):
+    value = int(text)
+    if value <= 0:
+        raise argparse.ArgumentTypeError(f"must be a positive integer, got {text}")
+    return value
+
+
+def parse_arguments(argv=None):
+    """
+    解析命令行参数；未识别的参数（例如 Qt 自身的 -platform 等）留给 QApplication
+    """
+    parser = argparse.ArgumentParser(description="图像处理工具")
+    parser.add_argument("--startup-time", action="store_true", help="打印启动各阶段的耗时后退出")
+    parser.add_argument("--memory-budget", type=positive_int, default=MEMORY_BUDGET_MB, metavar="MB",
+                        help=f"进程的内存预算（MB），默认 {MEMORY_BUDGET_MB}")
+    args, _ = parser.parse_known_args(argv)
+    return args
+
 
 class MainWindow(QMainWindow):
     """
@@ -25,6 +102,57 @@ class MainWindow(QMainWindow):
         self.ui = Ui_MainWindow()  # 实例化UI类
         self.ui.setupUi(self)  # 使用UI类的实例设置主窗口的界面
 
+        # 尚未加载图像
+        self.origin_img = None
+        self.proxy_img = None
+        self.result_img = None
+        # 直方图窗口上次统计的结果图像及其直方图，再次打开时只统计之后改变的区域
+        self.hist_source = None
+        self.hist_engine = None
+        # 自加载或重置以来的操作历史，保存时在原图上按相同步骤重新计算
+        self.history = None
+        # 尚未开始执行、仍可追加步骤的操作批次（惰性执行，开始时统一优化）
+        self.open_batch = None
+        self.batch_lock = threading.Lock()
+        # 正在进行的保存或批量导出任务，同一时刻只有一个
+        self.save_worker = None
+        # 各保存格式上次选择的质量（TIFF 为压缩方式）和上次批量导出的格式
+        self.encode_settings = {}
+        self.export_format = "PNG"
+        # 当前图像文件与所在目录的浏览状态；已解码图像的缓存与后台解码
+        self.image_path = None
+        self.browser = None
+        self.image_cache = ImageCache(IMAGE_CACHE_MB * 1024 * 1024)
+        self.loader = ImageLoader(self.image_cache, self)
+        self.setup_memory_budget()
+        # 正在播放的视频或摄像头；每帧按当前的处理步骤处理
+        self.stream = None
+        # 第一次打开视频时创建
+        self.stream_bridge = None
+        self.stream_stats = None
+        # 在原图上选择的测量区域（原图像素坐标），切换图像时保留，用于批量测量同一批图像
+        self.regions = []
+        self.measure_space = "bgr"
+        # 选择区域后的测量在后台进行（大图像第一次测量需要建立积分图），只显示最新区域的结果
+        self.region_measure = LatestScheduler(self, delay_ms=0)
+
+        # 两个图像标签的显示器，缓存缩放后的 pixmap 并跟随标签尺寸变化
+        self.origin_view = ImageView(self.ui.origin_img)
+        self.result_view = ImageView(self.ui.result_img)
+        # 在原图上拖动选择测量区域，第一次显示原图时创建
+        self.region_selector = None
+
+        # 图像操作在后台线程中串行执行，结果回到界面线程显示
+        self.runner = OperationRunner(lambda: self.result_img, self)
+        self.setup_status_bar()
+
+        # 各操作的参数取值，以及参数面板当前对应的 (操作, 模式)
+        self.param_values = {}
+        self.param_target = None
+        # 拖动参数滑块时的实时预览，只计算和显示最新的参数
+        self.live = LatestScheduler(self)
+        self.setup_parameter_panel()
+
         self.band()  # 调用band方法进行进一步的初始化或设置
 
         # # 默认预加载的图像
@@ -50,8 +178,14 @@ class MainWindow(QMainWindow):
 
         # 绑定加载图像按钮的点击事件
         self.ui.load_button.clicked.connect(self.load_image)
+        # 绑定打开视频按钮的点击事件
+        self.ui.stream_button.clicked.connect(self.toggle_stream)
         # 绑定保存图像按钮的点击事件
         self.ui.save_button.clicked.connect(self.save_image)
+        # 绑定批量导出按钮的点击事件
+        self.ui.export_button.clicked.connect(self.export_directory)
+        # 绑定区域测量按钮的点击事件
+        self.ui.measure_button.clicked.connect(self.export_measurements)
         # 绑定重置图像按钮的点击事件
         self.ui.reset_button.clicked.connect(self.reset_image)
 
@@ -65,63 +199,787 @@ class MainWindow(QMainWindow):
         self.ui.blur_button.clicked.connect(self.image_blur)
         # 绑定边缘检测按钮的点击事件
         self.ui.edge_button.clicked.connect(self.edge_detect)
+        # 绑定点运算按钮的点击事件
+        self.ui.point_button.clicked.connect(self.point_operation)
 
         # 绑定图像直方图按钮的点击事件
         self.ui.draw_button.clicked.connect(self.darw_hist)
         # 绑定傅里叶变换按钮的点击事件
         self.ui.fft_button.clicked.connect(self.fast_fft)
 
+        # 后台操作的进度、结果与错误
+        self.runner.started.connect(self.on_operation_started)
+        self.runner.progress.connect(self.progress_bar.setValue)
+        self.runner.result_ready.connect(self.on_operation_finished)
+        self.runner.failed.connect(self.on_operation_failed)
+        self.runner.idle.connect(self.on_runner_idle)
+        # 取消按钮与 Esc 键取消正在执行的操作以及保存、导出
+        self.cancel_button.clicked.connect(self.cancel_all)
+        QShortcut(QKeySequence("Esc"), self, self.cancel_all)
+        # 切换快速预览模式
+        self.preview_check.toggled.connect(self.toggle_preview)
+        # 撤销与重做
+        QShortcut(QKeySequence.Undo, self, self.undo)
+        QShortcut(QKeySequence.Redo, self, self.redo)
+        # 浏览同一目录中的上一张/下一张图像
+        QShortcut(QKeySequence(Qt.Key_PageUp), self, self.previous_image)
+        QShortcut(QKeySequence(Qt.Key_PageDown), self, self.next_image)
+        self.loader.loaded.connect(self.on_image_loaded)
+        # 导出性能记录
+        QShortcut(QKeySequence("Ctrl+Shift+T"), self, self.export_trace)
+
+        # 选择操作时在参数面板中显示其参数，拖动滑块时实时更新结果
+        for op, box, modes in [("noise", self.ui.noise_Box, NOISE_MODES),
+                               ("blur", self.ui.blur_Box, BLUR_MODES),
+                               ("edge", self.ui.edge_Box, EDGE_MODES),
+                               ("point", self.ui.point_Box, POINT_MODES)]:
+            box.currentTextChanged.connect(lambda text, op=op, modes=modes: self.show_parameters(op, modes.get(text)))
+        self.parameter_panel.changed.connect(self.on_parameters_changed)
+        self.live.result_ready.connect(self.on_live_finished)
+        self.live.failed.connect(self.on_operation_failed)
+        self.region_measure.result_ready.connect(self.on_region_measured)
+        self.region_measure.failed.connect(
+            lambda message: self.statusBar().showMessage(f"测量失败: {message.splitlines()[0]}", 5000))
+
+    def setup_status_bar(self):
+        """
+        在状态栏中创建进度条和取消按钮，空闲时隐藏
+        """
+        # 最近一次操作的耗时，Ctrl+Shift+T 导出整个会话的时间线
+        self.cost_label = QLabel()
+        self.cost_label.setToolTip("Ctrl+Shift+T 导出性能记录")
+        self.statusBar().addPermanentWidget(self.cost_label)
+        self.progress_bar = QProgressBar()
+        self.progress_bar.setMaximumWidth(200)
+        self.cancel_button = QPushButton("取消")
+        # 快速预览：在缩小的代理图上处理，保存时再按原分辨率重新计算
+        self.preview_check = QCheckBox("快速预览")
+        self.preview_check.setChecked(True)
+        self.statusBar().addPermanentWidget(self.preview_check)
+        self.statusBar().addPermanentWidget(self.progress_bar)
+        self.statusBar().addPermanentWidget(self.cancel_button)
+        self.progress_bar.hide()
+        self.cancel_button.hide()
+
+    def setup_memory_budget(self):
+        """
+        登记界面持有的图像、解码缓存与历史快照的内存占用，并在状态栏中定时显示总占用
+        """
+        budget.register("图像", self.image_bytes)
+        budget.register("解码缓存", lambda: self.image_cache.used_bytes, self.image_cache.trim, RELEASE_DECODED)
+        budget.register("历史快照", lambda: self.history.used_bytes if self.history is not None else 0,
+                        lambda excess: self.history.trim(excess) if self.history is not None else 0,
+                        RELEASE_HISTORY)
+        budget.set_limit(MEMORY_BUDGET_MB * 1024 * 1024)
+        self.memory_label = QLabel()
+        self.statusBar().addPermanentWidget(self.memory_label)
+        self.memory_timer = QTimer(self)
+        self.memory_timer.timeout.connect(self.update_memory)
+        self.memory_timer.start(1000)
+        self.update_memory()
+
+    def image_bytes(self):
+        """
+        原图、代理图与结果图占用的字节数；与历史快照或解码缓存共享的内存不重复计算
+        """
+        with self.image_cache.lock:
+            shared = list(self.image_cache.images.values())
+        history = self.history
+        if history is not None:
+            with history.lock:
+                shared += [history.base] + list(history.snapshots.values())
+        images = [self.origin_img, self.proxy_img, self.result_img, self.hist_source]
+        return buffer_bytes(images + shared) - buffer_bytes(shared)
+
+    def update_memory(self):
+        """
+        超出内存预算时释放可重新得到的部分，并在状态栏中显示总占用，悬停显示各部分的占用
+        """
+        budget.enforce()
+        report = budget.report()
+        total = sum(size for _, size in report)
+        self.memory_label.setText(f"内存 {format_bytes(total)} / {format_bytes(budget.limit_bytes)}")
+        self.memory_label.setToolTip("\n".join(f"{name}: {format_bytes(size)}" for name, size in report))
+
+    def setup_parameter_panel(self):
+        """
+        在窗口右侧创建参数面板
+        """
+        self.parameter_panel = ParameterPanel()
+        dock = QDockWidget("参数", self)
+        dock.setWidget(self.parameter_panel)
+        dock.setFeatures(QDockWidget.DockWidgetMovable | QDockWidget.DockWidgetFloatable)
+        self.addDockWidget(Qt.RightDockWidgetArea, dock)
+
+    def show_parameters(self, op, mode):
+        """
+        在参数面板中显示操作的参数
+        """
+        if mode is None or self.param_target == (op, mode):
+            return
+        self.param_target = (op, mode)
+        self.parameter_panel.set_parameters(parameters(op, mode), self.param_values.get((op, mode)))
+
+    def step_params(self, op, mode, previous=None):
+        """
+        由参数面板的取值生成步骤参数，只保留与默认值不同的参数；previous 中的随机种子被保留
+        """
+        values = self.param_values.get((op, mode), {})
+        params = {p.name: values[p.name] for p in parameters(op, mode)
+                  if p.name in values and values[p.name] != p.default}
+        if previous and "seed" in previous:
+            params["seed"] = previous["seed"]
+        return params or None
+
+    def on_parameters_changed(self, values):
+        """
+        参数变化：若最后一步正是该操作，则用新参数重新计算这一步并替换它，否则参数用于下一次执行
+        """
+        if self.param_target is None:
+            return
+        op, mode = self.param_target
+        self.param_values[(op, mode)] = values
+
+        history = self.history
+        # 有其他操作在执行或排队时不做实时预览
+        if history is None or not history.can_undo() or self.runner.busy() or self.open_batch is not None:
+            return
+        index = history.cursor
+        last = history.steps[index - 1]
+        if (last.op, last.mode) != (op, mode):
+            return
+        # 噪声保留原来的种子，拖动时只改变强度而不改变噪声图案
+        step = Step(op, mode, self.step_params(op, mode, last.params))
+
+        def task(report):
+            with span("实时预览", "operation") as info:
+                img = apply_pipeline(history.state(index - 1), [step], report, history.space(index - 1))
+                info["output_bytes"] = int(img.nbytes)
+            return history, index, step, img
+
+        self.live.submit(task)
+
+    def on_live_finished(self, result):
+        history, index, step, img = result
+        # 计算期间历史已经改变（撤销、新操作、重新加载）时丢弃结果
+        if history is not self.history or history.cursor != index or self.runner.busy():
+            return
+        history.amend(step, img)
+        self.result_img = img
+        with span("show_result", "display"):
+            self.display_result_image()
+        self.show_cost()
+
+    def run_operation(self, name, op, mode):
+        """
+        将图像操作提交到后台线程执行，完成后记录步骤并显示结果
+        """
+        if self.result_img is None:
+            return
+        self.live.cancel()
+        self.show_parameters(op, mode)
+        # 噪声步骤带上随机种子，撤销重做和保存时重放得到相同的噪声
+        step = seed_steps([Step(op, mode, self.step_params(op, mode))])[0]
+        # 前一批操作还在排队时直接追加，执行时连续的变换和滤波会被合并
+        with self.batch_lock:
+            if self.open_batch is not None:
+                self.open_batch.append(step)
+                return
+            batch = self.open_batch = [step]
+        self.runner.submit(self.timed(name, lambda img, report: self.run_batch(batch, img, report)), name)
+
+    def run_batch(self, batch, img, report):
+        """
+        在后台线程中执行一批操作，返回 (提交函数, 结果)，提交函数在界面线程中更新历史记录
+        """
+        with self.batch_lock:
+            # 批次开始执行后不再接受新的步骤
+            if self.open_batch is batch:
+                self.open_batch = None
+            steps = list(batch)
+        out = LazyImage(img, steps, self.history.space()).evaluate(report)
+        return lambda result: self.history.extend(steps, result), out
+
+    def submit_task(self, func, name):
+        """
+        提交非操作类任务（撤销、重做、重放），之后的操作不能再合并到它之前的批次中
+        """
+        self.live.cancel()
+        self.close_batch()
+        self.runner.submit(self.timed(name, func), name)
+
+    def timed(self, name, func):
+        """
+        包装后台任务 func(img, report) -> (提交函数, 结果)，记录其耗时与输入输出大小
+        """
+        def task(img, report):
+            with span(name, "operation", **image_info(img)) as info:
+                result = func(img, report)
+                info["output_bytes"] = int(result[1].nbytes)
+            return result
+        return task
+
+    def show_cost(self, name=None):
+        """
+        在状态栏中显示最近一次操作（或指定名称的记录）与随后显示结果的耗时
+        """
+        event = profiler.last(name=name, category=None if name else "operation")
+        if event is None:
+            return
+        text = f"{event['name']}: {event['duration'] * 1000:.1f} ms"
+        shown = profiler.last("show_result")
+        if shown is not None and shown["start"] >= event["start"]:
+            text += f"，显示 {shown['duration'] * 1000:.1f} ms"
+        size = event["args"].get("output_bytes", event["args"].get("bytes"))
+        if size:
+            text += f"，{format_bytes(size)}"
+        self.cost_label.setText(text)
+
+    def export_trace(self):
+        """
+        将本次会话的耗时记录导出为 Chrome 跟踪格式（chrome://tracing 或 Perfetto 打开）
+        """
+        path, _ = QFileDialog.getSaveFileName(self, "导出性能记录", "trace.json", "JSON files (*.json)")
+        if not path:
+            return
+        profiler.export(path)
+        self.statusBar().showMessage(f"性能记录已导出到 {path}", 3000)
+
+    def close_batch(self):
+        with self.batch_lock:
+            self.open_batch = None
+
+    def cancel_operations(self):
+        """
+        取消正在执行和排队中的操作
+        """
+        self.live.cancel()
+        self.close_batch()
+        self.runner.cancel()
+
+    def cancel_all(self):
+        """
+        取消正在执行和排队中的操作，以及正在进行的保存或导出
+        """
+        self.cancel_operations()
+        if self.save_worker is not None:
+            self.save_worker.token.cancel()
+
+    def new_history(self):
+        """
+        以当前模式的起点图像为基准创建新的历史记录
+        """
+        self.history = History(self.working_source(), HISTORY_BUDGET_MB * 1024 * 1024)
+        self.hist_source = self.hist_engine = None
+
+    def undo(self):
+        """
+        撤销上一步操作
+        """
+        if self.history is None or not self.history.can_undo():
+            return
+
+        # 在后台计算，排在已提交的操作之后执行；连续撤销时执行到这里可能已无可撤销的步骤
+        def task(img, report):
+            if not self.history.can_undo():
+                return lambda out: None, img
+            return lambda out: self.history.move(-1), self.history.image_for_undo(img)
+
+        self.submit_task(task, "撤销")
+
+    def redo(self):
+        """
+        重做被撤销的操作
+        """
+        if self.history is None or not self.history.can_redo():
+            return
+
+        def task(img, report):
+            if not self.history.can_redo():
+                return lambda out: None, img
+            return lambda out: self.history.move(1), self.history.image_for_redo(img)
+
+        self.submit_task(task, "重做")
+
+    def working_source(self):
+        """
+        当前模式下处理的起点图像：快速预览时为代理图，否则为原图
+        """
+        if self.preview_check.isChecked():
+            return self.proxy_img
+        return self.origin_img
+
+    def is_previewing(self):
+        """
+        结果图像是否为代理图（原图本身足够小时两者相同）
+        """
+        return self.preview_check.isChecked() and self.proxy_img is not self.origin_img
+
+    def toggle_preview(self):
+        """
+        切换快速预览模式，并在新的起点图像上重放已记录的步骤
+        """
+        if self.origin_img is None:
+            return
+        self.cancel_operations()
+        steps = self.history.active_steps()
+        # 重放完成后步骤才记入新的历史，取消重放时结果与历史保持一致
+        self.new_history()
+        source = self.history.base
+        self.result_img = source
+        self.display_result_image()
+        if steps:
+            self.submit_task(lambda img, report: (lambda out: self.history.extend(steps, out),
+                                                  apply_pipeline(source, steps, report)), "重新计算")
+
+    def render_full_resolution(self, report=None):
+        """
+        返回原分辨率的处理结果；预览模式下在原图上重放全部步骤（可在后台线程中调用）
+        """
+        if self.is_previewing():
+            return apply_pipeline(self.origin_img, self.history.active_steps(), report)
+        return self.result_img
+
+    def on_operation_started(self, name):
+        self.progress_bar.setValue(0)
+        self.progress_bar.show()
+        self.cancel_button.show()
+        self.statusBar().showMessage(f"{name}...")
+
+    def on_operation_finished(self, result):
+        commit, img = result
+        commit(img)
+        self.result_img = img
+        with span("show_result", "display"):
+            self.display_result_image()
+        self.show_cost()
+
+    def on_operation_failed(self, message):
+        # 出错后排队的操作都已被丢弃
+        self.close_batch()
+        # OpenCV 的错误信息很长，状态栏只显示第一行
+        self.statusBar().showMessage(f"操作失败: {message.splitlines()[0]}", 5000)
+
+    def on_runner_idle(self):
+        self.progress_bar.hide()
+        self.cancel_button.hide()
+        if self.statusBar().currentMessage().endswith("..."):
+            self.statusBar().clearMessage()
+
     def load_image(self):
         """
         加载并显示原始图像。
         """
-        # 弹出文件对话框，让用户选择图像
-        initial_dir = "materials"  # 可以指定初始目录
-        file_filter = "Image files (*.png *.jpg *.jpeg *.bmp)"  # 指定支持的文件类型
+        # 弹出文件对话框，让用户选择图像；已打开图像时从其所在目录开始
+        initial_dir = str(self.image_path.parent) if self.image_path else "materials"
+        patterns = " ".join(f"*{ext}" for ext in IMAGE_EXTENSIONS)
+        file_filter = f"Image files ({patterns})"  # 指定支持的文件类型
         selected_file, _ = QFileDialog.getOpenFileName(self, "选择图像", initial_dir, file_filter)
 
         # 如果用户选择了文件，则加载并显示图像
         if selected_file:
-            # 将路径转换为Path对象
-            self.image_path = Path(selected_file)
-            # 使用 OpenCV 读取图像，并保存为属性
-            self.origin_img = cv2.imread(str(self.image_path))
-            # 获取图像的维度信息
-            self.height, self.width, self.channels = self.origin_img.shape
-            # 当前处理完成的图像与原始图像相同
-            self.result_img = self.origin_img
-            # 显示原始图像
+            self.open_image(Path(selected_file))
+
+    def open_image(self, path):
+        """
+        打开图像：已缓存时立即显示，否则在后台解码，JPEG 先按 1/4 尺寸快速解码显示
+        """
+        # 丢弃针对上一张图像的后台操作
+        self.stop_stream()
+        self.cancel_operations()
+        self.image_path = path
+        if self.browser is None or self.browser.directory != path.parent:
+            self.browser = DirectoryBrowser(path)
+        else:
+            self.browser.index = self.browser.find(path)
+        # 浏览方向改变后之前排队的预取可能不再需要
+        self.loader.cancel_prefetch()
+
+        img = self.loader.request(path)
+        if img is not None:
+            self.set_origin(img)
+            self.cost_label.setText(f"{path.name}: 已缓存")
+            return
+
+        # 完整解码完成之前没有可处理的图像
+        self.origin_img = self.proxy_img = self.result_img = None
+        self.history = None
+        self.hist_source = self.hist_engine = None
+        flags = reduced_flags(path)
+        if flags is not None:
+            preview = read_image(path, flags)
+            if preview is not None:
+                self.origin_view.show(preview)
+                self.show_result(preview, infer_space(preview))
+        self.statusBar().showMessage(f"正在加载 {path.name}...")
+
+    def on_image_loaded(self, path, img):
+        """
+        后台解码完成：正是等待中的图像时显示，预取的图像已进入缓存
+        """
+        if path != self.image_path or self.origin_img is not None:
+            return
+        if img is None:
+            self.statusBar().showMessage(f"无法读取图像 {path.name}", 5000)
+            return
+        self.set_origin(img)
+        self.show_cost("decode")
+
+    def set_origin(self, img):
+        """
+        将解码好的图像设为原图，重新开始处理历史，并预取相邻的图像
+        """
+        # 原图同时是结果图和历史的基准，标记为共享，之后的处理都不会原地修改它
+        self.origin_img = freeze(img)
+        # 获取图像的维度信息
+        self.height, self.width, self.channels = self.origin_img.shape
+        # 预先生成快速预览用的代理图
+        with span("proxy", "process") as info:
+            self.proxy_img = make_proxy(self.origin_img, PROXY_MAX_SIDE)
+            info.update(image_info(self.proxy_img))
+        # 当前处理完成的图像与原始图像（或其代理图）相同
+        self.new_history()
+        self.result_img = self.working_source()
+        if self.region_selector is None:
+            from gui.regions import RegionSelector
+            self.region_selector = RegionSelector(self.origin_view)
+            self.region_selector.selected.connect(self.add_region)
+            self.region_selector.cleared.connect(self.clear_regions)
+        # 显示原始图像
+        with span("show_result", "display"):
+            self.display_origin_image()
+            self.display_result_image()
+        # 视频的第一帧没有对应的文件
+        if self.image_path is not None:
+            self.statusBar().showMessage(f"{self.browser.position()}  {self.image_path.name}", 3000)
+            self.loader.prefetch(self.browser.neighbours())
+
+    def next_image(self):
+        self.browse(1)
+
+    def previous_image(self):
+        self.browse(-1)
+
+    def browse(self, delta):
+        """
+        打开同一目录中的上一张或下一张图像
+        """
+        if self.browser is None:
+            return
+        path = self.browser.move(delta)
+        if path is not None:
+            self.open_image(path)
+
+    def toggle_stream(self):
+        """
+        打开视频文件或摄像头，每帧经过当前的处理步骤后实时显示；正在播放时停止
+        """
+        if self.stream is not None:
+            self.stop_stream()
+            return
+        kind, ok = QInputDialog.getItem(self, "打开视频", "来源", ["视频文件", "摄像头"], 0, False)
+        if not ok:
+            return
+        if kind == "摄像头":
+            source, ok = QInputDialog.getInt(self, "打开视频", "摄像头编号", 0, 0, 99)
+            if not ok:
+                return
+        else:
+            patterns = " ".join(f"*{ext}" for ext in VIDEO_EXTENSIONS)
+            source, _ = QFileDialog.getOpenFileName(self, "选择视频", "materials", f"Video files ({patterns})")
+            if not source:
+                return
+        output = None
+        if QMessageBox.question(self, "打开视频", "是否同时保存处理后的视频？") == QMessageBox.Yes:
+            output, _ = QFileDialog.getSaveFileName(self, "保存视频", "output.mp4", "Video files (*.mp4 *.avi)")
+            output = output or None
+
+        from core.stream import StreamStats, VideoStream
+        from gui.stream import StreamBridge
+        self.cancel_all()
+        if self.stream_bridge is None:
+            self.stream_bridge = StreamBridge(self)
+            # 视频流的新帧、错误与结束
+            self.stream_bridge.frame_ready.connect(self.on_stream_frame)
+            self.stream_bridge.failed.connect(self.on_operation_failed)
+            self.stream_bridge.ended.connect(self.stop_stream)
+        bridge = self.stream_bridge
+        bridge.reset()
+        try:
+            self.stream = VideoStream(source, output=output, on_frame=bridge.on_frame,
+                                      on_error=bridge.on_error, on_end=bridge.on_end)
+        except ValueError:
+            self.statusBar().showMessage(f"无法打开视频 {source}", 5000)
+            return
+        # 第一帧作为处理的起点图像，在其上执行的操作同时作用于后续的每一帧
+        self.image_path = None
+        self.origin_img = None
+        self.stream_stats = StreamStats()
+        self.ui.stream_button.setText("停止视频")
+        self.stream.start()
+
+    def on_stream_frame(self):
+        """
+        显示视频流的最新一帧，并更新帧率、延迟与丢帧数
+        """
+        item = self.stream_bridge.take()
+        if item is None or self.stream is None:
+            return
+        frame, result, captured = item
+        if self.origin_img is None:
+            self.set_origin(frame)
+        self.origin_view.show(frame)
+        self.show_result(result, track_space(self.stream.steps, infer_space(frame)))
+        self.stream_stats.add(captured)
+        dropped = self.stream.dropped() + self.stream_bridge.dropped
+        self.cost_label.setText(f"{self.stream_stats.fps():.1f} fps，延迟 {self.stream_stats.latency() * 1000:.0f} ms，"
+                                f"丢帧 {dropped}")
+
+    def stop_stream(self):
+        """
+        停止视频流，显示停止前用作起点的帧及其处理结果
+        """
+        if self.stream is None:
+            return
+        stream, self.stream = self.stream, None
+        stream.stop()
+        self.ui.stream_button.setText("打开视频")
+        self.statusBar().showMessage(f"视频已停止：处理 {stream.processed}/{stream.captured} 帧", 5000)
+        if self.origin_img is not None:
             self.display_origin_image()
+            self.display_result_image()
+
+    def closeEvent(self, event):
+        self.stop_stream()
+        super().closeEvent(event)
+
+    def add_region(self, x, y, w, h):
+        """
+        记录在原图上选择的区域，并在状态栏中显示其各通道的均值和标准差
+        """
+        if self.origin_img is None:
+            return
+        from core.measure import Region, region_stats
+        region = Region(f"R{len(self.regions) + 1}", x, y, w, h)
+        self.regions.append(region)
+        self.display_origin_image()
+        img, space, count = self.origin_img, self.measure_space, len(self.regions)
+
+        def measure(report):
+            # 第一次查询时建立积分图，之后同一幅图像上的每个区域都只需常数时间
+            with span("measure", "process", regions=count):
+                return img, region, region_stats(img, space).measure([region])[0]
+
+        self.region_measure.submit(measure)
+
+    def on_region_measured(self, result):
+        """
+        在状态栏中显示区域各通道的均值和标准差；测量期间换了图像或清除了区域时丢弃
+        """
+        img, region, row = result
+        if img is not self.origin_img or region not in self.regions:
+            return
+        channels = "  ".join(f"{key[5:]} {row[key]:.1f}±{row['std_' + key[5:]]:.1f}"
+                             for key in row if key.startswith("mean_"))
+        self.statusBar().showMessage(f"{region.name} ({region.x}, {region.y}, {region.w}×{region.h}): {channels}")
+
+    def clear_regions(self):
+        self.regions = []
+        self.statusBar().clearMessage()
+        if self.origin_img is not None:
+            self.display_origin_image()
+
+    def draw_regions(self, small, scale):
+        """
+        在缩小后的显示图像上原地画出测量区域及其名称，区域坐标按 scale 从原图换算
+        """
+        # 显示图像只有标签大小，线宽固定为 1 像素
+        color = 255 if small.ndim == 2 else (0, 0, 255)
+        for region in self.regions:
+            x0, y0 = round(region.x * scale), round(region.y * scale)
+            x1, y1 = round((region.x + region.w) * scale) - 1, round((region.y + region.h) * scale) - 1
+            cv2.rectangle(small, (x0, y0), (max(x0, x1), max(y0, y1)), color, 1)
+            cv2.putText(small, region.name, (x0, max(y0 - 2, 10)), cv2.FONT_HERSHEY_SIMPLEX, 0.4, color, 1)
+
+    def export_measurements(self):
+        """
+        用选择的区域测量当前图像所在目录中的所有图像，结果保存为 CSV
+        """
+        if self.browser is None:
+            print("No image to measure.")
+            return
+        if not self.regions:
+            self.statusBar().showMessage("请先在原图上拖动鼠标选择测量区域（右键清除）", 5000)
+            return
+        if self.runner.busy() or self.save_worker is not None:
+            self.statusBar().showMessage("请等待当前操作完成后再测量", 3000)
+            return
+        from core.measure import measure_images, write_measurements
+        spaces = list(SPACES)
+        space, ok = QInputDialog.getItem(self, "区域测量", "颜色空间", spaces, spaces.index(self.measure_space), False)
+        if not ok:
+            return
+        self.measure_space = space
+        output, _ = QFileDialog.getSaveFileName(self, "保存测量结果", "measurements.csv", "CSV files (*.csv)")
+        if not output:
+            return
+
+        files = list(self.browser.files)
+        regions = list(self.regions)
+
+        def measure_and_write(report):
+            rows, failed = measure_images(files, regions, space, median=True, report=report)
+            write_measurements(output, rows)
+            return failed
+
+        self.start_save_worker(Worker(measure_and_write), "区域测量",
+                               lambda failed: self.on_measure_finished(output, len(files), failed))
+
+    def on_measure_finished(self, output, count, failed):
+        self.save_worker = None
+        self.on_runner_idle()
+        for src, error in failed:
+            print(f"Failed to measure {src}: {error}")
+        self.statusBar().showMessage(f"已测量 {count - len(failed)}/{count} 幅图像，结果保存到 {output}", 5000)
 
     def save_image(self):
         """
         保存当前处理完成后的图像。
         """
-        # 获取当前显示的QPixmap
-        current_pixmap = self.ui.result_img.pixmap()
-
-        if current_pixmap.isNull():
+        if self.result_img is None:
             print("No image to save.")
             return
+        if self.runner.busy() or self.save_worker is not None:
+            self.statusBar().showMessage("请等待当前操作完成后再保存", 3000)
+            return
 
-        # 弹出保存文件对话框，让用户选择保存位置和文件名
+        # 弹出保存文件对话框，让用户选择保存位置、文件名和格式
         save_dialog = QFileDialog(self, "保存图像")
+        save_dialog.setAcceptMode(QFileDialog.AcceptSave)
         save_dialog.setDefaultSuffix("png")  # 默认文件扩展名
-        save_dialog.setNameFilter("PNG Files (*.png)")
+        filters = {f"{name} (" + " ".join(f"*{ext}" for ext in extensions) + ")": extensions[0][1:]
+                   for name, extensions in SAVE_FORMATS.items()}
+        save_dialog.setNameFilters(list(filters))
+        # 文件名没有扩展名时使用所选格式的扩展名
+        save_dialog.filterSelected.connect(lambda selected: save_dialog.setDefaultSuffix(filters[selected]))
         if save_dialog.exec() != QFileDialog.Accepted:
             return
 
         save_path = save_dialog.selectedFiles()[0]
+        params = self.ask_encode_params(save_format(Path(save_path).suffix))
+        if params is None:
+            return
+
+        # 在后台线程中按原分辨率计算结果并编码保存
+        def render_and_save(report):
+            with span("render", "operation"):
+                img = self.render_full_resolution(report)
+            return write_image(save_path, img, params)
+
+        self.start_save_worker(Worker(render_and_save), "保存图像",
+                               lambda ok: self.on_save_finished(save_path, ok))
 
-        # 将QPixmap保存为图像文件
-        if not current_pixmap.save(save_path, "PNG"):
+    def ask_encode_params(self, name):
+        """
+        询问保存格式的质量（TIFF 为压缩方式），返回编码参数，取消时返回 None；
+        所选的值作为该格式下次保存的默认值
+        """
+        if name == "TIFF":
+            choices = list(TIFF_COMPRESSIONS)
+            current = choices.index(self.encode_settings.get(name, choices[0]))
+            compression, ok = QInputDialog.getItem(self, "TIFF", "压缩方式", choices, current, False)
+            if not ok:
+                return None
+            self.encode_settings[name] = compression
+            return encode_params(name, compression=compression)
+        if name not in QUALITY_SETTINGS:
+            return []
+        _, label, minimum, maximum, default = QUALITY_SETTINGS[name]
+        quality, ok = QInputDialog.getInt(self, name, label, self.encode_settings.get(name, default), minimum, maximum)
+        if not ok:
+            return None
+        self.encode_settings[name] = quality
+        return encode_params(name, quality)
+
+    def start_save_worker(self, worker, name, on_finished):
+        """
+        在后台执行保存或导出任务，进度显示在状态栏中，可以用取消按钮取消
+        """
+        self.save_worker = worker
+        worker.signals.progress.connect(self.progress_bar.setValue)
+        worker.signals.finished.connect(on_finished)
+        worker.signals.error.connect(self.on_save_failed)
+        worker.signals.cancelled.connect(self.on_save_cancelled)
+        self.on_operation_started(name)
+        self.runner.pool.start(worker)
+
+    def on_save_finished(self, save_path, ok):
+        self.save_worker = None
+        self.on_runner_idle()
+        if ok:
+            self.statusBar().showMessage(f"已保存到 {save_path}", 3000)
+            self.show_cost("encode")
+        else:
             print(f"Failed to save image to {save_path}")
 
+    def on_save_failed(self, message):
+        self.save_worker = None
+        self.on_runner_idle()
+        self.statusBar().showMessage(f"保存失败: {message.splitlines()[0]}", 5000)
+
+    def on_save_cancelled(self):
+        self.save_worker = None
+        self.on_runner_idle()
+        self.statusBar().showMessage("已取消", 3000)
+
+    def export_directory(self):
+        """
+        将当前的处理步骤按原分辨率应用到当前图像所在目录中的所有图像，多线程并行处理、编码并导出
+        """
+        if self.browser is None or self.history is None:
+            print("No image to export.")
+            return
+        if self.runner.busy() or self.save_worker is not None:
+            self.statusBar().showMessage("请等待当前操作完成后再导出", 3000)
+            return
+
+        output_dir = QFileDialog.getExistingDirectory(self, "选择导出目录", str(self.browser.directory))
+        if not output_dir:
+            return
+        # 导出到图像所在目录会覆盖同名的原图
+        if Path(output_dir).resolve() == self.browser.directory.resolve():
+            self.statusBar().showMessage("导出目录不能是图像所在的目录", 3000)
+            return
+        formats = list(SAVE_FORMATS)
+        name, ok = QInputDialog.getItem(self, "批量导出", "格式", formats, formats.index(self.export_format), False)
+        if not ok:
+            return
+        params = self.ask_encode_params(name)
+        if params is None:
+            return
+        self.export_format = name
+
+        files = list(self.browser.files)
+        from core.export import export_images
+        worker = Worker(export_images, files, output_dir, self.history.active_steps(), SAVE_FORMATS[name][0], params)
+        self.start_save_worker(worker, "批量导出", lambda failed: self.on_export_finished(output_dir, len(files), failed))
+
+    def on_export_finished(self, output_dir, count, failed):
+        self.save_worker = None
+        self.on_runner_idle()
+        for src, error in failed:
+            print(f"Failed to export {src}: {error}")
+        self.statusBar().showMessage(f"已导出 {count - len(failed)}/{count} 幅图像到 {output_dir}", 5000)
+
     def reset_image(self):
         """
         重置图像，恢复到原始状态。
         """
-        self.result_img = self.origin_img
+        self.cancel_operations()
+        if self.origin_img is None:
+            return
+        self.new_history()
+        self.result_img = self.working_source()
         self.display_result_image()
 
     def display_origin_image(self):
@@ -129,24 +987,8 @@ class MainWindow(QMainWindow):
         显示原始图像
         """
         if self.origin_img is not None:
-            # 将图像从 BGR 转换为 RGB 格式以适应 Qt
-            img_rgb = cv2.cvtColor(self.origin_img, cv2.COLOR_BGR2RGB)
-
-            # 创建 QImage 并使用图像数据初始化
-            qimg = QImage(img_rgb.data, img_rgb.shape[1], img_rgb.shape[0], QImage.Format_RGB888)
-
-            # 从 QImage 创建原始 QPixmap
-            original_pixmap = QPixmap.fromImage(qimg)
-
-            # 获取 QLabel 的尺寸
-            label_width = self.ui.origin_img.width()
-            label_height = self.ui.origin_img.height()
-
-            # 将 QPixmap 缩放到 QLabel 大小，保持原图长宽比
-            scaled_pixmap = original_pixmap.scaled(label_width, label_height)
-
-            # 将缩放后的 QPixmap 设置为 QLabel 的内容
-            self.ui.origin_img.setPixmap(scaled_pixmap)
+            # 缩放、格式转换与缓存均由 ImageView 负责
+            self.origin_view.show(self.origin_img, overlay=self.draw_regions if self.regions else None)
         else:
             # 如果图像加载失败，打印错误信息
             print(f"Failed to display origin image!")
@@ -156,187 +998,129 @@ class MainWindow(QMainWindow):
         显示处理后的图像
         """
         if self.result_img is not None:
-
-            # 将图像从 BGR 转换为 RGB 格式以适应 Qt
-            img_rgb = cv2.cvtColor(self.result_img, cv2.COLOR_BGR2RGB)
-
-            # 创建 QImage 并使用图像数据初始化
-            qimg = QImage(img_rgb.data, img_rgb.shape[1], img_rgb.shape[0], QImage.Format_RGB888)
-
-            # 从 QImage 创建原始 QPixmap
-            original_pixmap = QPixmap.fromImage(qimg)
-
-            # 获取 QLabel 的尺寸
-            label_width = self.ui.result_img.width()
-            label_height = self.ui.result_img.height()
-
-            # 将 QPixmap 缩放到 QLabel 大小，保持原图长宽比
-            scaled_pixmap = original_pixmap.scaled(label_width, label_height)
-
-            # 将缩放后的 QPixmap 设置为 QLabel 的内容
-            self.ui.result_img.setPixmap(scaled_pixmap)
+            self.show_result(self.result_img, self.result_space())
+            # 处理步骤可能已改变（新操作、撤销、重置、调整参数），视频后续的帧按新步骤处理
+            if self.stream is not None:
+                self.stream.set_steps(self.history.active_steps())
         else:
             # 如果图像加载失败，打印错误信息
             print(f"Failed to display result image!")
 
+    def result_space(self):
+        """
+        当前结果图像所处的颜色空间，由基准图像与已执行的步骤推出
+        """
+        if self.history is None:
+            return infer_space(self.result_img)
+        return self.history.space()
+
+    def show_result(self, img, space):
+        """
+        按颜色空间显示结果图像，并在标题中标出颜色空间和数据类型
+        """
+        self.result_view.show(img, space)
+        self.ui.label_2.setText(f"处理后图像 ({SPACE_LABELS.get(space, space)}, {img.dtype})")
+
     def change_color_space(self):
         """
         图像颜色空间转换
         """
-        if (self.ui.color_space_Box.currentText() == "GRAY"):
-            try:
-                self.result_img = cv2.cvtColor(self.result_img, cv2.COLOR_BGR2GRAY)
-            except:
-                pass
-        elif (self.ui.color_space_Box.currentText() == "HSV"):
-            try:
-                self.result_img = cv2.cvtColor(self.result_img, cv2.COLOR_BGR2HSV)
-            except:
-                pass
-        elif (self.ui.color_space_Box.currentText() == "YCrCb"):
-            try:
-                self.result_img = cv2.cvtColor(self.result_img, cv2.COLOR_BGR2YCrCb)
-            except:
-                pass
-        else :
-            pass
-
-        self.display_result_image()
+        mode = COLOR_SPACE_MODES.get(self.ui.color_space_Box.currentText())
+        if mode is not None:
+            self.run_operation("颜色空间转换", "color_space", mode)
 
     def geometric_transform(self):
         """
         图像几何变换
         """
-        if (self.ui.geometric_Box.currentText() == "水平翻转"):
-                self.result_img = cv2.flip(self.result_img, 1)
-        
-        elif (self.ui.geometric_Box.currentText() == "竖直翻转"):
-                self.result_img = cv2.flip(self.result_img, 0)
-        
-        elif (self.ui.geometric_Box.currentText() == "顺时针旋转"):
-                self.result_img = cv2.rotate(self.result_img, cv2.ROTATE_90_CLOCKWISE)
-
-        elif (self.ui.geometric_Box.currentText() == "逆时针旋转"):
-                self.result_img = cv2.rotate(self.result_img, cv2.ROTATE_90_COUNTERCLOCKWISE)
-
-        else :
-            pass
-        self.display_result_image()
+        mode = GEOMETRIC_MODES.get(self.ui.geometric_Box.currentText())
+        if mode is not None:
+            self.run_operation("几何变换", "geometric", mode)
 
     def add_noise(self):
         """
         图像加噪
         """
-        # 先复制一份原始图像
-        temp_img = self.result_img.copy()
-
-        if (self.ui.noise_Box.currentText() == "高斯噪声"):
-            mean = 0  # 噪声均值
-            variance = 500  # 噪声方差，调整以控制噪声强度
-
-            noise = np.random.normal(mean, variance ** 0.5, temp_img.shape)
-            noisy_img = np.clip(temp_img + noise, 0, 255).astype(np.uint8)
-
-            self.result_img = noisy_img
-
-        elif (self.ui.noise_Box.currentText() == "椒盐噪声"):
-
-            probability = 0.01  # 调整椒盐噪声出现的概率以减弱噪声效果
-
-            # 对于灰度图像
-            if len(temp_img.shape) == 2:
-                mask = np.random.randint(0, 2, size=temp_img.shape, dtype=np.uint8) * probability
-                temp_img[mask == 1] = 0  # 将随机位置的像素设为黑色（椒）
-                temp_img[mask == 0] = 255  # 将随机位置的像素设为白色（盐）
-
-            # 对于彩色图像
-            elif len(temp_img.shape) == 3:
-                for channel in range(temp_img.shape[2]):
-                    mask = np.random.randint(0, 2, size=temp_img.shape[:2], dtype=np.uint8) * probability
-                    temp_img[:, :, channel][mask == 1] = 0  # 将随机位置的像素设为黑色（椒）
-                    temp_img[:, :, channel][mask == 0] = 255  # 将随机位置的像素设为白色（盐）
-
-            self.result_img = temp_img  # 更新处理后的图像
-
-        else :
-            pass
-
-        self.display_result_image()
+        mode = NOISE_MODES.get(self.ui.noise_Box.currentText())
+        if mode is not None:
+            self.run_operation("添加噪声", "noise", mode)
 
     def image_blur(self):
         """
         图像模糊
         """
-        if (self.ui.blur_Box.currentText() == "均值滤波"):
-            self.result_img = cv2.blur(self.result_img, (3, 3))
-        
-        elif (self.ui.blur_Box.currentText() == "中值滤波"):
-            self.result_img = cv2.medianBlur(self.result_img, 3)
-        
-        elif (self.ui.blur_Box.currentText() == "高斯滤波"):
-            self.result_img = cv2.GaussianBlur(self.result_img, (5, 5), 0.6)
-
-        elif (self.ui.blur_Box.currentText() == "二维卷积"):
-            kernel = np.ones((3, 3)) / 9
-            self.result_img = cv2.filter2D(self.result_img, -1, kernel, borderType=cv2.BORDER_CONSTANT)
-
-        else :
-            pass
-
-        self.display_result_image()
+        mode = BLUR_MODES.get(self.ui.blur_Box.currentText())
+        if mode is not None:
+            self.run_operation("滤波处理", "blur", mode)
 
     def edge_detect(self):
         """
         图像边缘检测
         """
-        if (self.ui.edge_Box.currentText() == "Laplacian"):
-            # 使用Laplacian算子进行边缘检测
-            laplacian_img = cv2.Laplacian(self.result_img, cv2.CV_64F)
-            laplacian_img = np.uint8(np.absolute(laplacian_img) * 255 / np.max(laplacian_img))
-            self.result_img = laplacian_img
-
-        elif (self.ui.edge_Box.currentText() == "Sobel"):
-            # 使用Sobel算子进行边缘检测
-            sobel_x = cv2.Sobel(self.result_img, cv2.CV_64F, 1, 0, ksize=3)
-            sobel_y = cv2.Sobel(self.result_img, cv2.CV_64F, 0, 1, ksize=3)
-            sobel_img = np.sqrt(sobel_x ** 2 + sobel_y ** 2)
-            sobel_img = np.uint8(sobel_img * 255 / np.max(sobel_img))
-            self.result_img = sobel_img
-
-        elif (self.ui.edge_Box.currentText() == "Canny"):
-            # 使用Canny算子进行边缘检测
-            blurred_img = cv2.GaussianBlur(self.result_img, (5, 5), 0.6)
-            canny_img = cv2.Canny(blurred_img, 50, 150)
-            self.result_img = canny_img
+        mode = EDGE_MODES.get(self.ui.edge_Box.currentText())
+        if mode is not None:
+            self.run_operation("边缘检测", "edge", mode)
 
-        else:
-            pass
+    def point_operation(self):
+        """
+        点运算（亮度、对比度、伽马等），连续的点运算合并为一次查表
+        """
+        mode = POINT_MODES.get(self.ui.point_Box.currentText())
+        if mode is not None:
+            self.run_operation("点运算", "point", mode)
 
-        self.display_result_image()
+    def result_histogram(self):
+        """
+        当前结果图像的直方图：与上次统计的图像尺寸相同时只统计两者不同的外接矩形，
+        改变的区域超过一半时重新统计整幅图像
+        """
+        from core import histogram
+        img, engine = self.result_img, self.hist_engine
+        roi = None
+        if engine is not None and engine.matches(img) and self.hist_source is not img:
+            roi = histogram.changed_roi(self.hist_source, img)
+            if roi is not None and 2 * roi[2] * roi[3] > img.shape[0] * img.shape[1]:
+                engine = None
+        if engine is None or not engine.matches(img):
+            engine = histogram.HistogramEngine(img)
+        elif roi is not None:
+            engine.update(roi, histogram.crop(self.hist_source, roi), histogram.crop(img, roi))
+        self.hist_source, self.hist_engine = img, engine
+        return engine
 
     def darw_hist(self):
         """
-        绘制图像直方图
+        绘制图像各通道的直方图
         """
-        # 获取图像数据
-        img = self.result_img.copy()
-
-        # 检查图像是否为灰度图像
-        if len(img.shape) == 3 and img.shape[2] == 3:  # 彩色图像
-            img = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY)  # 转为灰度图像
+        if self.result_img is None:
+            return
 
-        # 计算直方图
-        hist, bins = np.histogram(img.flatten(), 256, [0, 256])
+        # 一次统计出每个通道的直方图，直接按计数绘制，不再交给 matplotlib 重新分箱
+        with span("直方图", "operation", **image_info(self.result_img)):
+            engine = self.result_histogram()
+            # 直方图之后还会增量更新，已绘制的图形保留自己的一份
+            hist = engine.hist.copy()
+            # 每个通道的 1%、50%、99% 分位数，标在图例中
+            quantiles = engine.percentiles([1, 50, 99])
+        self.show_cost()
+        edges = np.arange(hist.shape[1] + 1)
+        # 通道名称按颜色空间给出，BGR 以外的空间使用默认颜色
+        names = channel_names(self.result_img, self.result_space())
+        colors = {"Gray": "gray", "B": "blue", "G": "green", "R": "red", "A": "black"}
+        series = [(name, colors.get(name, f"C{c}")) for c, name in enumerate(names)]
 
         # 绘制直方图
+        plt = pyplot()
         plt.figure(figsize=(10, 6))
-        plt.hist(img.flatten(), bins=bins, color='gray')
+        for counts, (name, color), (low, median, high) in zip(hist, series, quantiles):
+            plt.stairs(counts, edges, color=color, label=f"{name}: median {median}, 1-99% {low}-{high}",
+                       fill=hist.shape[0] == 1)
         plt.title('Image Histogram')
         plt.xlabel('Pixel Intensity')
         plt.ylabel('Frequency')
-        plt.xlim([0, 256])
-        plt.xticks(np.arange(0, 257, 32))
-        plt.yticks(np.arange(0, hist.max() + 1, hist.max() // 10))
+        plt.xlim([0, hist.shape[1]])
+        plt.xticks(np.linspace(0, hist.shape[1], 9))
+        plt.legend()
 
         # 显示图形
         plt.show()
@@ -344,56 +1128,34 @@ class MainWindow(QMainWindow):
 
     def fast_fft(self):
         """
-        使用OpenCV对给定的图像进行傅里叶变换（快速傅里叶变换），并使用matplotlib显示频谱图像。
-        可选地，可以指定裁剪大小来放大显示幅度谱的中间部分。
-
-        参数:
-            image (numpy.ndarray): 输入图像，应为二维灰度图像或三维彩色图像（BGR顺序）
-            crop_size (tuple, optional): 裁剪区域的大小，格式为 (height, width)，默认为 None（不裁剪）
+        显示当前图像各通道的对数幅度谱（零频位于中心）。
+        频谱按图像缓存，对同一结果重复点击时不再重新计算。
         """
+        if self.result_img is None:
+            return
 
-        # 确保图像为浮点类型，便于进行数学运算
-        image_float = self.result_img.astype(np.float32)
-
-        crop_size = (16, 16)
-
-        # 将图像扩展为偶数尺寸，以避免边缘效应
-        height, width = image_float.shape[:2]
-        pad_height = (height % 2) * (height // 2)
-        pad_width = (width % 2) * (width // 2)
-        padded_image = np.pad(image_float, ((0, pad_height), (0, pad_width)), mode='constant')
-
-        # 进行离散傅里叶变换（DFT），得到复数形式的频谱
-        dft_img = cv2.dft(padded_image, flags=cv2.DFT_COMPLEX_OUTPUT)
-
-        # 提取实部和虚部，以便分别显示
-        real_part = np.abs(dft_img[:, :, 0])
-        imaginary_part = np.abs(dft_img[:, :, 1])
-
-        # 仅显示幅度谱（通常更常用）
-        amplitude_spectrum = np.sqrt(real_part ** 2 + imaginary_part ** 2)
-        amplitude_spectrum_shifted = np.fft.fftshift(amplitude_spectrum)
-
-        if crop_size is not None:
-            crop_height, crop_width = crop_size
-            crop_center = (amplitude_spectrum_shifted.shape[0] // 2, amplitude_spectrum_shifted.shape[1] // 2)  # 中心点坐标
-
-            x_min, x_max = crop_center[1] - crop_width // 2, crop_center[1] + crop_width // 2
-            y_min, y_max = crop_center[0] - crop_height // 2, crop_center[0] + crop_height // 2
-
-            cropped_spectrum = amplitude_spectrum_shifted[y_min:y_max, x_min:x_max]
-
-            plt.imshow(cropped_spectrum, cmap='viridis', vmin=0, vmax=np.max(amplitude_spectrum_shifted),
-                    extent=(x_min, x_max, y_min, y_max))  # 保持原始坐标范围
-        else:
-            plt.imshow(amplitude_spectrum_shifted, cmap='viridis', vmin=0, vmax=np.max(amplitude_spectrum_shifted))
-
-        plt.title('Amplitude Spectrum')
-        plt.colorbar()
+        from core import spectrum
+        with span("傅里叶变换", "operation", **image_info(self.result_img)) as info:
+            result = spectrum.spectrum(self.result_img)
+            centered = result.centered(result.log_magnitude())
+            info["output_bytes"] = int(centered.nbytes)
+        self.show_cost()
+        names = channel_names(self.result_img, self.result_space())
+
+        plt = pyplot()
+        plt.figure(figsize=(5 * len(names), 5))
+        for c, name in enumerate(names):
+            plt.subplot(1, len(names), c + 1)
+            plt.imshow(centered[:, :, c], cmap='viridis')
+            plt.title(f'Log Amplitude Spectrum ({name})')
+            plt.colorbar(fraction=0.046, pad=0.04)
+        plt.tight_layout()
         plt.show()
 
 
 if __name__ == "__main__":
+    imported = time.perf_counter()
+    args = parse_arguments()
     # 创建 QApplication 实例
     app = QApplication(sys.argv)
 
@@ -402,7 +1164,13 @@ if __name__ == "__main__":
 
     # 创建主窗口并显示
     main_window = MainWindow()
+    budget.set_limit(args.memory_budget * 1024 * 1024)
     main_window.show()
 
+    # 启动耗时测量模式：窗口第一次绘制后（事件循环处理完显示事件）打印各阶段耗时并退出
+    if args.startup_time:
+        window = time.perf_counter()
+        QTimer.singleShot(0, lambda: (report_startup(imported, window), app.quit()))
+
     # 运行应用程序
     sys.exit(app.exec())
\ No newline at end of file
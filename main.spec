@@ -1,4 +1,7 @@
 # -*- mode: python ; coding: utf-8 -*-
+# 目录模式打包：pyinstaller main.spec，生成 dist/main/main(.exe)
+# 单文件模式每次启动都要把全部依赖解压到临时目录，目录模式直接从安装目录加载，启动明显更快；
+# 不使用 UPX 压缩，避免每次加载动态库时解压。
 
 
 a = Analysis(
@@ -10,25 +13,23 @@ a = Analysis(
     hookspath=[],
     hooksconfig={},
     runtime_hooks=[],
-    excludes=[],
+    # 未使用的 GUI 工具包与 matplotlib 后端
+    excludes=['tkinter', 'PyQt5', 'PyQt6', 'PySide2', 'IPython', 'matplotlib.backends.backend_tkagg'],
     noarchive=False,
-    optimize=0,
+    optimize=1,
 )
 pyz = PYZ(a.pure)
 
 exe = EXE(
     pyz,
     a.scripts,
-    a.binaries,
-    a.datas,
     [],
+    exclude_binaries=True,
     name='main',
     debug=False,
     bootloader_ignore_signals=False,
     strip=False,
-    upx=True,
-    upx_exclude=[],
-    runtime_tmpdir=None,
+    upx=False,
     console=False,
     disable_windowed_traceback=False,
     argv_emulation=False,
@@ -37,3 +38,13 @@ exe = EXE(
     entitlements_file=None,
     icon=['icons\\toolkit.png'],
 )
+
+coll = COLLECT(
+    exe,
+    a.binaries,
+    a.datas,
+    strip=False,
+    upx=False,
+    upx_exclude=[],
+    name='main',
+)
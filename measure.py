@@ -0,0 +1,66 @@
+# python measure.py materials -r regions.csv -o measurements.csv
+# python measure.py materials --grid 20,30,1,8,0,55,40,40 --space lab --median -o measurements.csv
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+from core.color import SPACES
+from core.io import list_images
+from core.measure import grid_regions, measure_images, read_regions, write_measurements
+
+
+def parse_grid(text):
+    """
+    解析网格描述 "x,y,列数,行数,列间距,行间距,宽,高"
+    """
+    values = [float(v) for v in text.split(",")]
+    if len(values) != 8:
+        raise ValueError(f"Grid must look like x,y,columns,rows,pitch_x,pitch_y,w,h, got {text!r}")
+    x, y, columns, rows, pitch_x, pitch_y, w, h = values
+    return grid_regions(x, y, int(columns), int(rows), pitch_x, pitch_y, int(w), int(h))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="用同一组矩形区域测量目录（或单个文件）中所有图像的颜色")
+    parser.add_argument("input", help="图像目录或图像文件")
+    parser.add_argument("-r", "--regions", default=None, help="区域 CSV 文件，需要 name,x,y,w,h 列")
+    parser.add_argument("--grid", default=None,
+                        help='按网格生成区域（例如孔板）："x,y,列数,行数,列间距,行间距,宽,高"，名称为 A1, A2, ...')
+    parser.add_argument("-s", "--space", default="bgr", choices=list(SPACES), help="测量的颜色空间")
+    parser.add_argument("--median", action="store_true", help="同时计算中位数（耗时与区域面积成正比）")
+    parser.add_argument("-o", "--output", default="measurements.csv", help="输出 CSV 文件")
+    parser.add_argument("-j", "--jobs", type=int, default=None, help="并行线程数")
+    args = parser.parse_args(argv)
+
+    if (args.regions is None) == (args.grid is None):
+        parser.error("specify exactly one of --regions and --grid")
+    try:
+        regions = read_regions(args.regions) if args.regions else parse_grid(args.grid)
+    except (OSError, ValueError) as e:
+        parser.error(str(e))
+    if not regions:
+        parser.error("no regions to measure")
+
+    source = Path(args.input)
+    files = list_images(source) if source.is_dir() else [source]
+    if not files:
+        print(f"No images found in {source}")
+        return 1
+
+    start = time.perf_counter()
+    rows, failed = measure_images(files, regions, args.space, args.median, args.jobs)
+    elapsed = time.perf_counter() - start
+    for path, error in failed:
+        print(f"[FAIL] {Path(path).name}: {error}")
+    write_measurements(args.output, rows)
+
+    print(f"Regions    : {len(regions)}")
+    print(f"Measured   : {len(files) - len(failed)}/{len(files)} images in {elapsed:.2f} s")
+    print(f"Output     : {args.output} ({len(rows)} rows)")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
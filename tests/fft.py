@@ -2,9 +2,13 @@ import cv2
 import numpy as np
 import matplotlib.pyplot as plt
 
+# 在项目根目录下以 python -m tests.fft 运行
+from core.spectrum import spectrum
+
+
 def perform_fft_and_display(image, crop_size=None):
     """
-    使用OpenCV对给定的图像进行傅里叶变换（快速傅里叶变换），并使用matplotlib显示频谱图像。
+    对给定的图像进行快速傅里叶变换，并使用matplotlib显示零频居中的对数幅度谱。
     可选地，可以指定裁剪大小来放大显示幅度谱的中间部分。
 
     参数:
@@ -12,25 +16,9 @@ def perform_fft_and_display(image, crop_size=None):
         crop_size (tuple, optional): 裁剪区域的大小，格式为 (height, width)，默认为 None（不裁剪）
     """
 
-    # 确保图像为浮点类型，便于进行数学运算
-    image_float = image.astype(np.float32)
-
-    # 将图像扩展为偶数尺寸，以避免边缘效应
-    height, width = image_float.shape[:2]
-    pad_height = (height % 2) * (height // 2)
-    pad_width = (width % 2) * (width // 2)
-    padded_image = np.pad(image_float, ((0, pad_height), (0, pad_width)), mode='constant')
-
-    # 进行离散傅里叶变换（DFT），得到复数形式的频谱
-    dft_img = cv2.dft(padded_image, flags=cv2.DFT_COMPLEX_OUTPUT)
-
-    # 提取实部和虚部，以便分别显示
-    real_part = np.abs(dft_img[:, :, 0])
-    imaginary_part = np.abs(dft_img[:, :, 1])
-
-    # 仅显示幅度谱（通常更常用）
-    amplitude_spectrum = np.sqrt(real_part ** 2 + imaginary_part ** 2)
-    amplitude_spectrum_shifted = np.fft.fftshift(amplitude_spectrum)
+    # 图像补零到最优 DFT 尺寸后，对每个通道做实数到复数的变换
+    result = spectrum(image)
+    amplitude_spectrum_shifted = result.centered(result.log_magnitude())[:, :, 0]
 
     if crop_size is not None:
         crop_height, crop_width = crop_size
@@ -46,12 +34,12 @@ def perform_fft_and_display(image, crop_size=None):
     else:
         plt.imshow(amplitude_spectrum_shifted, cmap='viridis', vmin=0, vmax=np.max(amplitude_spectrum_shifted))
 
-    plt.title('Amplitude Spectrum')
+    plt.title('Log Amplitude Spectrum')
     plt.colorbar()
     plt.show()
 
-    # 返回傅里叶变换后的频谱图像
-    return dft_img
+    # 返回频谱对象，其中的幅度、相位可直接复用
+    return result
 
 
 # 示例：加载一幅图像并进行傅里叶变换及显示，同时放大显示幅度谱的中间部分
@@ -0,0 +1,34 @@
+"""
+批处理（batch.py）的错误处理
+
+在项目根目录下以 python -m pytest tests 运行
+"""
+from pathlib import Path
+
+import pytest
+
+from batch import main, process_file
+from core.io import check_suffix
+from core.pipeline import parse_pipeline
+
+MATERIALS = Path(__file__).resolve().parent.parent / "materials"
+
+
+def test_check_suffix():
+    for suffix in (".png", ".JPG", ".bmp", ".tiff", ".webp"):
+        check_suffix(suffix)
+    with pytest.raises(ValueError):
+        check_suffix(".xyz")
+
+
+def test_unsupported_suffix_is_rejected_before_processing(tmp_path):
+    with pytest.raises(SystemExit) as exit_info:
+        main([str(MATERIALS), str(tmp_path / "out"), "-p", "blur:gaussian", "--suffix", ".xyz"])
+    assert exit_info.value.code == 2
+    assert not (tmp_path / "out").exists()
+
+
+def test_write_failure_is_reported_per_file(tmp_path):
+    src = MATERIALS / "t1.png"
+    _, _, pixels, error = process_file(src, tmp_path / "missing" / "t1.png", parse_pipeline("blur:gaussian"))
+    assert pixels == 0 and error
@@ -0,0 +1,22 @@
+"""
+批量导出（core.export）的错误处理
+
+在项目根目录下以 python -m pytest tests 运行
+"""
+from pathlib import Path
+
+from core.export import export_images, export_targets
+from core.pipeline import parse_pipeline
+
+MATERIALS = Path(__file__).resolve().parent.parent / "materials"
+
+
+def test_unwritable_destination_does_not_abort_export(tmp_path):
+    files = [MATERIALS / "t0.png", MATERIALS / "t1.png", MATERIALS / "pic1.png"]
+    targets = export_targets(files, tmp_path, ".png")
+    # 与目标文件同名的目录使写出失败
+    targets[1].mkdir()
+    failed = export_images(files, tmp_path, parse_pipeline("blur:gaussian"), ".png", jobs=2)
+    assert [src for src, _ in failed] == [files[1]]
+    assert failed[0][1]
+    assert targets[0].is_file() and targets[2].is_file()
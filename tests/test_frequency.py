@@ -0,0 +1,41 @@
+"""
+频域滤波（core.frequency）与频谱缓存的复用
+
+在项目根目录下以 python -m pytest tests 运行
+"""
+from pathlib import Path
+
+import cv2
+import numpy as np
+
+from core import spectrum
+from core.frequency import fft_convolve, frequency_filter
+
+MATERIALS = Path(__file__).resolve().parent.parent / "materials"
+
+
+def test_repeated_filtering_transforms_once(monkeypatch):
+    img = cv2.imread(str(MATERIALS / "t1.png"))
+    spectrum.clear_cache()
+    created = []
+    original = spectrum.Spectrum.planes
+
+    def planes(self):
+        created.append(self)
+        return original(self)
+
+    monkeypatch.setattr(spectrum.Spectrum, "planes", planes)
+    frequency_filter(img, "lowpass", "gaussian", 0.1)
+    # 截止频率不同但外推宽度相同：复用同一份频谱
+    frequency_filter(img, "lowpass", "gaussian", 0.11)
+    frequency_filter(img, "highpass", "gaussian", 0.1)
+    assert len(created) == 3 and len({id(s) for s in created}) == 1
+    assert len(created[0]._cache["planes"]) == 3
+
+
+def test_fft_convolve_matches_filter2d():
+    img = np.random.default_rng(0).integers(0, 256, (47, 61, 3), dtype=np.uint8)
+    kernel = np.random.default_rng(1).random((9, 7)).astype(np.float32)
+    kernel /= kernel.sum()
+    expected = cv2.filter2D(img, -1, kernel)
+    np.testing.assert_allclose(fft_convolve(img, kernel), expected, atol=1)
@@ -0,0 +1,75 @@
+"""
+优化执行（core.graph）与逐步执行 apply_operation 的一致性
+
+在项目根目录下以 python -m pytest tests 运行
+"""
+import numpy as np
+import pytest
+
+from core.color import space_after
+from core.graph import execute
+from core.operations import apply_operation
+from core.pipeline import Step, parse_pipeline
+
+
+def stepwise(img, steps, space="bgr"):
+    """
+    不经优化、逐个步骤执行，颜色空间转换按之前的步骤给出源空间
+    """
+    for step in steps:
+        params = dict(step.params or {})
+        if step.op == "color_space":
+            params["source"] = space
+        img = apply_operation(img, step.op, step.mode, params)
+        space = space_after(step, space)
+    return img
+
+
+@pytest.fixture(scope="module")
+def image():
+    rng = np.random.default_rng(0)
+    return rng.integers(0, 256, (64, 80, 3), dtype=np.uint8)
+
+
+@pytest.mark.parametrize("pipeline", [
+    "color_space:gray,color_space:bgr",
+    "color_space:gray,color_space:hsv",
+    "color_space:gray,color_space:gray",
+    "color_space:gray,color_space:ycrcb,color_space:bgr",
+    "color_space:hsv,geometric:hflip,color_space:gray",
+    "color_space:ycrcb,edge:canny,color_space:hsv",
+    "geometric:hflip,geometric:rotate_cw,point:brightness,point:gamma",
+    "point:invert,noise:gaussian:seed=1,point:contrast,noise:salt_pepper:seed=2",
+    "blur:percentile,blur:min,edge:canny",
+])
+def test_execute_matches_stepwise(image, pipeline):
+    steps = parse_pipeline(pipeline)
+    np.testing.assert_array_equal(execute(image, steps), stepwise(image, steps))
+
+
+@pytest.mark.parametrize("pipeline", [
+    "color_space:hsv,color_space:gray,color_space:ycrcb",
+    "color_space:ycrcb,color_space:gray",
+    "color_space:hsv,color_space:ycrcb,color_space:gray,color_space:bgr",
+])
+def test_merged_conversions_skip_intermediate_rounding(image, pipeline):
+    # 合并的转换不在中间空间取整，与逐步执行只差取整误差
+    steps = parse_pipeline(pipeline)
+    np.testing.assert_allclose(execute(image, steps), stepwise(image, steps), atol=5)
+
+
+def test_lossless_round_trip_is_skipped(image):
+    # BGR -> YCrCb -> BGR 合并为不做任何转换
+    assert execute(image, [Step("color_space", "ycrcb"), Step("color_space", "bgr")]) is image
+
+
+def test_gray_round_trip_is_gray(image):
+    result = execute(image, parse_pipeline("color_space:gray,color_space:bgr"))
+    assert result is not image
+    assert (result[:, :, 0] == result[:, :, 1]).all() and (result[:, :, 1] == result[:, :, 2]).all()
+
+
+def test_execute_does_not_modify_input(image):
+    original = image.copy()
+    execute(image, parse_pipeline("point:invert,noise:gaussian:seed=3,point:gamma"))
+    np.testing.assert_array_equal(image, original)
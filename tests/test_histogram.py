@@ -0,0 +1,65 @@
+"""
+直方图（core.histogram）与 numpy 统计的一致性
+
+在项目根目录下以 python -m pytest tests 运行
+"""
+import numpy as np
+import pytest
+
+from core import histogram
+
+
+@pytest.mark.parametrize("dtype", [np.uint8, np.uint16])
+def test_histogram_matches_bincount(dtype, monkeypatch):
+    # 块很小，覆盖分块累加
+    monkeypatch.setattr(histogram, "CHUNK_PIXELS", 64)
+    bins = histogram.levels(dtype)
+    img = np.random.default_rng(0).integers(0, bins, (37, 29, 3)).astype(dtype)
+    hist = histogram.histogram(img)
+    for c in range(3):
+        np.testing.assert_array_equal(hist[c], np.bincount(img[:, :, c].ravel(), minlength=bins))
+
+
+def test_histogram_roi_and_mask():
+    img = np.random.default_rng(1).integers(0, 256, (40, 50), dtype=np.uint8)
+    mask = np.random.default_rng(2).integers(0, 2, (10, 20), dtype=np.uint8)
+    region = img[5:15, 3:23]
+    hist = histogram.histogram(img, roi=(3, 5, 20, 10), mask=mask)
+    np.testing.assert_array_equal(hist[0], np.bincount(region[mask > 0], minlength=256))
+
+
+def test_percentiles_match_sorting():
+    img = np.random.default_rng(3).integers(0, 256, (31, 33), dtype=np.uint8)
+    values = np.sort(img.ravel())
+    result = histogram.percentiles(histogram.histogram(img), [1, 50, 99, 100])
+    # 第一个累积计数达到 q% 的灰度级，即排序后第 ceil(q% x 总数) 个值
+    expected = [values[max(int(np.ceil(q / 100 * values.size)), 1) - 1] for q in (1, 50, 99, 100)]
+    np.testing.assert_array_equal(result[0], expected)
+
+
+@pytest.mark.parametrize("dtype", [np.uint8, np.uint16])
+@pytest.mark.parametrize("masked", [False, True])
+def test_engine_update_matches_recompute(dtype, masked):
+    rng = np.random.default_rng(4)
+    bins = histogram.levels(dtype)
+    img = rng.integers(0, bins, (60, 80, 3)).astype(dtype)
+    roi = (10, 5, 50, 40)
+    mask = rng.integers(0, 2, (40, 50), dtype=np.uint8) if masked else None
+    engine = histogram.HistogramEngine(img, roi, mask)
+    for _ in range(20):
+        # 随机区域（可能部分落在统计区域之外）改为新的像素
+        x, y = rng.integers(0, 70), rng.integers(0, 50)
+        w, h = rng.integers(1, 81 - x), rng.integers(1, 61 - y)
+        old = img[y:y + h, x:x + w].copy()
+        img[y:y + h, x:x + w] = rng.integers(0, bins, old.shape)
+        engine.update((x, y, w, h), old, img[y:y + h, x:x + w])
+        np.testing.assert_array_equal(engine.hist, histogram.histogram(img, roi, mask))
+
+
+def test_changed_roi():
+    img = np.zeros((30, 40), np.uint8)
+    edited = img.copy()
+    assert histogram.changed_roi(img, edited) is None
+    edited[7, 30] = 1
+    edited[12, 4] = 2
+    assert histogram.changed_roi(img, edited) == (4, 7, 27, 6)
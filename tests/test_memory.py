@@ -0,0 +1,73 @@
+"""
+写时复制、临时缓冲区池与内存预算（core.memory）
+
+在项目根目录下以 python -m pytest tests 运行
+"""
+import numpy as np
+import pytest
+
+from core.graph import execute
+from core.memory import RELEASE_DERIVED, RELEASE_HISTORY, MemoryBudget, ScratchPool, buffer_bytes, freeze, writable
+from core.pipeline import parse_pipeline
+
+
+def test_freeze_and_writable():
+    img = np.zeros((4, 5), dtype=np.uint8)
+    view = img[1:3]
+    freeze(view)
+    assert not img.flags.writeable and not view.flags.writeable
+    with pytest.raises(ValueError):
+        img[0, 0] = 1
+    copy = writable(img)
+    assert copy is not img and copy.flags.writeable
+    assert writable(copy) is copy
+
+
+def test_buffer_bytes_counts_shared_memory_once():
+    img = np.zeros((10, 10), dtype=np.uint8)
+    assert buffer_bytes([img, img, img[2:5], None]) == 100
+    assert buffer_bytes([img, np.zeros(50, dtype=np.uint8)]) == 150
+
+
+def test_scratch_pool_reuses_and_limits():
+    pool = ScratchPool(1000)
+    with pool.borrow((10, 10), np.uint8) as buffer:
+        pass
+    assert pool.usage() == 100
+    assert pool.take((10, 10), np.uint8) is buffer
+    # 已共享的数组与超出上限的缓冲区都不接受
+    pool.give(freeze(np.zeros(10, dtype=np.uint8)))
+    pool.give(np.zeros(2000, dtype=np.uint8))
+    assert pool.usage() == 0
+    for _ in range(20):
+        pool.give(np.zeros(100, dtype=np.uint8))
+    assert pool.usage() == 1000
+
+
+def test_budget_releases_in_order():
+    sizes = {"cache": 300, "history": 500}
+    released = []
+
+    def release(name):
+        def run(excess):
+            released.append(name)
+            sizes[name] = max(0, sizes[name] - excess)
+        return run
+
+    budget = MemoryBudget(1000)
+    budget.register("image", lambda: 400)
+    budget.register("history", lambda: sizes["history"], release("history"), RELEASE_HISTORY)
+    budget.register("cache", lambda: sizes["cache"], release("cache"), RELEASE_DERIVED)
+    assert budget.total() == 1200
+    assert budget.enforce() == 200
+    assert released == ["cache"] and budget.total() == 1000
+    budget.set_limit(500)
+    assert released == ["cache", "cache", "history"] and budget.total() == 500
+
+
+def test_execute_never_writes_into_frozen_input():
+    img = freeze(np.random.default_rng(0).integers(0, 256, (30, 40, 3), dtype=np.uint8))
+    original = img.copy()
+    result = execute(img, parse_pipeline("point:invert,noise:gaussian:seed=1,point:gamma,noise:salt_pepper:seed=2"))
+    np.testing.assert_array_equal(img, original)
+    assert result is not img
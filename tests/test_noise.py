@@ -0,0 +1,38 @@
+"""
+噪声生成（core.noise）的可复现性与输出数组
+
+在项目根目录下以 python -m pytest tests 运行
+"""
+import numpy as np
+import pytest
+
+from core.noise import NoiseGenerator
+
+
+@pytest.fixture(scope="module")
+def image():
+    return np.random.default_rng(0).integers(0, 256, (120, 150, 3), dtype=np.uint8)
+
+
+@pytest.mark.parametrize("method", ["gaussian", "speckle", "poisson", "salt_pepper"])
+def test_out_matches_new_image(image, method):
+    expected = getattr(NoiseGenerator(4), method)(image)
+    # 原地写回输入
+    inplace = image.copy()
+    getattr(NoiseGenerator(4), method)(inplace, out=inplace)
+    np.testing.assert_array_equal(inplace, expected)
+    # 不连续的输出数组
+    base = np.zeros((image.shape[0], image.shape[1] * 2, 3), dtype=np.uint8)
+    getattr(NoiseGenerator(4), method)(image, out=base[:, ::2])
+    np.testing.assert_array_equal(base[:, ::2], expected)
+    assert not base[:, 1::2].any()
+
+
+@pytest.mark.parametrize("probability", [0.01, 0.5, 0.95])
+def test_salt_pepper_probability(probability):
+    img = np.full((400, 500), 128, dtype=np.uint8)
+    result = NoiseGenerator(1).salt_pepper(img, probability)
+    replaced = result != 128
+    assert abs(replaced.mean() - probability) < 0.01
+    assert abs((result[replaced] == 255).mean() - 0.5) < 0.02
+    assert set(np.unique(result)) <= {0, 128, 255}
@@ -0,0 +1,71 @@
+"""
+流水线（core.pipeline、core.graph）与逐步执行 apply_operation 的一致性
+
+在项目根目录下以 python -m pytest tests 运行
+"""
+import numpy as np
+import pytest
+
+from core.graph import LazyImage, execute, optimize
+from core.operations import OPERATIONS, apply_operation
+from core.pipeline import Step, apply_pipeline, format_pipeline, parse_pipeline, seed_steps
+
+ALL_STEPS = [Step(op, mode, {"seed": 1} if op == "noise" else None)
+             for op, (_, modes) in OPERATIONS.items() for mode in modes.values()]
+
+
+@pytest.fixture(scope="module")
+def image():
+    rng = np.random.default_rng(0)
+    return rng.integers(0, 256, (48, 64, 3), dtype=np.uint8)
+
+
+@pytest.mark.parametrize("step", ALL_STEPS, ids=lambda step: f"{step.op}:{step.mode}")
+def test_single_step_matches_apply_operation(image, step):
+    # 单个步骤不做任何合并，结果与直接调用完全一致
+    expected = apply_operation(image, step.op, step.mode, step.params)
+    np.testing.assert_array_equal(apply_pipeline(image, [step]), expected)
+
+
+@pytest.mark.parametrize("pipeline", [
+    "geometric:hflip,geometric:rotate_cw,geometric:vflip,geometric:rotate_cw",
+    "geometric:hflip,geometric:hflip",
+    "point:brightness,point:contrast,point:gamma,point:levels",
+])
+def test_fused_steps_are_exact(image, pipeline):
+    steps = parse_pipeline(pipeline)
+    expected = image
+    for step in steps:
+        expected = apply_operation(expected, step.op, step.mode, step.params)
+    np.testing.assert_array_equal(execute(image, steps), expected)
+
+
+def test_fused_linear_filters_within_one_level(image):
+    # 合并的线性滤波只在中间不取整，离边缘一个核半径以外与逐步执行相差不超过 1
+    steps = parse_pipeline("blur:gaussian,blur:mean,blur:gaussian")
+    assert len(optimize(steps)) == 1
+    expected = image
+    for step in steps:
+        expected = apply_operation(expected, step.op, step.mode, step.params)
+    inner = (slice(8, -8), slice(8, -8))
+    np.testing.assert_allclose(execute(image, steps)[inner], expected[inner], atol=1)
+
+
+def test_lazy_image_evaluates_once(image):
+    lazy = LazyImage(image).then(Step("point", "invert")).then(Step("geometric", "hflip"))
+    result = lazy.evaluate()
+    assert lazy.evaluate() is result
+    np.testing.assert_array_equal(result, (255 - image)[:, ::-1])
+
+
+def test_format_pipeline_round_trip():
+    text = "geometric:hflip,noise:gaussian:seed=42:variance=100.5,blur:percentile:percentile=25"
+    assert format_pipeline(parse_pipeline(text)) == text
+
+
+def test_seed_steps_is_reproducible():
+    steps = parse_pipeline("noise:gaussian,blur:mean,noise:poisson:seed=3")
+    seeded = seed_steps(steps, [7, 0])
+    assert seeded == seed_steps(steps, [7, 0])
+    assert "seed" in seeded[0].params and seeded[2].params["seed"] == 3
+    assert seeded[1] == steps[1]
@@ -0,0 +1,67 @@
+"""
+秩滤波（core.rank）与逐窗口排序的一致性
+
+在项目根目录下以 python -m pytest tests 运行
+"""
+import time
+
+import cv2
+import numpy as np
+import pytest
+
+from core import rank
+from core.rank import median_filter, rank_filter
+
+
+def reference(img, ksize, percentile):
+    """
+    逐像素对复制边界后的窗口排序
+    """
+    radius = ksize // 2
+    padded = cv2.copyMakeBorder(img, radius, radius, radius, radius, cv2.BORDER_REPLICATE)
+    index = round(percentile / 100 * (ksize * ksize - 1))
+    out = np.empty_like(img)
+    for y in range(img.shape[0]):
+        for x in range(img.shape[1]):
+            out[y, x] = np.sort(padded[y:y + ksize, x:x + ksize].ravel())[index]
+    return out
+
+
+@pytest.mark.parametrize("dtype, levels", [
+    (np.uint8, 256),
+    (np.uint16, 65536),
+    (np.uint16, 40),
+])
+@pytest.mark.parametrize("ksize, percentile", [(3, 50), (7, 30), (11, 90)])
+def test_rank_filter_matches_sorting(dtype, levels, ksize, percentile):
+    rng = np.random.default_rng(ksize)
+    step = 1 if levels > 256 else (np.iinfo(dtype).max + 1) // levels
+    img = (rng.integers(0, levels, (23, 31)) * step).astype(dtype)
+    np.testing.assert_array_equal(rank_filter(img, ksize, percentile), reference(img, ksize, percentile))
+
+
+def test_strips(monkeypatch):
+    # 分条很窄时各条拼接的结果与一次处理相同
+    img = np.random.default_rng(1).integers(0, 65536, (19, 27), dtype=np.uint16)
+    expected = reference(img, 5, 50)
+    monkeypatch.setattr(rank, "HISTOGRAM_STRIP", 4)
+    np.testing.assert_array_equal(rank_filter(img, 5, 50), expected)
+
+
+def test_time_independent_of_radius():
+    # 不同值很多的 16 位图像：31 与 101 的窗口耗时相近
+    rng = np.random.default_rng(3)
+    img = rng.integers(0, 65536, (96, 160), dtype=np.uint16)
+    assert np.unique(img).size > 10000
+    elapsed = {}
+    for ksize in (31, 101):
+        start = time.perf_counter()
+        rank_filter(img, ksize, 50)
+        elapsed[ksize] = time.perf_counter() - start
+    assert elapsed[101] < 2 * elapsed[31]
+
+
+def test_median_filter_color():
+    img = np.random.default_rng(2).integers(0, 65536, (15, 17, 3), dtype=np.uint16)
+    expected = np.dstack([reference(np.ascontiguousarray(img[:, :, c]), 7, 50) for c in range(3)])
+    np.testing.assert_array_equal(median_filter(img, 7), expected)
@@ -0,0 +1,39 @@
+"""
+共享内存批处理（core.staged）与直接执行流水线的一致性和错误处理
+
+在项目根目录下以 python -m pytest tests 运行
+"""
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+from core.io import read_image
+from core.pipeline import apply_pipeline, parse_pipeline
+from core.staged import run_staged
+
+MATERIALS = Path(__file__).resolve().parent.parent / "materials"
+FILES = [MATERIALS / "t0.png", MATERIALS / "t1.png", MATERIALS / "pic1.png"]
+STEPS = parse_pipeline("geometric:hflip,blur:gaussian,point:gamma,noise:gaussian:seed=7")
+
+
+def test_staged_matches_apply_pipeline(tmp_path):
+    targets = [tmp_path / f.name for f in FILES]
+    outcomes = list(run_staged(FILES, targets, [STEPS] * len(FILES), [[]] * len(FILES), jobs=2))
+    assert all(error is None for *_, error in outcomes)
+    for src, dst in zip(FILES, targets):
+        np.testing.assert_array_equal(read_image(dst), apply_pipeline(read_image(src), STEPS))
+
+
+def test_write_failures_are_reported(tmp_path):
+    # 输出目录不存在：每个文件都报告失败，而不是一直等待
+    targets = [tmp_path / "missing" / f.name for f in FILES]
+    outcomes = list(run_staged(FILES, targets, [STEPS] * len(FILES), [[]] * len(FILES), jobs=2))
+    assert len(outcomes) == len(FILES)
+    assert all(error for *_, error in outcomes)
+
+
+def test_unsupported_suffix_fails_before_starting(tmp_path):
+    targets = [tmp_path / (f.stem + ".xyz") for f in FILES]
+    with pytest.raises(ValueError):
+        next(run_staged(FILES, targets, [STEPS] * len(FILES), [[]] * len(FILES), jobs=2))
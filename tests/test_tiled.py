@@ -0,0 +1,30 @@
+"""
+分块执行（core.tiled）与整幅执行流水线的一致性
+
+在项目根目录下以 python -m pytest tests 运行
+"""
+import numpy as np
+import pytest
+
+from core.pipeline import apply_pipeline, parse_pipeline
+from core.tiled import TiledExecutor
+
+
+@pytest.fixture(scope="module")
+def image():
+    rng = np.random.default_rng(0)
+    return rng.integers(0, 256, (90, 130, 3), dtype=np.uint8)
+
+
+@pytest.mark.parametrize("pipeline", [
+    "color_space:hsv,geometric:hflip,color_space:gray",
+    "color_space:hsv,geometric:rotate_cw,color_space:bgr",
+    "color_space:ycrcb,edge:canny,color_space:gray",
+    "geometric:vflip,blur:median,point:gamma,geometric:hflip",
+    "blur:gaussian,edge:sobel,point:invert",
+])
+def test_tiled_matches_apply_pipeline(image, tmp_path, pipeline):
+    steps = parse_pipeline(pipeline)
+    result = TiledExecutor(tile=32, workdir=tmp_path).run(image, steps, tmp_path / "out.npy")
+    np.testing.assert_array_equal(np.asarray(result), apply_pipeline(image, steps))
+    del result
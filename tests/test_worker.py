@@ -0,0 +1,49 @@
+"""
+后台操作队列（gui.worker.OperationRunner）的取消
+
+在项目根目录下以 python -m pytest tests 运行
+"""
+import time
+
+import pytest
+from PySide6.QtCore import QCoreApplication
+
+from gui.worker import OperationRunner
+
+
+@pytest.fixture(scope="module")
+def app():
+    return QCoreApplication.instance() or QCoreApplication([])
+
+
+def run_until(app, condition, timeout=5.0):
+    deadline = time.perf_counter() + timeout
+    while not condition() and time.perf_counter() < deadline:
+        app.processEvents()
+        time.sleep(0.005)
+    return condition()
+
+
+@pytest.mark.parametrize("fails", [False, True])
+def test_cancelled_task_does_not_affect_later_tasks(app, fails):
+    """
+    任务已经结束、但结果在取消之后才送达界面线程：结果和错误都被丢弃，取消之后提交的操作照常执行
+    """
+    runner = OperationRunner(lambda: 0)
+    results, errors = [], []
+    runner.result_ready.connect(results.append)
+    runner.failed.connect(errors.append)
+
+    def stale(img, report):
+        if fails:
+            raise AttributeError("history is gone")
+        return "stale"
+
+    runner.submit(stale)
+    # 不处理事件：任务在后台结束，结束信号排队等待界面线程
+    time.sleep(0.2)
+    runner.cancel()
+    runner.submit(lambda img, report: "fresh")
+    assert run_until(app, lambda: not runner.busy())
+    assert results == ["fresh"]
+    assert errors == []
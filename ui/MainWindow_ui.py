@@ -106,6 +106,7 @@ class Ui_MainWindow(object):
         self.color_space_Box.addItem("")
         self.color_space_Box.addItem("")
         self.color_space_Box.addItem("")
+        self.color_space_Box.addItem("")
         self.color_space_Box.setObjectName(u"color_space_Box")
         self.color_space_Box.setMinimumSize(QSize(0, 50))
 
@@ -160,6 +161,8 @@ class Ui_MainWindow(object):
         self.noise_Box = QComboBox(self.centralwidget)
         self.noise_Box.addItem("")
         self.noise_Box.addItem("")
+        self.noise_Box.addItem("")
+        self.noise_Box.addItem("")
         self.noise_Box.setObjectName(u"noise_Box")
         self.noise_Box.setMinimumSize(QSize(0, 50))
 
@@ -192,6 +195,12 @@ class Ui_MainWindow(object):
         self.blur_Box.addItem("")
         self.blur_Box.addItem("")
         self.blur_Box.addItem("")
+        self.blur_Box.addItem("")
+        self.blur_Box.addItem("")
+        self.blur_Box.addItem("")
+        self.blur_Box.addItem("")
+        self.blur_Box.addItem("")
+        self.blur_Box.addItem("")
         self.blur_Box.setObjectName(u"blur_Box")
         self.blur_Box.setMinimumSize(QSize(0, 50))
         self.blur_Box.setDuplicatesEnabled(False)
@@ -220,6 +229,7 @@ class Ui_MainWindow(object):
         self.edge_Box.addItem("")
         self.edge_Box.addItem("")
         self.edge_Box.addItem("")
+        self.edge_Box.addItem("")
         self.edge_Box.setObjectName(u"edge_Box")
         self.edge_Box.setMinimumSize(QSize(0, 50))
         self.edge_Box.setMaxVisibleItems(10)
@@ -236,6 +246,38 @@ class Ui_MainWindow(object):
 
         self.horizontalLayout_2.addLayout(self.verticalLayout_6)
 
+        self.verticalLayout_10 = QVBoxLayout()
+        self.verticalLayout_10.setObjectName(u"verticalLayout_10")
+        self.label_9 = QLabel(self.centralwidget)
+        self.label_9.setObjectName(u"label_9")
+        self.label_9.setFont(font1)
+        self.label_9.setAlignment(Qt.AlignmentFlag.AlignCenter)
+
+        self.verticalLayout_10.addWidget(self.label_9)
+
+        self.point_Box = QComboBox(self.centralwidget)
+        self.point_Box.addItem("")
+        self.point_Box.addItem("")
+        self.point_Box.addItem("")
+        self.point_Box.addItem("")
+        self.point_Box.addItem("")
+        self.point_Box.addItem("")
+        self.point_Box.setObjectName(u"point_Box")
+        self.point_Box.setMinimumSize(QSize(0, 50))
+        self.point_Box.setMaxVisibleItems(10)
+
+        self.verticalLayout_10.addWidget(self.point_Box)
+
+        self.point_button = QPushButton(self.centralwidget)
+        self.point_button.setObjectName(u"point_button")
+        self.point_button.setMinimumSize(QSize(0, 50))
+        self.point_button.setAutoRepeat(False)
+
+        self.verticalLayout_10.addWidget(self.point_button)
+
+
+        self.horizontalLayout_2.addLayout(self.verticalLayout_10)
+
         self.verticalLayout_7 = QVBoxLayout()
         self.verticalLayout_7.setObjectName(u"verticalLayout_7")
         self.label_8 = QLabel(self.centralwidget)
@@ -280,6 +322,16 @@ class Ui_MainWindow(object):
 
         self.verticalLayout.addWidget(self.load_button)
 
+        self.stream_button = QPushButton(self.centralwidget)
+        self.stream_button.setObjectName(u"stream_button")
+        self.stream_button.setEnabled(True)
+        sizePolicy2.setHeightForWidth(self.stream_button.sizePolicy().hasHeightForWidth())
+        self.stream_button.setSizePolicy(sizePolicy2)
+        self.stream_button.setMinimumSize(QSize(0, 40))
+        self.stream_button.setFont(font3)
+
+        self.verticalLayout.addWidget(self.stream_button)
+
         self.reset_button = QPushButton(self.centralwidget)
         self.reset_button.setObjectName(u"reset_button")
         sizePolicy2.setHeightForWidth(self.reset_button.sizePolicy().hasHeightForWidth())
@@ -298,6 +350,24 @@ class Ui_MainWindow(object):
 
         self.verticalLayout.addWidget(self.save_button)
 
+        self.export_button = QPushButton(self.centralwidget)
+        self.export_button.setObjectName(u"export_button")
+        sizePolicy2.setHeightForWidth(self.export_button.sizePolicy().hasHeightForWidth())
+        self.export_button.setSizePolicy(sizePolicy2)
+        self.export_button.setMinimumSize(QSize(0, 40))
+        self.export_button.setFont(font3)
+
+        self.verticalLayout.addWidget(self.export_button)
+
+        self.measure_button = QPushButton(self.centralwidget)
+        self.measure_button.setObjectName(u"measure_button")
+        sizePolicy2.setHeightForWidth(self.measure_button.sizePolicy().hasHeightForWidth())
+        self.measure_button.setSizePolicy(sizePolicy2)
+        self.measure_button.setMinimumSize(QSize(0, 40))
+        self.measure_button.setFont(font3)
+
+        self.verticalLayout.addWidget(self.measure_button)
+
 
         self.horizontalLayout_2.addLayout(self.verticalLayout)
 
@@ -321,6 +391,7 @@ class Ui_MainWindow(object):
         self.color_space_Box.setItemText(0, QCoreApplication.translate("MainWindow", u"GRAY", None))
         self.color_space_Box.setItemText(1, QCoreApplication.translate("MainWindow", u"HSV", None))
         self.color_space_Box.setItemText(2, QCoreApplication.translate("MainWindow", u"YCrCb", None))
+        self.color_space_Box.setItemText(3, QCoreApplication.translate("MainWindow", u"BGR", None))
 
         self.color_space_button.setText(QCoreApplication.translate("MainWindow", u"\u8f6c\u6362\u8272\u5f69\u7a7a\u95f4", None))
         self.label_4.setText(QCoreApplication.translate("MainWindow", u"\u53d8\u6362\u65b9\u5f0f", None))
@@ -333,26 +404,47 @@ class Ui_MainWindow(object):
         self.label_6.setText(QCoreApplication.translate("MainWindow", u"\u566a\u58f0\u6837\u5f0f", None))
         self.noise_Box.setItemText(0, QCoreApplication.translate("MainWindow", u"\u9ad8\u65af\u566a\u58f0", None))
         self.noise_Box.setItemText(1, QCoreApplication.translate("MainWindow", u"\u6912\u76d0\u566a\u58f0", None))
+        self.noise_Box.setItemText(2, QCoreApplication.translate("MainWindow", u"\u6cca\u677e\u566a\u58f0", None))
+        self.noise_Box.setItemText(3, QCoreApplication.translate("MainWindow", u"\u6563\u6591\u566a\u58f0", None))
 
         self.noise_button.setText(QCoreApplication.translate("MainWindow", u"\u6dfb\u52a0\u566a\u58f0", None))
         self.label_5.setText(QCoreApplication.translate("MainWindow", u"\u6ee4\u6ce2\u65b9\u6cd5", None))
         self.blur_Box.setItemText(0, QCoreApplication.translate("MainWindow", u"\u5747\u503c\u6ee4\u6ce2", None))
         self.blur_Box.setItemText(1, QCoreApplication.translate("MainWindow", u"\u4e2d\u503c\u6ee4\u6ce2", None))
-        self.blur_Box.setItemText(2, QCoreApplication.translate("MainWindow", u"\u9ad8\u65af\u6ee4\u6ce2", None))
-        self.blur_Box.setItemText(3, QCoreApplication.translate("MainWindow", u"\u4e8c\u7ef4\u5377\u79ef", None))
+        self.blur_Box.setItemText(2, QCoreApplication.translate("MainWindow", u"\u767e\u5206\u4f4d\u6ee4\u6ce2", None))
+        self.blur_Box.setItemText(3, QCoreApplication.translate("MainWindow", u"\u6700\u5c0f\u503c\u6ee4\u6ce2", None))
+        self.blur_Box.setItemText(4, QCoreApplication.translate("MainWindow", u"\u6700\u5927\u503c\u6ee4\u6ce2", None))
+        self.blur_Box.setItemText(5, QCoreApplication.translate("MainWindow", u"\u9ad8\u65af\u6ee4\u6ce2", None))
+        self.blur_Box.setItemText(6, QCoreApplication.translate("MainWindow", u"\u4e8c\u7ef4\u5377\u79ef", None))
+        self.blur_Box.setItemText(7, QCoreApplication.translate("MainWindow", u"\u4f4e\u901a\u6ee4\u6ce2", None))
+        self.blur_Box.setItemText(8, QCoreApplication.translate("MainWindow", u"\u9ad8\u901a\u6ee4\u6ce2", None))
+        self.blur_Box.setItemText(9, QCoreApplication.translate("MainWindow", u"\u5e26\u901a\u6ee4\u6ce2", None))
 
         self.blur_button.setText(QCoreApplication.translate("MainWindow", u"\u6ee4\u6ce2\u5904\u7406", None))
         self.label_7.setText(QCoreApplication.translate("MainWindow", u"\u8fb9\u7f18\u7b97\u5b50", None))
         self.edge_Box.setItemText(0, QCoreApplication.translate("MainWindow", u"Canny", None))
         self.edge_Box.setItemText(1, QCoreApplication.translate("MainWindow", u"Laplacian", None))
         self.edge_Box.setItemText(2, QCoreApplication.translate("MainWindow", u"Sobel", None))
+        self.edge_Box.setItemText(3, QCoreApplication.translate("MainWindow", u"Scharr", None))
 
         self.edge_button.setText(QCoreApplication.translate("MainWindow", u"\u8fb9\u7f18\u68c0\u6d4b", None))
+        self.label_9.setText(QCoreApplication.translate("MainWindow", u"\u70b9\u8fd0\u7b97", None))
+        self.point_Box.setItemText(0, QCoreApplication.translate("MainWindow", u"\u4eae\u5ea6", None))
+        self.point_Box.setItemText(1, QCoreApplication.translate("MainWindow", u"\u5bf9\u6bd4\u5ea6", None))
+        self.point_Box.setItemText(2, QCoreApplication.translate("MainWindow", u"\u4f3d\u9a6c\u6821\u6b63", None))
+        self.point_Box.setItemText(3, QCoreApplication.translate("MainWindow", u"\u4e8c\u503c\u5316", None))
+        self.point_Box.setItemText(4, QCoreApplication.translate("MainWindow", u"\u53cd\u76f8", None))
+        self.point_Box.setItemText(5, QCoreApplication.translate("MainWindow", u"\u8272\u9636\u62c9\u4f38", None))
+
+        self.point_button.setText(QCoreApplication.translate("MainWindow", u"\u8c03\u6574\u8272\u8c03", None))
         self.label_8.setText(QCoreApplication.translate("MainWindow", u"\u56fe\u50cf\u5c5e\u6027", None))
-        self.draw_button.setText(QCoreApplication.translate("MainWindow", u"\u7070\u5ea6\u76f4\u65b9\u56fe", None))
+        self.draw_button.setText(QCoreApplication.translate("MainWindow", u"\u901a\u9053\u76f4\u65b9\u56fe", None))
         self.fft_button.setText(QCoreApplication.translate("MainWindow", u"\u7070\u5ea6fft\u9891\u8c31", None))
         self.load_button.setText(QCoreApplication.translate("MainWindow", u"\u52a0\u8f7d\u56fe\u50cf", None))
+        self.stream_button.setText(QCoreApplication.translate("MainWindow", u"\u6253\u5f00\u89c6\u9891", None))
         self.reset_button.setText(QCoreApplication.translate("MainWindow", u"\u6062\u590d\u539f\u56fe", None))
         self.save_button.setText(QCoreApplication.translate("MainWindow", u"\u4fdd\u5b58\u56fe\u50cf", None))
+        self.export_button.setText(QCoreApplication.translate("MainWindow", u"\u6279\u91cf\u5bfc\u51fa", None))
+        self.measure_button.setText(QCoreApplication.translate("MainWindow", u"\u533a\u57df\u6d4b\u91cf", None))
     # retranslateUi
 